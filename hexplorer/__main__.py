@@ -0,0 +1,4 @@
+# Allows `python -m hexplorer`.
+from .main import main
+
+main()
@@ -0,0 +1,191 @@
+"""
+Non-Interactive Batch Mode.
+Streams hex codes or decimal indexes from stdin or a file through a
+generator pipeline and writes color metadata as JSONL or CSV.
+Every stage is lazy, so memory stays constant for any input size.
+
+    cat colors.txt | hexplorer batch --format csv > colors.csv
+"""
+
+import argparse
+import io
+import sys
+import time
+from itertools import islice
+
+from .codec import decode, encode, to_indexes
+from .core import MAX_DEC, get_color_metadata, is_valid_hex
+from .names import name_index
+from .tables import LUM_B, LUM_G, LUM_R
+from .writers import CHUNK_SIZE, CSV_FIELDS, METADATA_FIELDS, WRITERS, encode_json, silence_broken_pipe, write_csv
+
+# Throughput target for the batch pipeline (colors per second on one core).
+THROUGHPUT_TARGET = 100000
+
+# Function to yield (line_number, token) pairs for every non-empty input line.
+def read_tokens(stream):
+    for lineno, line in enumerate(stream, 1):
+        token = line.strip()
+        if token:
+            yield lineno, token
+
+# Function to turn one token into a decimal index, or None when it is not a color.
+# In "auto" mode "#"-prefixed or 6-digit tokens are hex, other digit strings are decimal indexes.
+def parse_token(token, mode="auto"):
+    if mode != "dec":
+        hex_code = token[1:] if token.startswith("#") else token
+        if is_valid_hex(hex_code):
+            return int(hex_code, 16)
+        if mode == "hex":
+            return None
+    if token.isdigit():
+        dec = int(token)
+        if dec <= MAX_DEC:
+            return dec
+    return None
+
+# Function to decode a chunk of (line_number, token) pairs in bulk when every token is a 6-digit hex code.
+# Returns (hex_codes, decimal_indexes), or None when some token needs the token-by-token parser.
+def _decode_chunk(chunk):
+    try:
+        packed = decode("\n".join(token for _, token in chunk), sizes=(6,))
+    except ValueError:
+        return None
+    if len(packed) != 3 * len(chunk):  # A line held more than one code.
+        return None
+    return encode(packed).split(), to_indexes(packed)
+
+# Function to parse tokens into (hex_code, decimal_index) pairs, reporting bad lines to `on_error`.
+# Chunks of plain hex codes go through the bulk codec; anything else is parsed token by token.
+def parse_colors(tokens, mode="auto", on_error=None, chunk_size=CHUNK_SIZE):
+    tokens = iter(tokens)
+    while True:
+        chunk = list(islice(tokens, chunk_size))
+        if not chunk:
+            return
+        decoded = _decode_chunk(chunk) if mode != "dec" else None
+        if decoded is not None:
+            yield from zip(*decoded)
+            continue
+        for lineno, token in chunk:
+            dec = parse_token(token, mode)
+            if dec is None:
+                if on_error is not None:
+                    on_error(lineno, token)
+                continue
+            yield f"{dec:06X}", dec
+
+# Function to lazily compute metadata for every parsed color.
+def metadata_stream(colors):
+    for hex_code, dec in colors:
+        yield get_color_metadata(hex_code, dec)
+
+# Function to format metadata records straight to JSONL or CSV text, yielding (lines, text) per chunk.
+# The text is exactly what WRITERS[fmt] writes for `metadata_stream(colors)`, but no dict is built per
+# color: the fields go into one f-string, and name ids are turned into escaped JSON strings / CSV fields once.
+# The first line of every call is checked against the reference writer, so the two cannot drift apart.
+def metadata_chunks(colors, fmt="jsonl", chunk_size=CHUNK_SIZE):
+    index = name_index()  # Same palette as `get_color_metadata`.
+    nearest_id = index.nearest_id
+    if fmt == "jsonl":
+        labels = [encode_json(name) for name in index.names]
+    else:
+        labels = [_csv_field(name) for name in index.names]
+    lum_r, lum_g, lum_b = LUM_R, LUM_G, LUM_B
+    white = 1.0 + 0.05  # `contrast_ratio(1.0, l)` is white / (l + 0.05).
+    colors = iter(colors)
+    checked = False
+    while True:
+        chunk = list(islice(colors, chunk_size))
+        if not chunk:
+            return
+        out = []
+        append = out.append
+        for _, dec in chunk:
+            r, g, b = dec >> 16, (dec >> 8) & 0xFF, dec & 0xFF
+            l = lum_r[r] + lum_g[g] + lum_b[b]
+            pid, d2 = nearest_id(r, g, b)
+            if fmt == "jsonl":
+                append(f'{{"hex":"#{dec:06X}","rgb":{{"r":{r},"g":{g},"b":{b}}},"luminance":{round(l, 6)},'
+                       f'"contrast_vs_white":"{round(white / (l + 0.05), 2)} : 1","decimal_index":{dec},'
+                       f'"name":{labels[pid]},"name_distance":{round(d2 ** 0.5, 2)}}}')
+            else:
+                append(f"#{dec:06X},{r},{g},{b},{round(l, 6)},{round(white / (l + 0.05), 2)},{dec},"
+                       f"{labels[pid]},{round(d2 ** 0.5, 2)}")
+        if not checked:
+            assert out[0] + "\n" == _reference_line(*chunk[0], fmt), "metadata_chunks is out of step with get_color_metadata"
+            checked = True
+        yield len(out), "\n".join(out) + "\n"
+
+# Function to format one color with the dict-based writers (the reference `metadata_chunks` must match).
+def _reference_line(hex_code, dec, fmt):
+    meta = get_color_metadata(hex_code, dec)
+    assert tuple(meta) == METADATA_FIELDS, "METADATA_FIELDS is out of date"
+    buf = io.StringIO()
+    if fmt == "csv":
+        write_csv([meta], buf, header=False)
+    else:
+        WRITERS[fmt]([meta], buf)
+    return buf.getvalue()
+
+# Function to quote a CSV field the way `csv.writer` does by default (only when it needs it).
+def _csv_field(text):
+    return f'"{text.replace(chr(34), chr(34) * 2)}"' if any(c in text for c in ',"\r\n') else text
+
+# Function to write metadata for every color as JSONL or CSV (see `metadata_chunks`); returns the record count.
+def write_metadata(colors, fp, fmt="jsonl", chunk_size=CHUNK_SIZE):
+    if fmt == "csv":
+        fp.write(",".join(CSV_FIELDS) + "\n")
+    count = 0
+    for lines, text in metadata_chunks(colors, fmt, chunk_size):
+        fp.write(text)  # One write per chunk.
+        count += lines
+    return count
+
+# Function to run `hexplorer batch` with the given command-line arguments.
+def run_batch(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="hexplorer batch",
+        description="Stream hex codes or decimal indexes (one per line) to JSONL or CSV color metadata.")
+    parser.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    parser.add_argument("-f", "--format", choices=sorted(WRITERS), default="jsonl", help="output format (default: jsonl)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--input-mode", choices=("auto", "hex", "dec"), default="auto",
+                        help="how to read tokens: auto, hex only or decimal indexes only (default: auto)")
+    parser.add_argument("--stats", action="store_true", help="report throughput on stderr when done")
+    args = parser.parse_args(argv)
+
+    skipped = [0]  # Invalid lines, counted inside the error callback.
+
+    def on_error(lineno, token):
+        skipped[0] += 1
+        if skipped[0] <= 10:  # Only echo the first few bad lines.
+            print(f"❌ Line {lineno}: Invalid color {token!r}", file=sys.stderr)
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", errors="replace")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    start = time.perf_counter()
+    try:
+        colors = parse_colors(read_tokens(src), args.input_mode, on_error)
+        count = write_metadata(colors, dst, args.format)
+        dst.flush()
+    except BrokenPipeError:
+        silence_broken_pipe()
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    elapsed = time.perf_counter() - start
+
+    if skipped[0]:
+        print(f"⚠️ Skipped {skipped[0]} invalid line(s)", file=sys.stderr)
+    if args.stats:
+        rate = count / elapsed if elapsed > 0 else float("inf")
+        status = "✅" if rate >= THROUGHPUT_TARGET else "⚠️"
+        print(f"{status} {count} colors in {elapsed:.2f}s ({rate:,.0f} colors/s, target {THROUGHPUT_TARGET:,})",
+              file=sys.stderr)
+    return 0
@@ -0,0 +1,297 @@
+"""
+Benchmark Suite.
+Micro benchmarks time single calls of the color core, macro benchmarks
+run end-to-end scenarios (a 10M-color metadata stream, a 1M-step gradient,
+a full-space search), and the startup budget is measured in fresh
+interpreters. Results are machine-readable JSON and can be compared
+against a stored baseline to flag regressions.
+
+    hexplorer bench --quick                      # Smaller scenarios, for a fast check.
+    hexplorer bench --save-baseline              # Store the results as the baseline.
+    hexplorer bench --compare -o results.json    # Flag anything slower than the baseline.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from contextlib import redirect_stdout
+
+from . import __version__
+from .index import default_cache_dir
+
+SUITES = ("micro", "macro", "startup")  # Benchmark groups, in run order.
+TOLERANCE = 0.10  # Slowdown (fraction) tolerated before a result counts as a regression.
+QUICK_SCALE = 100  # --quick divides every macro scenario size by this.
+
+# Macro scenario sizes at full scale.
+MACRO_SIZES = {
+    "metadata_stream": 10000000,  # Colors streamed through the batch pipeline.
+    "gradient_oklab": 1000000,  # Steps of an OKLab gradient streamed as JSONL.
+    "search_full_space": 16777216,  # Colors covered by a contrast + hue search.
+    "harmony_random": 1000000,  # Random base colors expanded into every harmony set, as JSONL.
+    "contrast_pairs": 10000,  # Palette colors whose every pair passing AA is written as JSONL.
+}
+
+# Function to get the default baseline file (in the hexplorer cache folder).
+def default_baseline_path():
+    return os.path.join(default_cache_dir(), "bench-baseline.json")
+
+class _Null(io.TextIOBase):
+    """ Text sink that discards everything, so benchmarks measure the work and not the terminal. """
+
+    def write(self, s):
+        return len(s)
+
+# Function to build the micro benchmarks: name -> zero-argument callable.
+def micro_benchmarks():
+    from . import main as ui  # Interactive printing wrappers.
+    from .codec import decode, encode_indexes
+    from itertools import cycle
+    from .color import METADATA_CACHE_SIZE, Color
+    from .contrast import ContrastPalette
+    from .core import get_color_blindness, get_color_metadata, get_scheme, hex_to_rgb, is_valid_hex, mix_hex, rgb_to_hex
+    from .gradient import iter_gradient
+    from .harmony import HarmonyPlan
+    from .names import nearest_name
+    from .render import color_block
+    from .spaces import delta_e
+    from .tables import relative_luminance
+
+    null = _Null()
+    codes = "\n".join(f"#{dec * 16411 & 0xFFFFFF:06X}" for dec in range(1000))  # 1000 codes for the bulk codec.
+    plan = HarmonyPlan()  # Every harmony, offsets computed once.
+    # More distinct colors than the metadata LRU holds, visited in a cycle, so every call misses the cache.
+    uncached = cycle([f"{dec * 16411 & 0xFFFFFF:06X}" for dec in range(2 * METADATA_CACHE_SIZE)]).__next__
+    tokens = ContrastPalette(dec * 16411 & 0xFFFFFF for dec in range(1000))  # 1000 colors, luminance sorted once.
+
+    def quiet(func, *args):  # Runs a printing function with stdout discarded.
+        def run():
+            with redirect_stdout(null):
+                func(*args)
+        return run
+
+    return {
+        "hex_to_rgb": lambda: hex_to_rgb("1A73E8"),
+        "rgb_to_hex": lambda: rgb_to_hex(26, 115, 232),
+        "is_valid_hex": lambda: is_valid_hex("1A73E8"),
+        "relative_luminance": lambda: relative_luminance(26, 115, 232),
+        "nearest_name": lambda: nearest_name(26, 115, 232),
+        "get_color_metadata": lambda: get_color_metadata(uncached()),  # The full metadata path.
+        "get_color_metadata_cached": lambda: get_color_metadata("1A73E8"),  # A metadata LRU hit.
+        "color_contrast": lambda: Color.from_hex("1A73E8").contrast,
+        "codec_decode_1000": lambda: decode(codes),
+        "codec_encode_1000": lambda: encode_indexes(range(1000)),
+        "mix_hex": lambda: mix_hex("1A73E8", "FF5500"),
+        "get_scheme": lambda: get_scheme("1A73E8"),
+        "get_color_blindness": lambda: get_color_blindness("1A73E8"),
+        "delta_e_ciede2000": lambda: delta_e("1A73E8", "4285F4", "ciede2000"),
+        "gradient_100_steps": lambda: list(iter_gradient(["1A73E8", "FF5500"], 100, "oklab")),
+        "color_block": lambda: color_block("1A73E8"),
+        "simulate_color_blindness": quiet(ui.simulate_color_blindness, "1A73E8"),
+        "generate_scheme": quiet(ui.generate_scheme, "1A73E8"),
+        "harmony_sets_1000": lambda: plan.sets(range(0, 1 << 24, 1 << 14)),
+        "contrast_count_1000": lambda: tokens.count(4.5),
+    }
+
+# Function to time one callable: best nanoseconds per call over several timeit repeats.
+def time_call(func, repeat=5):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()  # Enough calls for at least 0.2 s per repeat.
+    return min(timer.repeat(repeat, number)) / number * 1e9
+
+# Function to run the micro benchmarks, returning name -> {"ns_per_call": ...}.
+def run_micro(names=None, repeat=5):
+    results = {}
+    for name, func in micro_benchmarks().items():
+        if names and name not in names:
+            continue
+        results[name] = {"ns_per_call": round(time_call(func, repeat), 1)}
+    return results
+
+# Function to stream `count` colors through the batch pipeline into JSONL.
+def _metadata_stream(count):
+    from .batch import write_metadata
+    step = max((1 << 24) // count, 1)  # Spread the colors over the whole space.
+    colors = ((f"{dec:06X}", dec) for dec in ((i * step) & 0xFFFFFF for i in range(count)))
+    return write_metadata(colors, _Null())  # The same formatter `hexplorer batch` writes with.
+
+# Function to stream a `count`-step OKLab gradient as JSONL.
+def _gradient(count):
+    from .gradient import gradient_metadata
+    from .writers import write_jsonl
+    return write_jsonl(gradient_metadata(["1A73E8", "FF5500", "00C853"], count - 1, "oklab"), _Null())
+
+# Function to search `count` colors (from index 0) for contrast >= 4.5 against white with a hue of 200-220°.
+def _search(count):
+    from .search import Contrast, Hue, search
+    return sum(1 for _ in search(Contrast(4.5) & Hue(200, 220), stop=count))
+
+# Function to expand `count` seeded random base colors into every harmony set as JSONL.
+def _harmony(count):
+    from .harmony import random_harmony_chunks
+    return sum(chunk.count("\n") for chunk in random_harmony_chunks(count, seed=1))
+
+# Function to write every pair passing AA of a `count`-color palette as JSONL.
+def _contrast(count):
+    from .contrast import ContrastPalette, pair_chunks
+    palette = ContrastPalette(i * 2654435761 & 0xFFFFFF for i in range(count))  # Spread over the whole space.
+    return sum(chunk.count("\n") for chunk in pair_chunks(palette, 4.5))
+
+# Macro scenarios: name -> function(size) returning the number of items produced.
+MACRO = {
+    "metadata_stream": _metadata_stream,
+    "gradient_oklab": _gradient,
+    "search_full_space": _search,
+    "harmony_random": _harmony,
+    "contrast_pairs": _contrast,
+}
+
+# Function to get the peak resident memory of this process in MB (None where unavailable).
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows.
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+# Function to run the macro scenarios, returning name -> {"size", "seconds", "items", "items_per_s", "peak_rss_mb"}.
+def run_macro(names=None, scale=1):
+    results = {}
+    for name, func in MACRO.items():
+        if names and name not in names:
+            continue
+        size = max(MACRO_SIZES[name] // scale, 1)
+        start = time.perf_counter()
+        items = func(size)
+        seconds = time.perf_counter() - start
+        results[name] = {"size": size, "seconds": round(seconds, 3), "items": items,
+                         "items_per_s": round(size / seconds if seconds > 0 else 0.0, 1),
+                         "peak_rss_mb": _peak_rss_mb()}
+    return results
+
+# Function to run the startup budget, returning name -> {"ms", "budget_ms"}.
+def run_startup(runs=10):
+    from .startup import check_startup
+    return {name: {"ms": round(ms, 2), "budget_ms": budget} for name, ms, budget, _ in check_startup(runs)}
+
+# Function to run the selected suites and collect the results as one JSON-serializable dict.
+def run_suites(suites=SUITES, names=None, quick=False):
+    results = {
+        "hexplorer": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "quick": quick,
+    }
+    if "micro" in suites:
+        results["micro"] = run_micro(names, repeat=3 if quick else 5)
+    if "macro" in suites:
+        results["macro"] = run_macro(names, QUICK_SCALE if quick else 1)
+    if "startup" in suites:
+        results["startup"] = run_startup(3 if quick else 10)
+    return results
+
+# Function to get the comparable metric of one result and whether lower is better.
+def _metric(suite, result):
+    if suite == "micro":
+        return result["ns_per_call"], True
+    if suite == "macro":
+        return result["items_per_s"], False
+    return result["ms"], True
+
+# Function to compare results with a baseline, returning (suite, name, current, baseline, change, regressed) rows.
+# `change` is the slowdown as a fraction (positive is slower); macro scenarios only compare at equal sizes.
+def compare(results, baseline, tolerance=TOLERANCE):
+    rows = []
+    for suite in SUITES:
+        for name, result in results.get(suite, {}).items():
+            base = baseline.get(suite, {}).get(name)
+            if base is None or (suite == "macro" and base.get("size") != result.get("size")):
+                continue
+            current, lower_is_better = _metric(suite, result)
+            previous, _ = _metric(suite, base)
+            if not previous or not current:
+                continue
+            change = current / previous - 1 if lower_is_better else previous / current - 1
+            rows.append((suite, name, current, previous, change, change > tolerance))
+    return rows
+
+# Function to print results as a readable table on stderr.
+def _report(results, rows):
+    units = {"micro": "ns/call", "macro": "items/s", "startup": "ms"}
+    changes = {(suite, name): (change, bad) for suite, name, _, _, change, bad in rows}
+    for suite in SUITES:
+        if suite not in results:
+            continue
+        print(f"\n📊 {suite.title()} ({units[suite]})", file=sys.stderr)
+        for name, result in results[suite].items():
+            value, _ = _metric(suite, result)
+            line = f"   {name:<26} {value:>14,.1f}"
+            if (suite, name) in changes:
+                change, bad = changes[(suite, name)]
+                line += f"   {'❌' if bad else '✅'} {change:+.1%} vs baseline"
+            print(line, file=sys.stderr)
+
+# Function to run `hexplorer bench` with the given command-line arguments.
+def run_bench(argv=None):
+    parser = argparse.ArgumentParser(prog="hexplorer bench", description="Run the micro and macro benchmark suite.")
+    parser.add_argument("suites", nargs="*", metavar="SUITE", help="suites to run: micro, macro, startup (default: all)")
+    parser.add_argument("-k", "--only", action="append", metavar="NAME", help="run only this benchmark (repeatable)")
+    parser.add_argument("--quick", action="store_true", help=f"divide macro scenario sizes by {QUICK_SCALE}")
+    parser.add_argument("-o", "--output", default=None, help="write the JSON results to this file (default: stdout)")
+    parser.add_argument("--baseline", default=default_baseline_path(), help="baseline results file")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help=f"slowdown tolerated by --compare, as a fraction (default: {TOLERANCE})")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+    for suite in args.suites:
+        if suite not in SUITES:
+            parser.error(f"unknown suite: {suite} (choose from {', '.join(SUITES)})")
+
+    if args.list:
+        from .startup import STARTUP_BUDGET_MS
+        print("micro:   " + ", ".join(micro_benchmarks()))
+        print("macro:   " + ", ".join(f"{name} ({MACRO_SIZES[name]:,})" for name in MACRO))
+        print("startup: " + ", ".join(STARTUP_BUDGET_MS))
+        return 0
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot read baseline {args.baseline}: {e}", file=sys.stderr)
+            return 2
+
+    results = run_suites(tuple(args.suites) or SUITES, set(args.only or ()), args.quick)
+    rows = compare(results, baseline, args.tolerance) if baseline is not None else []
+    _report(results, rows)
+
+    text = json.dumps(results, indent=2) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"\n💾 Baseline Saved To: {args.baseline}", file=sys.stderr)
+
+    regressions = [row for row in rows if row[5]]
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.tolerance:.0%}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,171 @@
+"""
+Bulk Hex Codec.
+Validates, decodes and encodes hex color codes a whole buffer at a time.
+Decoding splits the buffer once, strips "#" prefixes with one replace and
+hands all same-length codes to a single `unhexlify` call, so the work per
+color stays in C; only buffers mixing lengths (or holding invalid codes)
+fall back to a per-token pass. Encoding turns packed RGB back into hex
+text with one `hexlify` and strided slice assignments.
+
+Packed RGB is 3 bytes per color (R, G, B), the layout of the `bin` export
+format. Codes may have a "#" and 3 (RGB), 6 (RRGGBB) or 8 (RRGGBBAA, alpha
+dropped) digits; separators are whitespace, commas and semicolons.
+
+    >>> decode("#1A73E8, fff\\n00000080")
+    b'\\x1as\\xe8\\xff\\xff\\xff\\x00\\x00\\x00'
+    >>> encode(b"\\x1as\\xe8", prefix="#")
+    '#1A73E8\\n'
+"""
+
+import sys
+from array import array
+from binascii import Error as HexError, hexlify, unhexlify
+
+SIZES = (3, 6, 8)  # Accepted code lengths, without "#".
+HEXDIGITS = "0123456789abcdefABCDEF"  # Valid hex digits, for str.strip() validation.
+HEX_PAIRS = tuple(f"{i:02X}" for i in range(256))  # Byte -> two uppercase hex digits.
+READ_SIZE = 1 << 20  # Bytes read per chunk by iter_decode().
+MAX_DEC = 0xFFFFFF
+
+# Separators (commas, semicolons and whitespace) turned into spaces before splitting.
+_SEPARATORS = bytes.maketrans(b",;\t\n\r\x0b\x0c", b"       ")
+
+# Function to decode same-length codes joined without separators into packed RGB (raises on any bad digit).
+def _decode_uniform(joined, size, count):
+    if size == 6:
+        return unhexlify(joined)
+    if size == 3:  # RGB -> RRGGBB by doubling every digit.
+        doubled = bytearray(2 * len(joined))
+        doubled[0::2] = joined
+        doubled[1::2] = joined
+        return unhexlify(doubled)
+    if size == 8:  # RRGGBBAA -> drop every fourth byte.
+        raw = unhexlify(joined)
+        packed = bytearray(3 * count)
+        packed[0::3] = raw[0::4]
+        packed[1::3] = raw[1::4]
+        packed[2::3] = raw[2::4]
+        return bytes(packed)
+    raise ValueError(f"unsupported hex color length: {size}")
+
+# Function to decode one code (bytes, without "#") to 3 packed bytes.
+def _decode_one(token, sizes):
+    size = len(token)
+    if size not in sizes:
+        raise ValueError
+    if size == 3:
+        token = token[0:1] * 2 + token[1:2] * 2 + token[2:3] * 2
+    return unhexlify(token)[:3]
+
+# Function to decode split tokens (bytes) to packed RGB, one by one; reports or raises on invalid codes.
+def _decode_each(tokens, sizes, on_error, offset):
+    packed = bytearray()
+    for pos, token in enumerate(tokens, offset):
+        try:
+            packed += _decode_one(token, sizes)
+        except (HexError, ValueError):
+            text = token.decode("ascii", "replace")
+            if on_error is None:
+                raise ValueError(f"invalid hex color: {text}") from None
+            on_error(pos, text)
+    return bytes(packed)
+
+# Function to decode a list of codes (bytes, "#" allowed) to packed RGB.
+# `on_error(position, token)` is called for invalid codes, which are skipped; without it they raise ValueError.
+def decode_tokens(tokens, sizes=SIZES, on_error=None, offset=0):
+    if not tokens:
+        return b""
+    joined = b" " + b" ".join(tokens)
+    if b"#" in joined:  # Strip every "#" prefix at once; any other "#" stays and fails validation.
+        tokens = joined.replace(b" #", b" ").split()
+    lengths = set(map(len, tokens))
+    if len(lengths) == 1 and lengths <= set(sizes):
+        try:
+            return _decode_uniform(b"".join(tokens), lengths.pop(), len(tokens))
+        except HexError:
+            pass  # Some code has a non-hex digit: find it token by token.
+    return _decode_each(tokens, sizes, on_error, offset)
+
+# Function to decode a buffer (str or bytes) of separated codes to packed RGB.
+def decode(data, sizes=SIZES, on_error=None):
+    if isinstance(data, str):
+        data = data.encode("ascii", "replace")  # Non-ASCII characters become "?" and fail validation.
+    return decode_tokens(data.translate(_SEPARATORS).split(), sizes, on_error)
+
+# Function to decode a file (binary or text) in chunks, yielding packed RGB per chunk.
+# `on_error` positions count codes from the start of the file.
+def iter_decode(fp, sizes=SIZES, on_error=None, read_size=READ_SIZE):
+    fp = getattr(fp, "buffer", fp)  # Text streams are read through their binary buffer.
+    tail = b""
+    position = 0
+    while True:
+        chunk = fp.read(read_size)
+        data = (tail + chunk).translate(_SEPARATORS)
+        if chunk:
+            cut = data.rfind(b" ")
+            if cut < 0:  # No separator yet: keep reading.
+                tail = data
+                continue
+            data, tail = data[:cut], data[cut + 1:]
+        tokens = data.split()
+        if tokens:
+            yield decode_tokens(tokens, sizes, on_error, position)
+            position += len(tokens)
+        if not chunk:
+            return
+
+# Function to decode palette files ("-" for stdin) one after the other, yielding packed RGB per chunk.
+def read_files(paths, sizes=SIZES, on_error=None):
+    for path in paths:
+        if path == "-":
+            yield from iter_decode(sys.stdin, sizes, on_error)
+            continue
+        with open(path, "rb") as f:
+            yield from iter_decode(f, sizes, on_error)
+
+# Function to encode packed RGB as hex text: `prefix`, 6 uppercase digits and `sep` per color.
+def encode(packed, prefix="", sep="\n"):
+    count = len(packed) // 3
+    if len(packed) != 3 * count:
+        raise ValueError("packed RGB length is not a multiple of 3")
+    head, tail = prefix.encode("ascii"), sep.encode("ascii")
+    digits = hexlify(packed).upper()
+    width = len(head) + 6 + len(tail)
+    out = bytearray(width * count)
+    for k, ch in enumerate(head):
+        out[k::width] = bytes((ch,)) * count
+    for k in range(6):
+        out[len(head) + k::width] = digits[k::6]
+    for k, ch in enumerate(tail):
+        out[len(head) + 6 + k::width] = bytes((ch,)) * count
+    return out.decode("ascii")
+
+# Function to convert packed RGB to an array("I") of 24-bit decimal indexes.
+def to_indexes(packed):
+    count = len(packed) // 3
+    wide = bytearray(4 * count)  # Big-endian 0RGB words.
+    wide[1::4] = packed[0::3]
+    wide[2::4] = packed[1::3]
+    wide[3::4] = packed[2::3]
+    values = array("I", bytes(wide))
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values
+
+# Function to convert an iterable of 24-bit decimal indexes to packed RGB.
+def from_indexes(values):
+    words = array("I", values)
+    if words and max(words) > MAX_DEC:
+        raise ValueError("color index out of range")
+    if sys.byteorder == "little":
+        words.byteswap()
+    wide = words.tobytes()
+    packed = bytearray(3 * len(words))
+    packed[0::3] = wide[1::4]
+    packed[1::3] = wide[2::4]
+    packed[2::3] = wide[3::4]
+    return bytes(packed)
+
+# Function to encode decimal indexes as hex text (see encode()).
+def encode_indexes(values, prefix="", sep="\n"):
+    return encode(from_indexes(values), prefix, sep)
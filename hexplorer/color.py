@@ -0,0 +1,153 @@
+"""
+Color Value Type And Metadata Cache.
+`Color` packs one sRGB color into its 24-bit index, so a hex code is parsed
+once and then passed around as an int; luminance, contrast and the nearest
+name are computed on first use and kept on the instance. Full metadata
+records are memoized in a bounded LRU cache keyed by the 24-bit index, so
+mixes, schemes and gradients that revisit a color never recompute it.
+
+    >>> c = Color.from_hex("1A73E8")
+    >>> c.rgb, round(c.contrast, 2), c.name
+    ((26, 115, 232), 4.51, 'dodgerblue')
+"""
+
+from functools import lru_cache
+
+from .names import nearest_name  # Nearest named color from the built-in palettes.
+from .tables import MAX_DEC, contrast_ratio, luminance_of  # Precomputed per-channel luminance tables.
+
+METADATA_CACHE_SIZE = 4096  # Metadata records kept by the LRU cache.
+
+class Color:
+    """ One sRGB color as a packed 24-bit int; derived values are computed lazily and kept. """
+
+    __slots__ = ("value", "_luminance", "_name")
+
+    def __init__(self, value):
+        if not 0 <= value <= MAX_DEC:
+            raise ValueError(f"color index out of range: {value}")
+        self.value = value  # 0xRRGGBB.
+        self._luminance = None
+        self._name = None
+
+    # Function to parse a 6-digit hex code (with or without #).
+    @classmethod
+    def from_hex(cls, hex_code):
+        code = hex_code[1:] if hex_code.startswith("#") else hex_code
+        if len(code) != 6:
+            raise ValueError(f"invalid hex color: {hex_code}")
+        return cls(int(code, 16))
+
+    # Function to build a color from RGB bytes.
+    @classmethod
+    def from_rgb(cls, r, g, b):
+        return cls((r << 16) | (g << 8) | b)
+
+    # Function to turn a Color, 24-bit index, hex code or (r, g, b) tuple into a Color.
+    @classmethod
+    def parse(cls, color):
+        if isinstance(color, cls):
+            return color
+        if isinstance(color, int):
+            return cls(color)
+        if isinstance(color, str):
+            return cls.from_hex(color)
+        return cls.from_rgb(*color)
+
+    @property
+    def hex(self):
+        return f"{self.value:06X}"  # Uppercase, without #.
+
+    @property
+    def rgb(self):
+        v = self.value
+        return v >> 16, (v >> 8) & 0xFF, v & 0xFF
+
+    @property
+    def luminance(self):
+        if self._luminance is None:
+            self._luminance = luminance_of(self.value)  # WCAG relative luminance.
+        return self._luminance
+
+    @property
+    def contrast(self):
+        return contrast_ratio(1.0, self.luminance)  # Contrast ratio against white.
+
+    # Function to get the contrast ratio against another color.
+    def contrast_with(self, other):
+        return contrast_ratio(self.luminance, Color.parse(other).luminance)
+
+    @property
+    def name(self):
+        return self.nearest_name[0]
+
+    @property
+    def nearest_name(self):
+        if self._name is None:
+            self._name = nearest_name(*self.rgb)  # (name, RGB distance) in the default palette.
+        return self._name
+
+    # Function to get the negative (inverted) color.
+    def negative(self):
+        return Color(MAX_DEC - self.value)
+
+    # Function to mix with another color by averaging the RGB components.
+    def mix(self, other):
+        r1, g1, b1 = self.rgb
+        r2, g2, b2 = Color.parse(other).rgb
+        return Color.from_rgb((r1 + r2) // 2, (g1 + g2) // 2, (b1 + b2) // 2)
+
+    # Function to get the metadata record of this color (see `get_color_metadata`), from the shared cache.
+    def metadata(self, dec_index=None):
+        return color_metadata(self.value, dec_index)
+
+    def __int__(self):
+        return self.value
+
+    def __index__(self):
+        return self.value
+
+    def __eq__(self, other):
+        return isinstance(other, Color) and other.value == self.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __str__(self):
+        return f"#{self.value:06X}"
+
+    def __repr__(self):
+        return f"Color('#{self.value:06X}')"
+
+# Function to build the metadata record of a 24-bit color; memoized, so callers get copies.
+@lru_cache(maxsize=METADATA_CACHE_SIZE)
+def _metadata(dec):
+    r, g, b = dec >> 16, (dec >> 8) & 0xFF, dec & 0xFF
+    l = luminance_of(dec)  # Relative luminance from the precomputed channel tables.
+    color_name, name_distance = nearest_name(r, g, b)  # Nearest CSS color name and its RGB distance.
+    return {
+        "hex": f"#{dec:06X}",  # Hex code with # prefix.
+        "rgb": {"r": r, "g": g, "b": b},  # RGB values as a dictionary.
+        "luminance": round(l, 6),  # Rounded luminance value.
+        "contrast_vs_white": f"{round(contrast_ratio(1.0, l), 2)} : 1",  # Contrast ratio against white, formatted.
+        "decimal_index": dec,  # Decimal index of the color.
+        "name": color_name,  # Nearest CSS color name.
+        "name_distance": round(name_distance, 2),  # RGB distance to that name (0 for an exact match).
+    }
+
+# Function to get the metadata record of a 24-bit color as a fresh dict (safe to modify).
+# `dec_index` overrides the reported decimal index, as `get_color_metadata` always allowed.
+def color_metadata(dec, dec_index=None):
+    meta = dict(_metadata(dec))
+    meta["rgb"] = dict(meta["rgb"])
+    if dec_index is not None:
+        meta["decimal_index"] = dec_index
+    return meta
+
+# Function to get the metadata cache statistics (hits, misses, maxsize, currsize).
+def metadata_cache_info():
+    return _metadata.cache_info()
+
+# Function to empty the metadata cache (e.g. after re-registering the default name palette).
+def clear_metadata_cache():
+    _metadata.cache_clear()
@@ -0,0 +1,360 @@
+"""
+WCAG Contrast Pairs.
+Checks every text/background combination of a palette against the WCAG
+contrast levels. Each color's relative luminance is computed once (three
+table lookups) and the palette is kept sorted by it: a ratio is then one
+division of two (L + 0.05) values, and since it only grows with the
+luminance gap, the partners of a color that reach a level are a prefix
+and a suffix of the sorted palette, found with a bisection instead of a
+scan. Counting the passing pairs of a 10,000-color palette therefore
+costs 10,000 bisections rather than 50 million ratios, the sparse pair
+list costs one formatted line per passing pair, and the top-k pairs come
+from a heap merge of the sorted rows.
+
+    hexplorer contrast tokens.txt --level AA -o pairs.jsonl   # Every pair passing AA (sparse).
+    hexplorer contrast tokens.txt --top 20 -f text            # The 20 highest-contrast pairs.
+    hexplorer contrast tokens.txt --per-color 3 --level AAA   # Best 3 text colors for each background.
+    hexplorer contrast --colors 1A73E8,FFFFFF,202124 --matrix  # The full N x N matrix.
+
+Pairs are written darker color as text on the lighter one as background;
+contrast is symmetric, so the swapped combination passes as well.
+"""
+
+import argparse
+import heapq
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+from .codec import decode, encode_indexes, read_files, to_indexes
+from .core import parse_dec
+from .tables import LUM_B, LUM_G, LUM_R
+from .writers import ordered_map, silence_broken_pipe
+
+# WCAG 2.x minimum ratios, lowest first: AA-large covers large text (and AAA-large, at 4.5, equals AA).
+LEVELS = {"AA-large": 3.0, "AA": 4.5, "AAA": 7.0}
+FORMATS = ("jsonl", "csv", "text")
+WINDOW_PAIRS = 65536  # Passing pairs formatted per window (the unit of parallel work).
+WINDOW_ROWS = 256  # Matrix rows formatted per window.
+
+PAIR_HEADER = "text,background,ratio,level"
+_PAIR_TEMPLATES = {
+    "jsonl": '{"text":"#%s","background":"#%s","ratio":%.2f,"level":"%s"}',
+    "csv": "#%s,#%s,%.2f,%s",
+    "text": " #%s on #%s  %5.2f:1  %s",
+}
+# Level of each run of a pair row and the ratio where the run ends (the next level's minimum).
+_RUNS = tuple(zip(("none",) + tuple(LEVELS), tuple(LEVELS.values()) + (None,)))
+
+class ContrastPalette:
+    """ A palette with each luminance computed once and a luminance-sorted view for contrast pair queries. """
+
+    __slots__ = ("colors", "shifted", "order", "ranked")
+
+    def __init__(self, colors):
+        self.colors = array("I", colors)
+        lum_r, lum_g, lum_b = LUM_R, LUM_G, LUM_B
+        # L + 0.05 per color, so every WCAG ratio is a single division.
+        self.shifted = array("d", [lum_r[c >> 16] + lum_g[(c >> 8) & 0xFF] + lum_b[c & 0xFF] + 0.05
+                                   for c in self.colors])
+        self.order = array("I", sorted(range(len(self.colors)), key=self.shifted.__getitem__))  # Darkest first.
+        self.ranked = array("d", [self.shifted[i] for i in self.order])  # Shifted luminance in rank order.
+
+    def __len__(self):
+        return len(self.colors)
+
+    # Function to get the contrast ratio between palette entries i and j.
+    def ratio(self, i, j):
+        a, b = self.shifted[i], self.shifted[j]
+        return a / b if a > b else b / a
+
+    # Function to get the contrast of entry i against every entry (palette order) as an array("d").
+    def row(self, i):
+        a = self.shifted[i]
+        return array("d", [a / b if a > b else b / a for b in self.shifted])
+
+    # Function to yield the rows of the full N x N contrast matrix, one array("d") per entry.
+    def rows(self):
+        for i in range(len(self.colors)):
+            yield self.row(i)
+
+    # Function to get the full contrast matrix as one row-major array("d") (N x N values: small palettes only).
+    def matrix(self):
+        out = array("d")
+        for row in self.rows():
+            out.extend(row)
+        return out
+
+    # Function to get, for every rank, the first lighter rank reaching `min_ratio` (len(palette) when none does).
+    def light_starts(self, min_ratio=4.5):
+        ranked = self.ranked
+        starts = []
+        q = 0
+        for p, a in enumerate(ranked):
+            q = bisect_left(ranked, min_ratio * a, q if q > p else p + 1)  # Never moves back: `a` only grows.
+            starts.append(q)
+        return starts
+
+    # Function to count the pairs (each unordered pair once) with contrast >= `min_ratio`.
+    def count(self, min_ratio=4.5):
+        n = len(self.ranked)
+        return sum(n - q for q in self.light_starts(min_ratio))
+
+    # Function to yield (text, background, ratio) palette indexes of every pair reaching `min_ratio`.
+    # The darker color is the text; pairs come grouped by text color, darkest first.
+    def pairs(self, min_ratio=4.5):
+        ranked, order = self.ranked, self.order
+        n = len(ranked)
+        for p, start in enumerate(self.light_starts(min_ratio)):
+            a, i = ranked[p], order[p]
+            for q in range(start, n):
+                yield i, order[q], ranked[q] / a
+
+    # Function to get the `k` highest-contrast pairs reaching `min_ratio` as (ratio, text, background), best first.
+    def top(self, k, min_ratio=4.5):
+        ranked, order = self.ranked, self.order
+        last = len(ranked) - 1
+        # Each rank's best partner is the lightest color; popping a pair queues that rank's next-best partner.
+        heap = [(-ranked[last] / a, p, last) for p, a in enumerate(ranked[:last]) if ranked[last] >= min_ratio * a]
+        heapq.heapify(heap)
+        out = []
+        while heap and len(out) < k:
+            neg, p, q = heapq.heappop(heap)
+            out.append((-neg, order[p], order[q]))
+            q -= 1
+            if q > p and ranked[q] >= min_ratio * ranked[p]:
+                heapq.heappush(heap, (-ranked[q] / ranked[p], p, q))
+        return out
+
+    # Function to yield (ratio, j) for every partner of entry i reaching `min_ratio`, highest contrast first.
+    def partners(self, i, min_ratio=4.5):
+        ranked, order = self.ranked, self.order
+        a = self.shifted[i]
+        dark_end = bisect_right(ranked, a / min_ratio)  # Ranks 0..dark_end-1 are dark enough.
+        # Ranks light_start.. are light enough; at a ratio of 1 both runs reach equal luminances, so they must not overlap.
+        light_start = max(bisect_left(ranked, a * min_ratio), dark_end)
+        darker = ((a / ranked[q], order[q]) for q in range(dark_end))
+        lighter = ((ranked[q] / a, order[q]) for q in range(len(ranked) - 1, light_start - 1, -1))
+        return (e for e in heapq.merge(darker, lighter, reverse=True) if e[1] != i)
+
+# Function to get the highest WCAG level a ratio reaches ("none" below AA-large).
+def level_of(ratio):
+    best = "none"
+    for name, minimum in LEVELS.items():
+        if ratio >= minimum:
+            best = name
+    return best
+
+# Function to get the minimum ratio of a level name, or of a ratio given as text (e.g. "4.5").
+def level_ratio(level):
+    if level in LEVELS:
+        return LEVELS[level]
+    try:
+        ratio = float(level)
+    except ValueError:
+        raise ValueError(f"unknown contrast level: {level} (choose from {', '.join(LEVELS)} or a ratio)")
+    if not 1.0 <= ratio <= 21.0:
+        raise ValueError(f"contrast ratio out of range 1..21: {level}")
+    return ratio
+
+# Function to parse a list of colors (hex codes or 24-bit indexes) into a ContrastPalette.
+def _palette(colors):
+    if isinstance(colors, ContrastPalette):
+        return colors
+    return ContrastPalette(parse_dec(c) if isinstance(c, str) else c for c in colors)
+
+# Function to get the `k` best text/background pairs of a palette reaching `level` as (text hex, background hex, ratio).
+def accessible_pairs(colors, level="AA", k=10):
+    palette = _palette(colors)
+    decs = palette.colors
+    return [(f"{decs[i]:06X}", f"{decs[j]:06X}", ratio) for ratio, i, j in palette.top(k, level_ratio(level))]
+
+# Function to get the full contrast matrix of a palette as a list of rows (N x N floats: small palettes only).
+def contrast_matrix(colors):
+    return [list(row) for row in _palette(colors).rows()]
+
+# Function to format the pairs whose text color has rank start..stop-1 (one string, ready for a single write).
+# Within a rank the ratio grows with the background's rank, so each level is one run found by bisection.
+def render_pairs(fmt, ranked_decs, ranked, start, stop, min_ratio):
+    codes = encode_indexes(ranked_decs, sep=" ").split()
+    template = _PAIR_TEMPLATES[fmt]
+    n = len(ranked)
+    out = []
+    append = out.append
+    if fmt == "text":
+        from .render import text_sample  # Terminal rows only: samples follow the detected color mode.
+    for p in range(start, stop):
+        a, text = ranked[p], codes[p]
+        lo = bisect_left(ranked, min_ratio * a, p + 1)
+        for name, end in _RUNS:
+            hi = n if end is None else bisect_left(ranked, end * a, lo)
+            if fmt == "text":
+                for q in range(lo, hi):
+                    append(text_sample(ranked_decs[p], ranked_decs[q]) + template % (text, codes[q], ranked[q] / a, name))
+            else:
+                for q in range(lo, hi):
+                    append(template % (text, codes[q], ranked[q] / a, name))
+            lo = hi
+    return "\n".join(out) + "\n" if out else ""
+
+# Function to run one (fmt, ranked decs, ranked luminance, start, stop, min ratio) job in a worker.
+def _pairs_job(job):
+    return render_pairs(*job)
+
+# Function to cut the ranks into windows of about `size` passing pairs each, as (start, stop).
+def pair_windows(palette, min_ratio, size=WINDOW_PAIRS):
+    n = len(palette)
+    begin, total = 0, 0
+    for p, start in enumerate(palette.light_starts(min_ratio)):
+        total += n - start
+        if total >= size:
+            yield begin, p + 1
+            begin, total = p + 1, 0
+    if total:
+        yield begin, n
+
+# Function to stream every pair of a palette reaching `min_ratio` as text chunks (sparse: passing pairs only).
+def pair_chunks(palette, min_ratio=4.5, fmt="jsonl", jobs=1, size=WINDOW_PAIRS):
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown contrast format: {fmt} (choose from {', '.join(FORMATS)})")
+    ranked_decs = array("I", [palette.colors[i] for i in palette.order])
+    jobs_iter = ((fmt, ranked_decs, palette.ranked, start, stop, min_ratio)
+                 for start, stop in pair_windows(palette, min_ratio, size))
+    # Terminal rows stay in this process, where the color mode is set.
+    return ordered_map(_pairs_job, jobs_iter, jobs if fmt != "text" else 1)
+
+# Function to format a list of (ratio, text, background) palette-index triples.
+def render_triples(fmt, palette, triples):
+    decs = palette.colors
+    template = _PAIR_TEMPLATES[fmt]
+    out = []
+    if fmt == "text":
+        from .render import text_sample
+        for ratio, i, j in triples:
+            out.append(text_sample(decs[i], decs[j])
+                       + template % (f"{decs[i]:06X}", f"{decs[j]:06X}", ratio, level_of(ratio)))
+    else:
+        for ratio, i, j in triples:
+            out.append(template % (f"{decs[i]:06X}", f"{decs[j]:06X}", ratio, level_of(ratio)))
+    return "\n".join(out) + "\n" if out else ""
+
+# Function to stream the `k` highest-contrast pairs reaching `min_ratio` (one chunk).
+def top_chunks(palette, k, min_ratio=4.5, fmt="jsonl"):
+    yield render_triples(fmt, palette, palette.top(k, min_ratio))
+
+# Function to stream the `k` best text colors of every palette entry (as background), in palette order.
+def partner_chunks(palette, min_ratio=4.5, k=5, fmt="jsonl", size=WINDOW_ROWS):
+    for start in range(0, len(palette), size):
+        triples = []
+        for j in range(start, min(start + size, len(palette))):
+            triples.extend((ratio, i, j) for ratio, i in islice(palette.partners(j, min_ratio), k))
+        yield render_triples(fmt, palette, triples)
+
+# Function to format matrix rows start..stop-1 (palette order) as CSV, JSONL or terminal rows.
+def render_rows(fmt, decs, shifted, start, stop):
+    codes = encode_indexes(decs, sep=" ").split()
+    cells = ("%.2f," * len(decs))[:-1]  # One format call per row.
+    out = []
+    if fmt == "text":
+        from .render import swatch
+    for i in range(start, stop):
+        a = shifted[i]
+        row = tuple([a / b if a > b else b / a for b in shifted])
+        if fmt == "jsonl":
+            out.append(f'{{"hex":"#{codes[i]}","contrast":[' + cells % row + "]}")
+        elif fmt == "csv":
+            out.append(f"#{codes[i]}," + cells % row)
+        else:
+            out.append(f"{swatch(decs[i])} #{codes[i]} " + " ".join("%5.2f" % r for r in row))
+    return "\n".join(out) + "\n" if out else ""
+
+# Function to run one (fmt, decs, shifted luminance, start, stop) matrix job in a worker.
+def _rows_job(job):
+    return render_rows(*job)
+
+# Function to stream the full N x N contrast matrix in row windows.
+def matrix_chunks(palette, fmt="csv", jobs=1, size=WINDOW_ROWS):
+    jobs_iter = ((fmt, palette.colors, palette.shifted, start, min(start + size, len(palette)))
+                 for start in range(0, len(palette), size))
+    return ordered_map(_rows_job, jobs_iter, jobs if fmt != "text" else 1)
+
+# Function to run `hexplorer contrast` with the given command-line arguments.
+def run_contrast(argv=None):
+    parser = argparse.ArgumentParser(prog="hexplorer contrast",
+                                     description="WCAG contrast pairs of a palette: passing pairs, top-k or the full matrix.")
+    parser.add_argument("inputs", nargs="*", metavar="FILE", help="palette files of hex codes (default: stdin)")
+    parser.add_argument("--colors", default=None, metavar="HEX,...", help="palette given inline")
+    parser.add_argument("--level", default="AA",
+                        help=f"minimum level: {', '.join(LEVELS)} or a ratio such as 5.5 (default: AA)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--top", type=int, default=0, metavar="K", help="only the K highest-contrast pairs")
+    mode.add_argument("--per-color", type=int, default=0, metavar="K",
+                      help="the K best text colors for every color as background")
+    mode.add_argument("--matrix", action="store_true", help="the full N x N contrast matrix (dense)")
+    mode.add_argument("--count", action="store_true", help="only count the pairs passing each level")
+    parser.add_argument("-f", "--format", choices=FORMATS, default=None,
+                        help="output format (default: text on a terminal, jsonl otherwise)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes (default: 1)")
+    args = parser.parse_args(argv)
+
+    try:
+        min_ratio = level_ratio(args.level)
+    except ValueError as e:
+        parser.error(str(e))
+
+    def on_error(position, token):
+        print(f"⚠️ Skipping invalid color #{position + 1}: {token}", file=sys.stderr)
+    if args.colors is not None:
+        packed_chunks = [decode(args.colors, on_error=on_error)]
+    else:
+        packed_chunks = read_files(args.inputs or ["-"], on_error=on_error)
+    colors = array("I")
+    for packed in packed_chunks:
+        colors.extend(to_indexes(packed))
+    palette = ContrastPalette(colors)  # Luminance once per color, sorted once.
+
+    if args.count:
+        n = len(palette)
+        total = n * (n - 1) // 2
+        print(f"🎨 Colors: {n}  Pairs: {total}")
+        for name, ratio in LEVELS.items():
+            passing = palette.count(ratio)
+            print(f"   {name:<9}: {passing} pairs ({passing * 100 / (total or 1):.1f}%)")
+        return 0
+
+    to_stdout = args.output == "-"
+    fmt = args.format or ("text" if to_stdout and sys.stdout.isatty() else "jsonl")
+    if fmt == "text":
+        from .render import set_color_mode
+        from .termcolor import detect_color_mode
+        set_color_mode(detect_color_mode())  # Nearest 256/16-color samples on terminals without 24-bit color.
+
+    if args.matrix:
+        chunks = matrix_chunks(palette, fmt, args.jobs)
+    elif args.top > 0:
+        chunks = top_chunks(palette, args.top, min_ratio, fmt)
+    elif args.per_color > 0:
+        chunks = partner_chunks(palette, min_ratio, args.per_color, fmt)
+    else:
+        chunks = pair_chunks(palette, min_ratio, fmt, args.jobs)
+
+    dst = sys.stdout if to_stdout else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            header = "hex," + ",".join(f"#{c:06X}" for c in palette.colors) if args.matrix else PAIR_HEADER
+            dst.write(header + "\n")
+        for chunk in chunks:
+            dst.write(chunk)  # One write per window.
+        dst.flush()
+    except BrokenPipeError:
+        silence_broken_pipe()
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        chunks.close()  # Stops the worker pool, also after an early exit.
+        if dst is not sys.stdout:
+            dst.close()
+    return 0
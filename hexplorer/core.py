@@ -0,0 +1,105 @@
+"""
+Hexplorer Color Core.
+Pure color math shared by the interactive tool, the subcommands and library users.
+Importing this module does no I/O: no argv parsing, no printing, no files.
+"""
+
+from .codec import HEX_PAIRS, HEXDIGITS, decode  # Byte -> hex digit table, the hex digit set and the bulk decoder.
+from .color import Color, color_metadata  # Packed color value type and the cached metadata records.
+from .colorblind import CB_MATRICES, simulate_all  # Table-driven color blindness simulators.
+from .names import nearest_name  # Nearest named color from the built-in palettes.
+from .spaces import rotate_hue  # HSL hue rotation for analogous colors.
+from .tables import MAX_DEC, contrast_ratio, relative_luminance  # Precomputed per-channel luminance tables.
+
+# Function to convert a 6-digit hex color code to RGB values.
+def hex_to_rgb(hex_code):
+    r, g, b = bytes.fromhex(hex_code)  # One C call decodes the three channel bytes.
+    return r, g, b  # Return RGB values as a tuple.
+
+# Function to convert RGB values back to a 6-digit hex color code.
+def rgb_to_hex(r, g, b):
+    return HEX_PAIRS[r] + HEX_PAIRS[g] + HEX_PAIRS[b]  # Two uppercase hex digits per channel from the byte table.
+
+# Function to validate if a string is a valid 6-digit hexadecimal color code.
+def is_valid_hex(h):
+    return len(h) == 6 and not h.strip(HEXDIGITS)  # Six characters, and nothing left once hex digits are stripped.
+
+# Function to turn a hex code ("#" optional, 3/6/8 digits) or a decimal index into a decimal index.
+# Six-digit strings are read as hex, like everywhere else in the tool.
+def parse_dec(text):
+    text = str(text).strip()
+    if text.isdigit() and len(text) != 6:
+        dec = int(text)
+        if dec > MAX_DEC:
+            raise ValueError(f"color index out of range: {text}")
+        return dec
+    packed = decode(text)
+    if len(packed) != 3:
+        raise ValueError(f"invalid color: {text}")
+    return int.from_bytes(packed, "big")
+
+# Function to compute luminance component for a single color channel (used in luminance calculation).
+def lum_comp(c):
+    return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4  # Apply luminance formula based on sRGB standard.
+
+# Function to gather metadata about a color, including hex, RGB, luminance, contrast, and nearest name.
+# Records come from the bounded metadata cache (color.py), so repeated colors are computed once.
+def get_color_metadata(hex_code, dec_index=None):
+    return color_metadata(int(hex_code, 16), dec_index)
+
+# Function to get the negative (inverted) color of a hex code.
+def negative_hex(hex_code):
+    return f"{MAX_DEC - int(hex_code, 16):06X}"  # Subtract from white to invert every channel.
+
+# Function to mix two colors by averaging their RGB components.
+def mix_hex(hex1, hex2):
+    r1, g1, b1 = hex_to_rgb(hex1)  # Convert first hex to RGB.
+    r2, g2, b2 = hex_to_rgb(hex2)  # Convert second hex to RGB.
+    return rgb_to_hex((r1 + r2) // 2, (g1 + g2) // 2, (b1 + b2) // 2)  # Average the RGB components.
+
+# Function to compute a color scheme (complementary, analogous, triadic, tetradic) as name -> (r, g, b).
+def get_scheme(hex_code):
+    r, g, b = hex_to_rgb(hex_code)  # Convert hex to RGB.
+    return {
+        "Complementary": (255 - r, 255 - g, 255 - b),  # Opposite color on the color wheel.
+        "Analogous 1": rotate_hue(r, g, b, 30),  # Rotate the hue 30° forward for a similar hue.
+        "Analogous 2": rotate_hue(r, g, b, -30),  # Rotate the hue 30° back for a similar hue.
+        "Triadic 1": (b, r, g),  # Rotate RGB components for triadic harmony.
+        "Triadic 2": (g, b, r),  # Rotate RGB components for triadic harmony.
+        "Tetradic 1": (255 - r, 255 - g, b),  # Complementary + analogous for rectangular harmony.
+        "Tetradic 2": (r, g, 255 - b)  # Complementary + analogous for rectangular harmony.
+    }
+
+# Function to compute the random-scheme set for a base color as name -> (r, g, b).
+def get_random_scheme(base_hex):
+    r, g, b = hex_to_rgb(base_hex)  # Convert base hex to RGB.
+
+    # Helper function to clamp RGB values to the valid range (0-255).
+    def clamp_color(val): return max(0, min(255, val))
+
+    comp = (255 - r, 255 - g, 255 - b)  # Complementary: Opposite color on the color wheel.
+    return {
+        "Complementary": comp,
+        "Analogous 1": rotate_hue(r, g, b, 30),  # Analogous: Rotate the hue by ±30° for similar hues.
+        "Analogous 2": rotate_hue(r, g, b, -30),
+        "Triadic 1": (b, r, g),  # Triadic: Rotate RGB components for triadic harmony.
+        "Triadic 2": (g, b, r),
+        "Tetradic 1": comp,  # Tetradic: Complementary color + analogous shift.
+        "Tetradic 2": (comp[0], clamp_color(comp[1] + 30), comp[2]),
+    }
+
+# Function to apply a color blindness matrix to RGB values.
+def apply_matrix(r, g, b, m):
+    rr = r * m[0][0] + g * m[0][1] + b * m[0][2]  # Apply matrix for red component.
+    gg = r * m[1][0] + g * m[1][1] + b * m[1][2]  # Apply matrix for green component.
+    bb = r * m[2][0] + g * m[2][1] + b * m[2][2]  # Apply matrix for blue component.
+    # Clamp the resulting RGB values to the valid range (0-255).
+    rr = max(0, min(255, int(rr)))
+    gg = max(0, min(255, int(gg)))
+    bb = max(0, min(255, int(bb)))
+    return rr, gg, bb
+
+# Function to compute how a color appears under each color blindness type, as type -> hex.
+# `model` is "simple" (the original matrices), "vienot" or "brettel"; `severity` below 1 models anomalous trichromacy.
+def get_color_blindness(hex_code, model="simple", severity=1.0):
+    return simulate_all(hex_code, model, severity)
@@ -0,0 +1,194 @@
+"""
+Background Export Queue.
+Exports are handed to a single writer thread through a bounded queue, so
+the interactive loop never waits on the disk. Each export is written in
+one of four formats:
+
+    json   one compact JSON document per export, written atomically
+    jsonl  records appended to hexplorer_exports.jsonl (one line per color, one write per export)
+    csv    rows appended to hexplorer_exports.csv (one write per export)
+    bin    packed binary: a small header plus 3 bytes (R, G, B) per color
+
+The export folder is $HEXPLORER_EXPORT_DIR, or the Termux shared-storage
+folder by default; the format is $HEXPLORER_EXPORT_FORMAT (default json).
+"""
+
+import io
+import os
+import queue
+import struct
+import threading
+from contextlib import contextmanager
+
+from .writers import CHUNK_SIZE, encode_json, write_csv, write_json_document, write_jsonl
+
+DEFAULT_EXPORT_DIR = "/storage/emulated/0/hexplorer.json"  # Termux shared storage, the historical location.
+FORMATS = ("json", "jsonl", "csv", "bin")  # Supported export formats.
+EXTENSIONS = {"json": ".json", "jsonl": ".jsonl", "csv": ".csv", "bin": ".hexbin"}
+LOG_NAME = "hexplorer_exports"  # Base name of the append-mode JSONL and CSV sinks.
+QUEUE_SIZE = 64  # Exports waiting for the writer thread before submit() blocks.
+
+PACKED_MAGIC = b"HEXRGB"  # Packed binary signature.
+PACKED_VERSION = 1
+PACKED_HEADER = struct.Struct("<6sH")  # Magic and version; 3-byte RGB entries follow until the end of the file.
+
+# Function to get the export folder ($HEXPLORER_EXPORT_DIR or the Termux shared-storage folder).
+def default_export_dir():
+    return os.path.expanduser(os.environ.get("HEXPLORER_EXPORT_DIR") or DEFAULT_EXPORT_DIR)
+
+# Function to get the export format ($HEXPLORER_EXPORT_FORMAT, default json).
+def default_export_format():
+    fmt = os.environ.get("HEXPLORER_EXPORT_FORMAT", "json").lower()
+    return fmt if fmt in FORMATS else "json"
+
+# Context manager that writes a file under a temporary name and renames it into place only when the block succeeds.
+@contextmanager
+def atomic_open(path, mode="w", **kwargs):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+# Function to write hex codes as packed binary (header, then 3 bytes per color), one chunk at a time.
+def write_packed(codes, fp, chunk_size=CHUNK_SIZE):
+    fp.write(PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION))
+    count = 0
+    buf = []
+    for code in codes:
+        buf.append(code)
+        if len(buf) >= chunk_size:
+            fp.write(bytes.fromhex("".join(buf)))
+            count += len(buf)
+            del buf[:]
+    if buf:
+        fp.write(bytes.fromhex("".join(buf)))
+        count += len(buf)
+    return count
+
+# Function to read a packed binary file back as a stream of uppercase hex codes.
+def read_packed(fp, chunk_size=CHUNK_SIZE):
+    head = fp.read(PACKED_HEADER.size)
+    if len(head) < PACKED_HEADER.size or PACKED_HEADER.unpack(head)[0] != PACKED_MAGIC:
+        raise ValueError("not a packed hexplorer color file")
+    while True:
+        data = fp.read(3 * chunk_size)
+        if not data:
+            return
+        if len(data) % 3:
+            raise ValueError("truncated packed color file")
+        text = data.hex().upper()
+        for i in range(0, len(text), 6):
+            yield text[i:i + 6]
+
+# Function to flatten an export document into (role, metadata) pairs, one per color, for the JSONL/CSV/binary sinks.
+# Documents either are one color's metadata, map roles to metadata (mixes) or hold a "colors" list (gradients).
+def _color_records(data):
+    if "hex" in data:
+        yield None, data
+    elif "colors" in data:
+        for step, meta in enumerate(data["colors"]):
+            yield step, meta
+    else:
+        for role, meta in data.items():
+            if isinstance(meta, dict) and "hex" in meta:
+                yield role, meta
+
+class Exporter:
+    """ Writes exports on a background thread, taking them from a bounded queue. """
+
+    def __init__(self, directory=None, fmt=None, maxsize=QUEUE_SIZE):
+        self.directory = directory or default_export_dir()
+        self.format = fmt or default_export_format()
+        if self.format not in FORMATS:
+            raise ValueError(f"unknown export format: {self.format} (choose from {', '.join(FORMATS)})")
+        self._queue = queue.Queue(maxsize)
+        self._errors = queue.Queue()  # (path, message) of failed exports, reported by the caller's thread.
+        self._thread = threading.Thread(target=self._run, name="hexplorer-export", daemon=True)
+        self._thread.start()
+
+    # Function to get the file an export with the given base name ends up in.
+    def path_for(self, name):
+        base = LOG_NAME if self.format in ("jsonl", "csv") else name
+        return os.path.join(self.directory, base + EXTENSIONS[self.format])
+
+    # Function to queue an export document under a base file name; returns the target path without waiting.
+    # `data` is a dict, or a callable producing one so expensive documents are built on the writer thread.
+    # A "colors" entry may be a lazy iterator (e.g. a gradient), which is streamed in chunks in every format.
+    def submit(self, name, data, kind="color"):
+        path = self.path_for(name)
+        self._queue.put((path, kind, data))  # Blocks only when QUEUE_SIZE exports are already waiting.
+        return path
+
+    # Function to get the exports that failed since the last call, as (path, error message) pairs.
+    def errors(self):
+        failed = []
+        while True:
+            try:
+                failed.append(self._errors.get_nowait())
+            except queue.Empty:
+                return failed
+
+    # Function to count the exports that have not been written yet.
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    # Function to wait until every queued export is written, then stop the writer thread.
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    # Function run by the writer thread: write exports one by one until close() queues None.
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                path, kind, data = job
+                try:
+                    self._write(path, kind, data)
+                except Exception as e:  # Reported to the caller; the writer thread keeps running.
+                    self._errors.put((path, str(e)))
+            finally:
+                self._queue.task_done()
+
+    # Function to write one export in the configured format.
+    def _write(self, path, kind, data):
+        os.makedirs(self.directory, exist_ok=True)
+        if callable(data):
+            data = data()
+        if self.format == "json":
+            with atomic_open(path, "w", encoding="utf-8") as f:
+                colors = data.get("colors")
+                if colors is None or isinstance(colors, list):
+                    f.write(encode_json(data) + "\n")
+                else:  # Lazy colors: stream them after the other fields.
+                    write_json_document(f, {k: v for k, v in data.items() if k != "colors"}, "colors", colors)
+        elif self.format == "bin":
+            with atomic_open(path, "wb") as f:
+                write_packed((meta["hex"].lstrip("#") for _, meta in _color_records(data)), f)
+        else:  # JSONL/CSV logs: the whole export is built first and appended with one write, so no torn last line.
+            buf = io.StringIO(newline="")
+            if self.format == "jsonl":
+                write_jsonl(_jsonl_records(kind, data), buf)
+            else:
+                new = not os.path.exists(path) or os.path.getsize(path) == 0
+                write_csv((meta for _, meta in _color_records(data)), buf, header=new)
+            with open(path, "a", encoding="utf-8", newline="") as f:
+                f.write(buf.getvalue())
+
+# Function to tag the color records of an export for the JSONL sink ({"export": kind, "role"/"step": ..., ...metadata}).
+def _jsonl_records(kind, data):
+    for role, meta in _color_records(data):
+        record = {"export": kind}
+        if role is not None:
+            record["step" if isinstance(role, int) else "role"] = role
+        record.update(meta)
+        yield record
@@ -0,0 +1,160 @@
+"""
+Streaming Multi-Stop Gradient Engine.
+Gradients take any number of stops with optional positions and are
+interpolated in sRGB, linear RGB or OKLab. Steps are produced lazily by a
+generator and streamed straight into the incremental writers, so even a
+1,000,000-step calibration ramp never holds more than one chunk in memory.
+
+    hexplorer gradient FF0000 00FF00@0.25 0000FF --steps 1000000 --space oklab -f jsonl -o ramp.jsonl
+"""
+
+import argparse
+import sys
+
+from .core import get_color_metadata, hex_to_rgb, is_valid_hex
+from .spaces import linear_to_byte, oklab_to_rgb, rgb_to_oklab
+from .tables import LINEAR
+from .writers import CHUNK_SIZE, WRITERS, silence_broken_pipe, write_json_document
+
+SPACES = ("srgb", "linear", "oklab")  # Supported interpolation spaces.
+
+# Function to normalize stops into a sorted list of (position, hex_code).
+# Each stop is "RRGGBB", "RRGGBB@position" or a (hex_code, position) pair; missing positions are spread evenly.
+def parse_stops(stops):
+    parsed = []
+    for stop in stops:
+        if isinstance(stop, str):
+            code, _, pos = stop.partition("@")
+            pos = float(pos) if pos else None
+        else:
+            code, pos = stop
+        code = code.strip().lstrip("#").upper()
+        if not is_valid_hex(code):
+            raise ValueError(f"invalid gradient stop: {stop!r}")
+        parsed.append([pos, code])
+    if len(parsed) < 2:
+        raise ValueError("a gradient needs at least two stops")
+    last = len(parsed) - 1
+    for i, stop in enumerate(parsed):
+        if stop[0] is None:
+            stop[0] = i / last
+        if not 0.0 <= stop[0] <= 1.0:
+            raise ValueError(f"stop position must be between 0 and 1: {stop[0]}")
+        if i and stop[0] < parsed[i - 1][0]:
+            raise ValueError("stop positions must be in ascending order")
+    return [(pos, code) for pos, code in parsed]
+
+# Function to convert a hex stop into the coordinates interpolated in the given space.
+def _coords(hex_code, space):
+    r, g, b = hex_to_rgb(hex_code)
+    if space == "linear":
+        return LINEAR[r], LINEAR[g], LINEAR[b]
+    if space == "oklab":
+        return rgb_to_oklab(r, g, b)
+    return r, g, b
+
+# Function to lazily yield the steps + 1 hex codes of a gradient (first and last stop included).
+def iter_gradient(stops, steps=5, space="srgb"):
+    if space not in SPACES:
+        raise ValueError(f"unknown gradient space: {space} (choose from {', '.join(SPACES)})")
+    stops = parse_stops(stops)
+    steps = max(int(steps), 1)
+    # Stop positions in step units, so two evenly spaced stops reduce to c1 + (c2 - c1) * i / steps.
+    marks = [pos * steps for pos, _ in stops]
+    coords = [_coords(code, space) for _, code in stops]
+    seg = 0  # Current segment: between stop `seg` and stop `seg + 1`.
+    last_seg = len(stops) - 2
+    for i in range(steps + 1):
+        while seg < last_seg and i > marks[seg + 1]:
+            seg += 1
+        s0, s1 = marks[seg], marks[seg + 1]
+        (x1, y1, z1), (x2, y2, z2) = coords[seg], coords[seg + 1]
+        if s1 == s0:  # Zero-width segment (two stops at the same position): hard edge.
+            num, den = (1, 1) if i >= s1 else (0, 1)
+        else:
+            num, den = min(max(i - s0, 0), s1 - s0), s1 - s0
+        x = x1 + (x2 - x1) * num / den
+        y = y1 + (y2 - y1) * num / den
+        z = z1 + (z2 - z1) * num / den
+        if space == "srgb":
+            yield f"{int(x):02X}{int(y):02X}{int(z):02X}"  # Truncate, like the original two-stop gradient.
+        elif space == "linear":
+            yield f"{linear_to_byte(x):02X}{linear_to_byte(y):02X}{linear_to_byte(z):02X}"
+        else:
+            yield "%02X%02X%02X" % oklab_to_rgb(x, y, z)
+
+# Function to lazily yield color metadata for every step of a gradient.
+def gradient_metadata(stops, steps=5, space="srgb"):
+    for code in iter_gradient(stops, steps, space):
+        yield get_color_metadata(code)
+
+# Function to describe a gradient as an export document whose "colors" entry is a lazy metadata stream.
+def gradient_document(stops, steps=5, space="srgb"):
+    parsed = parse_stops(stops)
+    return {
+        "gradient_from": f"#{parsed[0][1]}",  # Starting hex color.
+        "gradient_to": f"#{parsed[-1][1]}",  # Ending hex color.
+        "stops": [{"hex": f"#{code}", "position": pos} for pos, code in parsed],
+        "space": space,
+        "steps": max(int(steps), 1) + 1,  # Number of colors (including start and end).
+        "colors": gradient_metadata(stops, steps, space),
+    }
+
+# Function to stream a gradient as one JSON document ({"stops": ..., "colors": [...]}) without building it in memory.
+def write_gradient_json(fp, stops, steps=5, space="srgb"):
+    head = gradient_document(stops, steps, space)
+    colors = head.pop("colors")
+    return write_json_document(fp, head, "colors", colors)
+
+# Function to write plain hex codes, one per line.
+def _write_hex(codes, fp, chunk_size=CHUNK_SIZE):
+    count = 0
+    buf = []
+    for code in codes:
+        buf.append(code)
+        if len(buf) >= chunk_size:
+            fp.write("\n".join(buf) + "\n")
+            count += len(buf)
+            del buf[:]
+    if buf:
+        fp.write("\n".join(buf) + "\n")
+        count += len(buf)
+    return count
+
+# Function to run `hexplorer gradient` with the given command-line arguments.
+def run_gradient(argv=None):
+    parser = argparse.ArgumentParser(prog="hexplorer gradient", description="Stream a multi-stop gradient.")
+    parser.add_argument("stops", nargs="+", help="two or more stops: RRGGBB or RRGGBB@position (0-1)")
+    parser.add_argument("-n", "--steps", type=int, default=5, help="number of steps (default: 5)")
+    parser.add_argument("-s", "--space", choices=SPACES, default="srgb", help="interpolation space (default: srgb)")
+    parser.add_argument("-f", "--format", choices=("hex", "json", "bin") + tuple(sorted(WRITERS)), default="hex",
+                        help="output format (default: hex; bin is packed 3-byte RGB)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        parse_stops(args.stops)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.format == "bin":
+        dst = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    else:
+        dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        if args.format == "bin":
+            from .export import write_packed  # Packed binary writer, only needed for this format.
+            write_packed(iter_gradient(args.stops, args.steps, args.space), dst)
+        elif args.format == "hex":
+            _write_hex(iter_gradient(args.stops, args.steps, args.space), dst)
+        elif args.format == "json":
+            write_gradient_json(dst, args.stops, args.steps, args.space)
+        else:
+            WRITERS[args.format](gradient_metadata(args.stops, args.steps, args.space), dst)
+        dst.flush()
+    except BrokenPipeError:
+        silence_broken_pipe()
+        return 1
+    finally:
+        if dst not in (sys.stdout, sys.stdout.buffer):
+            dst.close()
+    return 0
@@ -0,0 +1,249 @@
+"""
+Batch Harmony Engine.
+Computes harmony sets (complementary, analogous, triadic, split-
+complementary, tetradic, square) for whole palettes by real HSL hue
+rotation. A `HarmonyPlan` turns the requested harmonies into their
+distinct hue offsets once; every base color is then split into hue,
+chroma and minimum channel a single time, and each offset costs one
+sector lookup and one multiply. Saturation and lightness are kept, as
+with `spaces.rotate_hue`; the ramp channel is rounded from exact byte
+arithmetic, so on exact .5 ties it can sit one step away from the float
+HSL round trip.
+
+Palettes are processed in windows that run in a worker pool (`-j`) and
+stream out in order as compact JSONL, CSV or terminal rows. Random
+palettes are deterministic: window `i` of seed `S` always draws from its
+own generator seeded with "S:i", whatever the number of workers.
+
+    hexplorer harmony palette.txt -o harmonies.jsonl        # One record per base color.
+    hexplorer harmony --random 100000 --seed 7 -j 4 -f csv   # Reproducible random schemes.
+    printf '1A73E8\\nFF5722\\n' | hexplorer harmony -f text --harmonies triadic,split_complementary
+"""
+
+import argparse
+import random
+import sys
+from array import array
+
+from .codec import decode, encode_indexes, read_files, to_indexes
+from .core import parse_dec
+from .tables import MAX_DEC
+from .writers import ordered_map, silence_broken_pipe
+
+# Hue offsets (degrees) of every harmony, in output order.
+HARMONIES = {
+    "complementary": (180,),
+    "analogous": (-30, 30),
+    "triadic": (120, 240),
+    "split_complementary": (150, 210),
+    "tetradic": (60, 180, 240),  # Rectangle: two complementary pairs 60 degrees apart.
+    "square": (90, 180, 270),
+}
+FORMATS = ("jsonl", "csv", "text")
+WINDOW = 4096  # Base colors per window (the unit of parallel work).
+
+# Channel that receives the chroma, the ramp and nothing, per 60-degree hue sector (as in `spaces.hsl_to_rgb`).
+_SECTORS = (
+    (0, 1, 2),  # Red is max, green ramps up.
+    (1, 0, 2),  # Green is max, red ramps down.
+    (1, 2, 0),  # Green is max, blue ramps up.
+    (2, 1, 0),  # Blue is max, green ramps down.
+    (2, 0, 1),  # Blue is max, red ramps up.
+    (0, 2, 1),  # Red is max, blue ramps down.
+)
+
+class HarmonyPlan:
+    """ The distinct hue offsets behind a set of harmonies, computed once and reused for every palette. """
+
+    __slots__ = ("names", "offsets", "slots", "sixths")
+
+    def __init__(self, names=None):
+        names = tuple(HARMONIES) if names is None else tuple(names)
+        for name in names:
+            if name not in HARMONIES:
+                raise ValueError(f"unknown harmony: {name} (choose from {', '.join(HARMONIES)})")
+        self.names = names
+        self.offsets = tuple(sorted({off % 360 for name in names for off in HARMONIES[name]}))
+        position = {off: i for i, off in enumerate(self.offsets)}
+        self.slots = tuple(tuple(position[off % 360] for off in HARMONIES[name]) for name in names)  # Per harmony.
+        self.sixths = tuple(off / 60.0 for off in self.offsets)  # Offsets in hue-sector units.
+
+    # Function to rotate every base color by every offset: one array("I") of 24-bit colors per offset.
+    def rotate(self, decs):
+        sixths = self.sixths
+        sectors = _SECTORS
+        outs = tuple(array("I") for _ in sixths)
+        appends = tuple(out.append for out in outs)
+        pairs = tuple(zip(sixths, appends))
+        for dec in decs:
+            r, g, b = dec >> 16, (dec >> 8) & 0xFF, dec & 0xFF
+            hi = r if r > g else g
+            hi = hi if hi > b else b
+            lo = r if r < g else g
+            lo = lo if lo < b else b
+            chroma = hi - lo
+            if not chroma:  # Grays have no hue: every rotation is the color itself.
+                for append in appends:
+                    append(dec)
+                continue
+            if hi == r:
+                h = ((g - b) / chroma) % 6
+            elif hi == g:
+                h = (b - r) / chroma + 2
+            else:
+                h = (r - g) / chroma + 4
+            for sixth, append in pairs:
+                hr = (h + sixth) % 6
+                k = int(hr)
+                ramp = chroma * (1 - abs(hr % 2 - 1))
+                top, mid, _ = sectors[k]
+                channels = [lo, lo, lo]
+                channels[top] = hi
+                channels[mid] = int(ramp + lo + 0.5)
+                append((channels[0] << 16) | (channels[1] << 8) | channels[2])
+        return outs
+
+    # Function to compute the harmony sets of a palette as {harmony: [tuple of 24-bit colors per base color]}.
+    def sets(self, decs):
+        rotated = self.rotate(decs)
+        return {name: list(zip(*(rotated[i] for i in slots))) for name, slots in zip(self.names, self.slots)}
+
+# Function to compute the harmony sets of one color (hex code, "#" optional, or 24-bit index) as {harmony: [hex codes]}.
+def harmonies(color, names=None):
+    dec = parse_dec(color) if isinstance(color, str) else color
+    plan = _plan(names)
+    return {name: [f"{v:06X}" for v in colors[0]] for name, colors in plan.sets([dec]).items()}
+
+_PLANS = {}  # HarmonyPlan per tuple of harmony names, built once.
+
+# Function to get the shared plan for a set of harmony names.
+def _plan(names):
+    key = tuple(HARMONIES) if names is None else tuple(names)
+    plan = _PLANS.get(key)
+    if plan is None:
+        plan = _PLANS[key] = HarmonyPlan(key)
+    return plan
+
+# Function to draw the base colors of window `window` of a random palette, from its own seeded generator.
+def random_bases(seed, window, count):
+    rng = random.Random(f"{seed}:{window}")  # String seeds hash the same way on every platform and run.
+    return array("I", (rng.randrange(MAX_DEC + 1) for _ in range(count)))
+
+# Function to format one window of base colors with their harmony sets.
+def render_window(fmt, decs, names=None):
+    plan = _plan(names)
+    rotated = plan.rotate(decs)
+    count = len(decs)
+    base = encode_indexes(decs, sep=" ").split()  # Hex codes in bulk, one list per offset.
+    codes = [encode_indexes(column, sep=" ").split() for column in rotated]
+    out = []
+    if fmt == "jsonl":
+        for i in range(count):
+            parts = ['{"base":"#', base[i], '"']
+            for name, slots in zip(plan.names, plan.slots):
+                parts.append(f',"{name}":["#' + '","#'.join(codes[s][i] for s in slots) + '"]')
+            parts.append("}")
+            out.append("".join(parts))
+    elif fmt == "csv":
+        for i in range(count):
+            for name, slots in zip(plan.names, plan.slots):
+                out.append(f"#{base[i]},{name}," + " ".join("#" + codes[s][i] for s in slots))  # One field.
+    else:
+        from .render import swatch  # Terminal rows only: swatches follow the detected color mode.
+        for i in range(count):
+            row = [f"{swatch(decs[i], 4)} #{base[i]}"]
+            for name, slots in zip(plan.names, plan.slots):
+                row.append(f"  {name} " + "".join(swatch(rotated[s][i]) for s in slots))
+            out.append("".join(row))
+    return "\n".join(out) + "\n" if out else ""
+
+# Function to run one window job: (fmt, harmony names, decs) or (fmt, harmony names, (seed, window, count)).
+def _window_job(job):
+    fmt, names, source = job
+    if isinstance(source, tuple):
+        source = random_bases(*source)
+    return render_window(fmt, source, names)
+
+# Function to yield the windows of a palette given as packed RGB chunks (see `codec.iter_decode`).
+def _palette_windows(packed_chunks, window):
+    pending = array("I")
+    for packed in packed_chunks:
+        pending.extend(to_indexes(packed))
+        while len(pending) >= window:
+            yield pending[:window]
+            del pending[:window]
+    if len(pending):
+        yield pending
+
+# Function to stream the harmony sets of a palette (iterable of 24-bit colors or packed RGB chunks) as text chunks.
+def harmony_chunks(bases, fmt="jsonl", names=None, jobs=1, window=WINDOW):
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown harmony format: {fmt} (choose from {', '.join(FORMATS)})")
+    names = tuple(_plan(names).names)  # Validates the names before any worker starts.
+    return ordered_map(_window_job, ((fmt, names, decs) for decs in bases), jobs if fmt != "text" else 1)
+
+# Function to stream the harmony sets of a seeded random palette of `count` colors as text chunks.
+def random_harmony_chunks(count, seed, fmt="jsonl", names=None, jobs=1, window=WINDOW):
+    names = tuple(_plan(names).names)
+    jobs_iter = ((fmt, names, (seed, i, min(window, count - start)))
+                 for i, start in enumerate(range(0, count, window)))
+    return ordered_map(_window_job, jobs_iter, jobs if fmt != "text" else 1)
+
+# Function to run `hexplorer harmony` with the given command-line arguments.
+def run_harmony(argv=None):
+    parser = argparse.ArgumentParser(prog="hexplorer harmony",
+                                     description="Harmony sets for whole palettes, by real hue rotation.")
+    parser.add_argument("inputs", nargs="*", metavar="FILE", help="palette files of hex codes (default: stdin)")
+    parser.add_argument("--colors", default=None, metavar="HEX,...", help="base colors given inline")
+    parser.add_argument("--random", type=int, default=0, metavar="COUNT", help="use COUNT random base colors instead")
+    parser.add_argument("--seed", type=int, default=None, help="seed for --random (default: a fresh one, printed)")
+    parser.add_argument("--harmonies", default=",".join(HARMONIES), help=f"comma-separated (default: all of {', '.join(HARMONIES)})")
+    parser.add_argument("-f", "--format", choices=FORMATS, default=None,
+                        help="output format (default: text on a terminal, jsonl otherwise)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes (default: 1)")
+    args = parser.parse_args(argv)
+
+    names = tuple(n.strip() for n in args.harmonies.split(",") if n.strip())
+    try:
+        _plan(names)
+    except ValueError as e:
+        parser.error(str(e))
+    to_stdout = args.output == "-"
+    fmt = args.format or ("text" if to_stdout and sys.stdout.isatty() else "jsonl")
+    if fmt == "text":
+        from .render import set_color_mode
+        from .termcolor import detect_color_mode
+        set_color_mode(detect_color_mode())  # Nearest 256/16-color swatches on terminals without 24-bit color.
+
+    if args.random > 0:
+        seed = args.seed if args.seed is not None else random.SystemRandom().randrange(1 << 32)
+        if args.seed is None:
+            print(f"🎲 Seed: {seed} (--seed {seed} reproduces this palette)", file=sys.stderr)
+        chunks = random_harmony_chunks(args.random, seed, fmt, names, args.jobs)
+    else:
+        def on_error(position, token):
+            print(f"⚠️ Skipping invalid color #{position + 1}: {token}", file=sys.stderr)
+        if args.colors is not None:
+            packed_chunks = [decode(args.colors, on_error=on_error)]
+        else:
+            packed_chunks = read_files(args.inputs or ["-"], on_error=on_error)
+        chunks = harmony_chunks(_palette_windows(packed_chunks, WINDOW), fmt, names, args.jobs)
+
+    dst = sys.stdout if to_stdout else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            dst.write("base,harmony,colors\n")  # `colors` holds the set's hex codes, space-separated.
+        for chunk in chunks:
+            dst.write(chunk)  # One write per window.
+        dst.flush()
+    except BrokenPipeError:
+        silence_broken_pipe()
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        chunks.close()  # Stops the worker pool, also after an early exit.
+        if dst is not sys.stdout:
+            dst.close()
+    return 0
@@ -0,0 +1,437 @@
+"""
+Persistent Color History And Bookmarks.
+A SQLite store of every color visited, bookmarked or exported: one row per
+decimal index (the table's primary key) with its luminance, contrast vs
+white, hue and lightness precomputed, plus a tag table. Those columns are
+indexed, with partial indexes for bookmarked and saved colors, so queries
+such as "saved colors by contrast" or "bookmarks near this hue" stay index
+scans over hundreds of thousands of rows.
+
+The interactive tool records colors with `History.record()`, which only
+appends to a buffer; rows are written in one transaction per batch (every
+BATCH_SIZE records or FLUSH_SECONDS, before any query and on exit).
+
+    hexplorer history                                   # Recently visited colors.
+    hexplorer history list --saved --sort contrast      # Bookmarked or exported, highest contrast first.
+    hexplorer history list --bookmarks --near-hue 210   # Bookmarks within 15 degrees of hue 210.
+    hexplorer history bookmark 1A73E8 --tag brand
+    hexplorer history import                            # Existing hexplorer_*.json exports.
+
+The database is $HEXPLORER_HISTORY, or history.db in $XDG_DATA_HOME/hexplorer
+(default ~/.local/share/hexplorer); HEXPLORER_HISTORY=off disables recording.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from .core import parse_dec
+from .names import name_palette
+from .spaces import rgb_to_hsl
+from .tables import contrast_ratio, luminance_of
+
+BATCH_SIZE = 100  # Buffered records written per transaction.
+IMPORT_BATCH_SIZE = 10000  # Records written per transaction by bulk imports.
+FLUSH_SECONDS = 5.0  # Longest time a record waits in the buffer (checked when the next one arrives).
+KINDS = ("visit", "bookmark", "export")  # What a record says about a color.
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS colors (
+    dec_index  INTEGER PRIMARY KEY,     -- 0xRRGGBB, also the rowid.
+    luminance  REAL NOT NULL,           -- WCAG relative luminance.
+    contrast   REAL NOT NULL,           -- Contrast ratio against white.
+    hue        REAL,                    -- HSL hue in degrees, NULL for grays.
+    lightness  REAL NOT NULL,           -- HSL lightness (0-1).
+    name       TEXT NOT NULL,           -- Nearest color name.
+    visits     INTEGER NOT NULL DEFAULT 0,
+    bookmarked INTEGER NOT NULL DEFAULT 0,
+    exported   INTEGER NOT NULL DEFAULT 0,
+    first_seen REAL NOT NULL,           -- Unix time.
+    last_seen  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    tag       TEXT NOT NULL,
+    dec_index INTEGER NOT NULL,
+    PRIMARY KEY (tag, dec_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_dec_index ON tags (dec_index);
+CREATE INDEX IF NOT EXISTS colors_luminance ON colors (luminance);
+CREATE INDEX IF NOT EXISTS colors_contrast ON colors (contrast);
+CREATE INDEX IF NOT EXISTS colors_hue ON colors (hue);
+CREATE INDEX IF NOT EXISTS colors_last_seen ON colors (last_seen);
+CREATE INDEX IF NOT EXISTS colors_bookmarked_hue ON colors (hue) WHERE bookmarked = 1;
+CREATE INDEX IF NOT EXISTS colors_saved_contrast ON colors (contrast) WHERE bookmarked = 1 OR exported = 1;
+"""
+
+# Row filters by kind; "bookmarks" and "saved" repeat the partial index conditions so SQLite can use them.
+FILTERS = {
+    "all": None,
+    "visited": "visits > 0",
+    "bookmarks": "bookmarked = 1",
+    "exported": "exported = 1",
+    "saved": "bookmarked = 1 OR exported = 1",
+}
+
+# Sort orders for queries (column, default direction).
+SORTS = {
+    "recent": ("last_seen", "DESC"),
+    "visits": ("visits", "DESC"),
+    "contrast": ("contrast", "DESC"),
+    "luminance": ("luminance", "ASC"),
+    "hue": ("hue", "ASC"),
+    "index": ("dec_index", "ASC"),
+}
+
+COLUMNS = ("dec_index", "luminance", "contrast", "hue", "lightness", "name",
+           "visits", "bookmarked", "exported", "first_seen", "last_seen")
+
+# Function to get the history database path ($HEXPLORER_HISTORY or history.db in the data folder).
+def default_history_path():
+    path = os.environ.get("HEXPLORER_HISTORY")
+    if path:
+        return os.path.expanduser(path)
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "hexplorer", "history.db")
+
+# Function to tell whether recording is turned off (HEXPLORER_HISTORY=off).
+def history_disabled():
+    return os.environ.get("HEXPLORER_HISTORY", "").lower() in ("off", "0", "no", "false")
+
+# Function to build the derived columns of new colors (decimal indexes), naming them in bulk.
+def _rows(decs):
+    rgbs = [(dec >> 16, (dec >> 8) & 0xFF, dec & 0xFF) for dec in decs]
+    names = name_palette(rgbs)
+    for dec, rgb, (name, _) in zip(decs, rgbs, names):
+        l = luminance_of(dec)
+        h, s, lightness = rgb_to_hsl(*rgb)
+        yield dec, l, contrast_ratio(1.0, l), h if s > 0 else None, lightness, name
+
+# Function to build the WHERE clause and parameters that keep hues within `width` degrees of `hue`.
+def _hue_window(hue, width):
+    if width >= 180:
+        return "hue IS NOT NULL", []
+    lo, hi = (hue - width) % 360, (hue + width) % 360
+    if lo <= hi:
+        return "hue BETWEEN ? AND ?", [lo, hi]
+    # The window wraps around 0 degrees: two closed ranges, so SQLite searches the hue index once per range.
+    return "(hue BETWEEN ? AND 360 OR hue BETWEEN 0 AND ?)", [lo, hi]
+
+class History:
+    """ The color history database; records are buffered and written in batches. """
+
+    def __init__(self, path=None, batch_size=BATCH_SIZE, flush_seconds=FLUSH_SECONDS):
+        self.path = path or default_history_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode = WAL")  # Readers (e.g. `hexplorer history`) never block the tool.
+        self.db.execute("PRAGMA synchronous = NORMAL")  # Durable at checkpoints; a batch is at most FLUSH_SECONDS old.
+        self.db.execute("PRAGMA cache_size = -32768")  # 32 MiB of pages, so bulk imports keep the indexes in memory.
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"history database {self.path} has a newer schema ({version})")
+        self.db.executescript(SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending = []  # (dec, kind, unix time) records not written yet.
+        self._pending_tags = []  # (tag, dec) pairs not written yet.
+        self._flushed = time.monotonic()
+
+    # Function to record that a color was visited, bookmarked (with optional tags) or exported.
+    def record(self, dec, kind="visit", tags=(), at=None):
+        if kind not in KINDS:
+            raise ValueError(f"unknown history record kind: {kind}")
+        self._pending.append((dec, kind, time.time() if at is None else at))
+        for tag in tags:
+            self._pending_tags.append((tag, dec))
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._flushed >= self.flush_seconds:
+            self.flush()
+
+    # Function to record many (dec, kind, unix time) records at once, in transactions of `batch_size` records.
+    def record_many(self, records, tags=(), batch_size=IMPORT_BATCH_SIZE):
+        for dec, kind, at in records:
+            if kind not in KINDS:
+                raise ValueError(f"unknown history record kind: {kind}")
+            self._pending.append((dec, kind, at))
+            self._pending_tags.extend((tag, dec) for tag in tags)
+            if len(self._pending) >= batch_size:
+                self.flush()
+        self.flush()
+
+    # Function to write the buffered records in one transaction.
+    def flush(self):
+        self._flushed = time.monotonic()
+        if not self._pending and not self._pending_tags:
+            return 0
+        pending, tags = self._pending, self._pending_tags  # Cleared only once the transaction commits.
+        totals = {}  # dec -> [visits, bookmarked, exported, first, last]
+        for dec, kind, at in pending:
+            entry = totals.get(dec)
+            if entry is None:
+                entry = totals[dec] = [0, 0, 0, at, at]
+            if kind == "visit":
+                entry[0] += 1
+            elif kind == "bookmark":
+                entry[1] = 1
+            else:
+                entry[2] = 1
+            entry[3] = min(entry[3], at)
+            entry[4] = max(entry[4], at)
+        known = self._known(list(totals))
+        new = sorted(dec for dec in totals if dec not in known)  # In key order: appends to the table's B-tree pages.
+        with self.db:  # One transaction for the whole batch.
+            self.db.executemany(  # New colors get their derived columns and counters in one insert.
+                "INSERT OR IGNORE INTO colors (dec_index, luminance, contrast, hue, lightness, name,"
+                " visits, bookmarked, exported, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (row + tuple(totals[row[0]]) for row in _rows(new)))
+            self.db.executemany(  # Known colors only have their counters updated.
+                "UPDATE colors SET visits = visits + ?, bookmarked = max(bookmarked, ?), exported = max(exported, ?),"
+                " first_seen = min(first_seen, ?), last_seen = max(last_seen, ?) WHERE dec_index = ?",
+                (tuple(totals[dec]) + (dec,) for dec in known))
+            self.db.executemany("INSERT OR IGNORE INTO tags (tag, dec_index) VALUES (?, ?)", tags)
+        self._pending, self._pending_tags = [], []  # Committed: a failed batch stays buffered for the next flush.
+        return len(pending)
+
+    # Function to find which of the given colors already have a row.
+    def _known(self, decs):
+        known = set()
+        for i in range(0, len(decs), 500):  # Stay below SQLite's bound-parameter limit.
+            chunk = decs[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            known.update(dec for dec, in self.db.execute(
+                f"SELECT dec_index FROM colors WHERE dec_index IN ({marks})", chunk))
+        return known
+
+    # Function to bookmark a color now, with optional tags.
+    def bookmark(self, dec, tags=()):
+        self.record(dec, "bookmark", tags)
+        self.flush()
+
+    # Function to remove a bookmark (and the color's tags); returns whether the color was bookmarked.
+    def unbookmark(self, dec):
+        self.flush()
+        with self.db:
+            changed = self.db.execute("UPDATE colors SET bookmarked = 0 WHERE dec_index = ? AND bookmarked = 1",
+                                      (dec,)).rowcount
+            self.db.execute("DELETE FROM tags WHERE dec_index = ?", (dec,))
+        return changed > 0
+
+    # Function to build a query; returns (sql, parameters).
+    def _select(self, kind, sort, near_hue, width, tag, min_contrast, limit, reverse):
+        where, params = [], []
+        if FILTERS[kind]:
+            where.append(f"({FILTERS[kind]})")
+        if near_hue is not None:
+            clause, values = _hue_window(near_hue % 360, width)
+            where.append(clause)
+            params.extend(values)
+        if tag is not None:
+            where.append("dec_index IN (SELECT dec_index FROM tags WHERE tag = ?)")
+            params.append(tag)
+        if min_contrast is not None:
+            where.append("contrast >= ?")
+            params.append(min_contrast)
+        if sort == "hue" and near_hue is not None:  # Closest hue first, measured around the circle.
+            order = "min(abs(hue - ?), 360 - abs(hue - ?))"
+            params.extend((near_hue % 360, near_hue % 360))
+            direction = "ASC"
+        else:
+            order, direction = SORTS[sort]
+        if reverse:
+            direction = "ASC" if direction == "DESC" else "DESC"
+        sql = (f"SELECT {', '.join(COLUMNS)}, (SELECT group_concat(tag, ',') FROM tags"
+               f" WHERE tags.dec_index = colors.dec_index) FROM colors")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} {direction}, dec_index"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    # Function to query stored colors as dicts: filtered by kind, hue window, tag and minimum contrast, then sorted.
+    def query(self, kind="all", sort="recent", near_hue=None, width=15.0, tag=None, min_contrast=None,
+              limit=50, reverse=False):
+        if kind not in FILTERS:
+            raise ValueError(f"unknown history filter: {kind}")
+        if sort not in SORTS:
+            raise ValueError(f"unknown history sort: {sort}")
+        self.flush()
+        sql, params = self._select(kind, sort, near_hue, width, tag, min_contrast, limit, reverse)
+        for row in self.db.execute(sql, params):
+            record = dict(zip(COLUMNS, row))
+            record["hex"] = f"#{record['dec_index']:06X}"
+            record["bookmarked"] = bool(record["bookmarked"])
+            record["exported"] = bool(record["exported"])
+            record["tags"] = sorted(row[-1].split(",")) if row[-1] else []
+            yield record
+
+    # Function to explain how SQLite runs a query (for checking index use).
+    def plan(self, **options):
+        kind, sort = options.get("kind", "all"), options.get("sort", "recent")
+        sql, params = self._select(kind, sort, options.get("near_hue"), options.get("width", 15.0),
+                                   options.get("tag"), options.get("min_contrast"), options.get("limit", 50),
+                                   options.get("reverse", False))
+        return [row[-1] for row in self.db.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+    # Function to count stored colors per kind.
+    def counts(self):
+        self.flush()
+        row = self.db.execute("SELECT count(*), sum(visits > 0), sum(bookmarked), sum(exported), sum(visits),"
+                              " (SELECT count(DISTINCT tag) FROM tags) FROM colors").fetchone()
+        keys = ("colors", "visited", "bookmarks", "exported", "visits", "tags")
+        return {key: value or 0 for key, value in zip(keys, row)}
+
+    # Function to import exports from a folder: hexplorer_*.json documents plus the JSONL/CSV export logs.
+    # Every color in them is recorded as exported at the file's modification time; returns (files, colors).
+    def import_exports(self, directory, tags=()):
+        from .export import LOG_NAME, _color_records  # The export formats define what a document holds.
+        files = colors = 0
+        for path in sorted(glob.glob(os.path.join(directory, "hexplorer_*.json*")) +
+                           glob.glob(os.path.join(directory, f"{LOG_NAME}.csv"))):
+            at = os.path.getmtime(path)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    if path.endswith(".json"):
+                        codes = [meta.get("hex") for _, meta in _color_records(json.load(f))]
+                    elif path.endswith(".jsonl"):
+                        codes = [json.loads(line).get("hex") for line in f if line.strip()]
+                    elif path.endswith(".csv"):
+                        codes = [row.get("hex") for row in csv.DictReader(f)]
+                    else:
+                        continue
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"⚠️ Skipping {path}: {e}", file=sys.stderr)
+                continue
+            decs = []
+            for code in codes:
+                try:
+                    decs.append(parse_dec(code))
+                except (TypeError, ValueError):
+                    pass  # Not a color record.
+            self.record_many(((dec, "export", at) for dec in decs), tags)
+            files += 1
+            colors += len(decs)
+        return files, colors
+
+    # Function to write pending records and close the database.
+    def close(self):
+        if self.db is not None:
+            self.flush()
+            self.db.close()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Function to format one stored color as a terminal line.
+def history_line(record):
+    from .render import color_block  # Swatches only for text output.
+    flags = ("★" if record["bookmarked"] else " ") + ("📤" if record["exported"] else "  ")
+    hue = "   -" if record["hue"] is None else f"{record['hue']:4.0f}"
+    tags = f"  [{', '.join(record['tags'])}]" if record["tags"] else ""
+    return (f"{color_block(record['hex'][1:])}  {flags} {record['contrast']:5.2f}:1  hue {hue}"
+            f"  visits {record['visits']:<4} {record['name']}{tags}")
+
+# Function to run `hexplorer history` with the given command-line arguments.
+def run_history(argv=None):
+    parser = argparse.ArgumentParser(prog="hexplorer history", description="Query the color history and bookmarks.")
+    parser.add_argument("--db", default=None, help=f"history database (default: {default_history_path()})")
+    sub = parser.add_subparsers(dest="action")
+    ls = sub.add_parser("list", help="list stored colors (default: every kind, most recent first)")
+    which = ls.add_mutually_exclusive_group()
+    for kind in FILTERS:
+        if kind != "all":
+            which.add_argument(f"--{kind}", dest="kind", action="store_const", const=kind)
+    ls.add_argument("--sort", choices=tuple(SORTS), default=None, help="order (default: recent, or hue with --near-hue)")
+    ls.add_argument("--reverse", action="store_true", help="reverse the sort order")
+    ls.add_argument("--near-hue", type=float, default=None, metavar="DEGREES", help="keep hues close to this one")
+    ls.add_argument("--width", type=float, default=15.0, metavar="DEGREES", help="hue window half-width (default: 15)")
+    ls.add_argument("--tag", default=None, help="keep colors with this tag")
+    ls.add_argument("--min-contrast", type=float, default=None, help="keep colors with at least this contrast vs white")
+    ls.add_argument("-n", "--limit", type=int, default=50, help="rows to show, 0 for all (default: 50)")
+    ls.add_argument("--format", choices=("text", "jsonl"), default="text")
+    ls.add_argument("--explain", action="store_true", help="print the query plan instead of the rows")
+    mark = sub.add_parser("bookmark", help="bookmark colors")
+    mark.add_argument("colors", nargs="+", metavar="COLOR", help="HEX codes or decimal indexes")
+    mark.add_argument("--tag", action="append", default=[], help="tag to add (repeatable)")
+    unmark = sub.add_parser("unbookmark", help="remove bookmarks and their tags")
+    unmark.add_argument("colors", nargs="+", metavar="COLOR")
+    imp = sub.add_parser("import", help="import existing exports (hexplorer_*.json and the export logs)")
+    imp.add_argument("directory", nargs="?", default=None, help="export folder (default: $HEXPLORER_EXPORT_DIR)")
+    imp.add_argument("--tag", action="append", default=[], help="tag imported colors (repeatable)")
+    sub.add_parser("stats", help="count stored colors, bookmarks and exports")
+    args = parser.parse_args(argv)
+
+    try:
+        history = History(args.db)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"❌ Cannot open history database ({e})", file=sys.stderr)
+        return 1
+    with history:
+        if args.action in ("bookmark", "unbookmark"):
+            try:
+                decs = [parse_dec(color) for color in args.colors]
+            except ValueError as e:
+                print(f"❌ {e}", file=sys.stderr)
+                return 2
+            for dec in decs:
+                if args.action == "bookmark":
+                    history.bookmark(dec, args.tag)
+                    print(f"★ Bookmarked #{dec:06X}")
+                elif history.unbookmark(dec):
+                    print(f"☆ Removed Bookmark #{dec:06X}")
+                else:
+                    print(f"❓ #{dec:06X} Was Not Bookmarked")
+            return 0
+        if args.action == "import":
+            from .export import default_export_dir
+            directory = args.directory or default_export_dir()
+            files, colors = history.import_exports(directory, args.tag)
+            print(f"✅ Imported {colors} Colors From {files} Files In {directory}", file=sys.stderr)
+            return 0
+        if args.action == "stats":
+            for key, value in history.counts().items():
+                print(f"{key:<10} {value}")
+            print(f"{'database':<10} {history.path}")
+            return 0
+
+        kind = getattr(args, "kind", None) or ("all" if args.action == "list" else "visited")
+        near_hue = getattr(args, "near_hue", None)
+        options = {
+            "kind": kind,
+            "sort": getattr(args, "sort", None) or ("hue" if near_hue is not None else "recent"),
+            "near_hue": near_hue,
+            "width": getattr(args, "width", 15.0),
+            "tag": getattr(args, "tag", None),
+            "min_contrast": getattr(args, "min_contrast", None),
+            "limit": getattr(args, "limit", 50),
+            "reverse": getattr(args, "reverse", False),
+        }
+        if getattr(args, "explain", False):
+            print("\n".join(history.plan(**options)))
+            return 0
+        records = history.query(**options)
+        try:
+            if getattr(args, "format", "text") == "jsonl":
+                from .writers import write_jsonl
+                write_jsonl(records, sys.stdout)
+            else:
+                from .render import set_color_mode, write_lines
+                from .termcolor import detect_color_mode
+                set_color_mode(detect_color_mode())  # Nearest 256/16-color swatches on terminals without 24-bit color.
+                write_lines(history_line(record) for record in records)
+        except BrokenPipeError:
+            from .writers import silence_broken_pipe
+            silence_broken_pipe()
+    return 0
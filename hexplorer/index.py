@@ -0,0 +1,279 @@
+"""
+Memory-Mapped Color Attribute Index.
+A one-time generated file holding packed attributes for all 16,777,216
+color indexes, stored column by column so every attribute is a flat
+array addressed by decimal index. The file is opened with mmap, so
+lookups are zero-copy and every process opening it shares the same pages.
+
+Columns (one entry per decimal index):
+    luminance   float32  relative luminance
+    contrast    uint16   contrast vs white x 100 (e.g. 450 = 4.50 : 1)
+    hue         uint8    hue bucket (10 degrees each, 0-35), 255 for grays
+    lightness   uint8    HSL lightness bucket (0-9)
+    name_id     uint16   id of the nearest CSS color name (see `names.CSS_COLORS`)
+"""
+
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from itertools import islice
+
+from .codec import encode_indexes
+from .names import DEFAULT_PALETTE, name_index
+from .tables import LUM_B, LUM_G, LUM_R, MAX_DEC
+from .writers import CHUNK_SIZE
+
+COUNT = MAX_DEC + 1  # Number of entries in every column.
+MAGIC = b"HEXIDX01"  # File signature and format version.
+HEADER = struct.Struct("<8sI5Q")  # Magic, entry count, one byte offset per column.
+HEADER_SIZE = mmap.PAGESIZE  # Columns start on page boundaries.
+
+HUE_BUCKET_DEGREES = 10  # Width of one hue bucket.
+GRAY_HUE = 255  # Hue bucket used for achromatic colors (r == g == b).
+LIGHTNESS_BUCKETS = 10  # Number of HSL lightness buckets.
+NO_NAME = 0xFFFF  # Name id of colors without a nearest name.
+
+# Column names and array typecodes, in file order.
+COLUMNS = (
+    ("luminance", "f"),
+    ("contrast", "H"),
+    ("hue", "B"),
+    ("lightness", "B"),
+    ("name_id", "H"),
+)
+
+# Lightness bucket for every possible (max + min) channel sum.
+_LIGHTNESS = bytes(min(s * LIGHTNESS_BUCKETS // 510, LIGHTNESS_BUCKETS - 1) for s in range(511))
+
+# Function to get the default index file path (HEXPLORER_CACHE_DIR, then XDG_CACHE_HOME, then ~/.cache).
+def default_cache_dir():
+    path = os.environ.get("HEXPLORER_CACHE_DIR")
+    if not path:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "hexplorer")
+    return path
+
+# Function to get the default path of the color index file.
+def default_index_path():
+    return os.path.join(default_cache_dir(), "colors.idx")
+
+# Function to compute the byte offset of every column for the fixed entry count.
+def _column_offsets():
+    offsets = []
+    pos = HEADER_SIZE
+    for _, typecode in COLUMNS:
+        offsets.append(pos)
+        size = COUNT * array(typecode).itemsize
+        pos += -(-size // mmap.PAGESIZE) * mmap.PAGESIZE  # Round each column up to a full page.
+    return offsets, pos
+
+# Function to compute the hue bucket of an RGB color (GRAY_HUE when it has no hue).
+def hue_bucket(r, g, b):
+    mx = max(r, g, b)
+    mn = min(r, g, b)
+    d = mx - mn
+    if not d:
+        return GRAY_HUE
+    if mx == r:
+        h = ((g - b) / d) % 6
+    elif mx == g:
+        h = (b - r) / d + 2
+    else:
+        h = (r - g) / d + 4
+    return int(h * 60) // HUE_BUCKET_DEGREES % (360 // HUE_BUCKET_DEGREES)
+
+# Function to compute the lightness bucket of an RGB color.
+def lightness_bucket(r, g, b):
+    return _LIGHTNESS[max(r, g, b) + min(r, g, b)]
+
+# Function to compute every column for one red plane (65,536 consecutive indexes).
+def _build_plane(r, names=None):
+    lr = LUM_R[r]
+    lum = [lr + lg + lb for lg in LUM_G for lb in LUM_B]
+    contrast = array("H", [int(105 / (l + 0.05) + 0.5) for l in lum])  # 1.05 / (l + 0.05) x 100, rounded.
+    lum = array("f", lum)
+    hue = array("B", bytes(65536))
+    light = array("B", bytes(65536))
+    i = 0
+    for g in range(256):
+        for b in range(256):
+            hue[i] = hue_bucket(r, g, b)
+            light[i] = _LIGHTNESS[max(r, g, b) + min(r, g, b)]
+            i += 1
+    if names is None:
+        name_id = array("H", [NO_NAME]) * 65536
+    else:
+        name_id = array("H", names(r))
+    return lum, contrast, hue, light, name_id
+
+# Function to generate the index file at `path` (written to a temp file, then moved into place).
+# `names(r)` returns the 65,536 nearest-name ids of red plane `r` (default: the CSS palette).
+def build_index(path=None, names=None, progress=None):
+    path = path or default_index_path()
+    if names is None:
+        names = name_index(DEFAULT_PALETTE).plane_ids
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    offsets, total = _column_offsets()
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.truncate(total)
+        f.write(HEADER.pack(MAGIC, COUNT, *offsets))
+        for r in range(256):
+            for offset, column in zip(offsets, _build_plane(r, names)):
+                f.seek(offset + r * 65536 * column.itemsize)
+                f.write(column.tobytes())
+            if progress is not None:
+                progress(r + 1, 256)
+    os.replace(tmp, path)
+    return path
+
+class ColorIndex:
+    """ Read-only, memory-mapped view of a color index file.
+        Columns are exposed as typed memoryviews indexed by decimal index. """
+
+    def __init__(self, path=None):
+        self.path = path or default_index_path()
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, *offsets = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or count != COUNT:
+            self._mm.close()
+            raise ValueError(f"{self.path} is not a hexplorer color index")
+        if sys.byteorder != "little":  # Columns are stored little-endian.
+            self._mm.close()
+            raise ValueError("color index files are only supported on little-endian machines")
+        self._view = view = memoryview(self._mm)
+        self.columns = {}
+        for (name, typecode), offset in zip(COLUMNS, offsets):
+            size = COUNT * array(typecode).itemsize
+            self.columns[name] = view[offset:offset + size].cast(typecode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Function to release the columns and unmap the file.
+    def close(self):
+        for column in self.columns.values():
+            column.release()
+        self.columns = {}
+        self._view.release()
+        self._mm.close()
+
+    # Function to get every attribute of one color in O(1).
+    def lookup(self, dec):
+        return {name: column[dec] for name, column in self.columns.items()}
+
+    # Function to get the precomputed nearest CSS color name of one color in O(1).
+    def name(self, dec):
+        name_id = self.columns["name_id"][dec]
+        return None if name_id == NO_NAME else name_index(DEFAULT_PALETTE).names[name_id]
+
+    # Function to yield the indexes in [start, stop) whose attributes fall inside the given inclusive bounds.
+    # Bounds are (low, high) pairs keyed by column name, e.g. filter(hue=(20, 22), contrast=(450, 2100)).
+    def filter(self, start=0, stop=COUNT, **bounds):
+        for name in bounds:
+            if name not in self.columns:
+                raise KeyError(f"unknown index column: {name}")
+        byte_bounds = [(n, lh) for n, lh in bounds.items() if self.columns[n].format == "B"]
+        other_bounds = [(self.columns[n], lo, hi) for n, (lo, hi) in bounds.items() if self.columns[n].format != "B"]
+
+        if byte_bounds:
+            # Let the regex engine find candidates in the byte columns without a Python loop per color.
+            name, (lo, hi) = byte_bounds[0]
+            lo, hi = max(int(lo), 0), min(int(hi), 255)
+            if lo > hi:
+                return
+            pattern = re.compile(b"[" + re.escape(bytes([lo])) + b"-" + re.escape(bytes([hi])) + b"]")
+            candidates = (start + m.start() for m in pattern.finditer(self.columns[name][start:stop]))
+            other_bounds = [(self.columns[n], lo2, hi2) for n, (lo2, hi2) in byte_bounds[1:]] + other_bounds
+        else:
+            candidates = range(start, stop)
+
+        if not other_bounds:
+            yield from candidates
+            return
+        if len(other_bounds) == 1 and not byte_bounds:
+            column, lo, hi = other_bounds[0]
+            for i, v in enumerate(column[start:stop], start):
+                if lo <= v <= hi:
+                    yield i
+            return
+        for i in candidates:
+            for column, lo, hi in other_bounds:
+                if not lo <= column[i] <= hi:
+                    break
+            else:
+                yield i
+
+# Function to parse a "low:high" command-line bound.
+def _bound(text):
+    lo, _, hi = text.partition(":")
+    return float(lo), float(hi)
+
+# Function to run `hexplorer index` with the given command-line arguments.
+def run_index(argv=None):
+    parser = argparse.ArgumentParser(prog="hexplorer index", description="Build or query the memory-mapped color index.")
+    parser.add_argument("--path", default=None, help=f"index file (default: {default_index_path()})")
+    sub = parser.add_subparsers(dest="action")
+    sub.add_parser("build", help="generate the index file")
+    lookup = sub.add_parser("lookup", help="show the indexed attributes of one color")
+    lookup.add_argument("color", help="HEX code or decimal index")
+    scan = sub.add_parser("scan", help="print colors whose attributes fall inside the given bounds")
+    units = {  # Bounds are in the stored units of each column (see the module docstring).
+        "luminance": "relative luminance, 0 to 1",
+        "contrast": "contrast vs white x 100, e.g. 450:2100 for 4.5:1 to 21:1",
+        "hue": f"hue bucket of {HUE_BUCKET_DEGREES} degrees, 0 to 35 ({GRAY_HUE} for grays)",
+        "lightness": f"lightness bucket, 0 to {LIGHTNESS_BUCKETS - 1}",
+        "name_id": "nearest-name id",
+    }
+    for name, _ in COLUMNS:
+        scan.add_argument(f"--{name.replace('_', '-')}", type=_bound, metavar="LOW:HIGH", help=units[name])
+    scan.add_argument("--start", type=int, default=0, help="first decimal index to scan (default: 0)")
+    scan.add_argument("--stop", type=int, default=COUNT, help=f"scan up to, not including, this index (default: {COUNT})")
+    scan.add_argument("--limit", type=int, default=0, help="stop after this many matches")
+    args = parser.parse_args(argv)
+    if args.action == "scan" and not 0 <= args.start <= args.stop <= COUNT:
+        parser.error(f"--start and --stop must satisfy 0 <= start <= stop <= {COUNT}")
+
+    if args.action == "build":
+        def progress(done, total):
+            print(f"\r🔨 Building Color Index: {done * 100 // total}%", end="", file=sys.stderr, flush=True)
+        path = build_index(args.path, progress=progress)
+        print(f"\n✅ Index Written To: {path}", file=sys.stderr)
+        return 0
+    if args.action is None:
+        parser.print_help()
+        return 2
+
+    if args.action == "lookup":
+        from .core import parse_dec  # Validates syntax and range; only the lookup needs it.
+        try:
+            dec = parse_dec(args.color)
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 2
+
+    try:
+        index = ColorIndex(args.path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot open color index ({e}). Run `hexplorer index build` first.", file=sys.stderr)
+        return 1
+    with index:
+        if args.action == "lookup":
+            print(f"#{dec:06X}", index.lookup(dec), index.name(dec))
+            return 0
+        bounds = {name: getattr(args, name) for name, _ in COLUMNS if getattr(args, name) is not None}
+        found = islice(index.filter(args.start, args.stop, **bounds), args.limit if args.limit > 0 else None)
+        while True:
+            chunk = list(islice(found, CHUNK_SIZE))
+            if not chunk:
+                break
+            sys.stdout.write(encode_indexes(chunk, prefix="#"))  # A whole chunk of codes formatted in bulk.
+    return 0
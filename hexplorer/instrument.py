@@ -0,0 +1,302 @@
+"""
+Latency Instrumentation And Profiling.
+Opt-in: nothing here is imported or patched unless hexplorer starts with
+one of the flags below, so a normal session pays nothing for it.
+
+    hexplorer --stats                     # Per-command latency and hot-function counters, printed on exit.
+    hexplorer --stats=stats.json batch    # The same, saved as JSON (with the full histograms).
+    hexplorer --profile                   # cProfile the whole run into hexplorer.prof (pstats format).
+    hexplorer --profile=run.collapsed     # Sampled stacks in collapsed format, for flamegraph.pl / speedscope.
+
+$HEXPLORER_STATS=1 (or a file name) enables --stats without the flag.
+Command latency runs from the command being entered to the next prompt,
+without the time spent waiting on follow-up prompts (e.g. grad's stops).
+Only the main process is profiled; worker processes (-j) are not.
+"""
+
+import atexit
+import builtins
+import functools
+import importlib
+import json
+import math
+import sys
+import threading
+import time
+
+clock = time.perf_counter  # Clock used for every measurement.
+
+SUB_BUCKETS = 4  # Histogram buckets per doubling of latency (about 19% wide each).
+PROFILE_DEFAULT = "hexplorer.prof"  # --profile output when no file is given.
+COLLAPSED_SUFFIXES = (".collapsed", ".folded", ".txt")  # --profile outputs written as sampled collapsed stacks.
+SAMPLE_INTERVAL = 0.001  # Seconds between stack samples for collapsed output.
+
+# Hot functions wrapped with call counters while --stats is on, as "module:function".
+HOT_FUNCTIONS = (
+    "core:hex_to_rgb",
+    "core:rgb_to_hex",
+    "core:is_valid_hex",
+    "core:get_color_metadata",
+    "core:mix_hex",
+    "core:get_scheme",
+    "core:get_color_blindness",
+    "names:nearest_name",
+    "tables:relative_luminance",
+    "tables:luminance_of",
+    "tables:contrast_ratio",
+    "spaces:rgb_to_hsl",
+    "spaces:rotate_hue",
+    "spaces:delta_e",
+    "gradient:iter_gradient",
+    "render:color_block",
+    "render:grid_lines",
+)
+
+class Histogram:
+    """ Log-bucketed latency histogram: fixed memory, percentiles within one bucket's width. """
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets = {}  # Bucket number -> count; bucket b covers [2 ** (b / SUB_BUCKETS), 2 ** ((b + 1) / SUB_BUCKETS)) µs.
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    # Function to record one duration in seconds.
+    def add(self, seconds):
+        us = seconds * 1e6
+        bucket = math.floor(math.log2(us) * SUB_BUCKETS) if us >= 1 else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    # Function to estimate a percentile (0-100) in seconds, as the upper edge of its bucket (capped at the max).
+    def percentile(self, pct):
+        rank = math.ceil(self.count * pct / 100) or 1
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** ((bucket + 1) / SUB_BUCKETS) / 1e6, self.max)
+        return self.max
+
+    # Function to summarize the histogram as a JSON-serializable dict (milliseconds, buckets by lower edge).
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "min_ms": round(self.min * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p90_ms": round(self.percentile(90) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "buckets_ms": {f"{2 ** (b / SUB_BUCKETS) / 1000:.4g}": n for b, n in sorted(self.buckets.items())},
+        }
+
+class Stats:
+    """ Per-command latency histograms and hot-function call counters for one run. """
+
+    def __init__(self):
+        self.commands = {}  # Command -> Histogram.
+        self.calls = {}  # "module.function" -> [calls, seconds].
+        self.waiting = 0.0  # Seconds spent blocked in input() so far.
+        self.idle = False  # True while blocked in input() (the sampler skips those samples).
+        self._command = None  # (command, start time, waiting at start) of the command in progress.
+        self._patched = []  # (namespace, attribute, original) to undo on uninstall().
+
+    # Function to start timing a command.
+    def start(self, command):
+        self._command = (command, clock(), self.waiting)
+
+    # Function to stop timing the command in progress (if any) and add it to its histogram.
+    def stop(self):
+        if self._command is None:
+            return
+        command, started, waited = self._command
+        self._command = None
+        elapsed = clock() - started - (self.waiting - waited)
+        self.commands.setdefault(command, Histogram()).add(max(elapsed, 0.0))
+
+    # Function to wrap input() so time spent waiting on the user is not counted as command latency.
+    def _timed_input(self, original):
+        def timed_input(*args):
+            self.idle = True
+            started = clock()
+            try:
+                return original(*args)
+            finally:
+                self.waiting += clock() - started
+                self.idle = False
+        return timed_input
+
+    # Function to wrap a function with a call counter (calls and cumulative seconds).
+    def _counted(self, name, func):
+        counter = self.calls.setdefault(name, [0, 0.0])
+
+        @functools.wraps(func)
+        def counted(*args, **kwargs):
+            counter[0] += 1
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                counter[1] += clock() - started
+        return counted
+
+    # Function to swap an attribute, remembering the original for uninstall().
+    def _patch(self, namespace, attribute, value):
+        self._patched.append((namespace, attribute, getattr(namespace, attribute)))
+        setattr(namespace, attribute, value)
+
+    # Function to install the input() timer and wrap HOT_FUNCTIONS in every loaded hexplorer module that uses them.
+    # Names bound with `from .core import ...` are rebound too, so the counters see every call path.
+    def install(self):
+        self._patch(builtins, "input", self._timed_input(builtins.input))
+        package = __name__.rpartition(".")[0]
+        for spec in HOT_FUNCTIONS:
+            module_name, func_name = spec.split(":")
+            original = getattr(importlib.import_module(f"{package}.{module_name}"), func_name)
+            counted = self._counted(f"{module_name}.{func_name}", original)
+            for name, module in list(sys.modules.items()):
+                if (name == package or name.startswith(package + ".")) and getattr(module, func_name, None) is original:
+                    self._patch(module, func_name, counted)
+
+    # Function to restore everything install() replaced.
+    def uninstall(self):
+        while self._patched:
+            namespace, attribute, original = self._patched.pop()
+            setattr(namespace, attribute, original)
+
+    # Function to collect everything as a JSON-serializable dict.
+    def to_dict(self):
+        from .color import metadata_cache_info
+        cache = metadata_cache_info()
+        return {
+            "commands": {cmd: hist.to_dict() for cmd, hist in sorted(self.commands.items())},
+            "calls": {name: {"calls": n, "total_ms": round(s * 1000, 3)}
+                      for name, (n, s) in sorted(self.calls.items(), key=lambda kv: -kv[1][0]) if n},
+            "metadata_cache": {"hits": cache.hits, "misses": cache.misses, "size": cache.currsize,
+                               "maxsize": cache.maxsize},
+        }
+
+    # Function to print the latency table and the call counters on stderr.
+    def report(self, out=None):
+        out = out or sys.stderr
+        data = self.to_dict()
+        if data["commands"]:
+            print("\n⏱️  Command Latency (ms)", file=out)
+            print(f"   {'command':<10} {'count':>6} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}", file=out)
+            for cmd, h in data["commands"].items():
+                print(f"   {cmd:<10} {h['count']:>6} {h['mean_ms']:>9.2f} {h['p50_ms']:>9.2f} {h['p90_ms']:>9.2f}"
+                      f" {h['p99_ms']:>9.2f} {h['max_ms']:>9.2f}", file=out)
+        if data["calls"]:
+            print("\n🔥 Hot Function Calls", file=out)
+            for name, c in data["calls"].items():
+                print(f"   {name:<28} {c['calls']:>12,} calls {c['total_ms']:>12.1f} ms", file=out)
+        cache = data["metadata_cache"]
+        if cache["hits"] or cache["misses"]:
+            rate = cache["hits"] / (cache["hits"] + cache["misses"])
+            print(f"\n🗃️  Metadata Cache: {cache['hits']:,} hits, {cache['misses']:,} misses ({rate:.0%}),"
+                  f" {cache['size']:,}/{cache['maxsize']:,} entries", file=out)
+
+class Sampler:
+    """ Samples the main thread's stack at a fixed interval and counts collapsed stacks (flamegraph input). """
+
+    def __init__(self, stats=None, interval=SAMPLE_INTERVAL):
+        self.stats = stats  # Samples are skipped while stats.idle (waiting on input()).
+        self.interval = interval
+        self.counts = {}  # "outer;...;inner" -> samples.
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hexplorer-sampler", daemon=True)
+
+    # Function to start sampling.
+    def start(self):
+        self._thread.start()
+
+    # Function to stop sampling and wait for the sampler thread.
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    # Function run by the sampler thread.
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.stats is not None and self.stats.idle:
+                continue
+            frame = sys._current_frames().get(self._target)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                stack = ";".join(reversed(names))
+                self.counts[stack] = self.counts.get(stack, 0) + 1
+
+    # Function to write the samples in collapsed-stack format ("frame;frame;frame count" per line).
+    def write(self, fp):
+        for stack, count in sorted(self.counts.items()):
+            fp.write(f"{stack} {count}\n")
+
+# Function to split leading --stats/--profile flags off the arguments, returning (stats_path, profile_path, rest).
+# A bare flag gives "" (report only) for --stats and PROFILE_DEFAULT for --profile; None means off.
+def parse_flags(args, environ=None):
+    env_stats = (environ if environ is not None else {}).get("HEXPLORER_STATS")
+    stats_path = None if not env_stats else ("" if env_stats == "1" else env_stats)
+    profile_path = None
+    rest = list(args)
+    while rest and rest[0].startswith(("--stats", "--profile")):
+        flag, _, value = rest.pop(0).partition("=")
+        if flag == "--stats":
+            stats_path = value
+        elif flag == "--profile":
+            profile_path = value or PROFILE_DEFAULT
+        else:
+            raise SystemExit(f"hexplorer: unknown option {flag}")
+    return stats_path, profile_path, rest
+
+# Function to turn instrumentation on for this run: install the counters and profilers and report on exit.
+# Returns the Stats object (the caller times commands with start()/stop()) and the remaining arguments.
+def enable(args, environ):
+    stats_path, profile_path, rest = parse_flags(args, environ)
+    stats = Stats()
+    stats.install()
+    profiler = sampler = None
+    if profile_path and profile_path.endswith(COLLAPSED_SUFFIXES):
+        sampler = Sampler(stats)
+        sampler.start()
+    elif profile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    # Function run at exit: stop the profilers, then write and print everything.
+    def finish():
+        stats.stop()  # A subcommand (or a command interrupted by Ctrl+C) still in progress.
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            import pstats
+            print(f"\n📈 Profile Saved To: {profile_path} (top functions by cumulative time)", file=sys.stderr)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+        if sampler is not None:
+            sampler.stop()
+            with open(profile_path, "w", encoding="utf-8") as f:
+                sampler.write(f)
+            print(f"\n📈 Collapsed Stacks Saved To: {profile_path} ({sum(sampler.counts.values())} samples)",
+                  file=sys.stderr)
+        stats.uninstall()
+        if stats_path is not None or profile_path is None:
+            stats.report()
+        if stats_path:
+            with open(stats_path, "w", encoding="utf-8") as f:
+                json.dump(stats.to_dict(), f, indent=2)
+            print(f"\n💾 Stats Saved To: {stats_path}", file=sys.stderr)
+
+    atexit.register(finish)
+    return stats, rest
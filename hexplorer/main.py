@@ -1,14 +1,23 @@
-this script should be run with Python 3.
+# This script should be run with Python 3.
 
 # Import required modules for the script.
 import random  # For generating random numbers (used in random color generation).
-import re      # For regular expression to validate hex color codes.
-import json    # For exporting color data to JSON files.
-import os      # For file and directory operations (e.g., creating folders, setting environment variables). # For converting RGB values to CSS3 color names.
+import os      # For file and directory operations (e.g., creating folders, setting environment variables).
 import sys
 import time
+import importlib  # For loading subcommand modules on demand.
+import atexit  # For flushing background exports on exit.
 import platform
 
+from . import __version__
+from .core import (  # Pure color math, shared with the subcommands and library users.
+    MAX_DEC, get_color_blindness, get_color_metadata, get_random_scheme, get_scheme,
+    hex_to_rgb, is_valid_hex, lum_comp, mix_hex, negative_hex, parse_dec, rgb_to_hex,
+)
+from .color import Color  # Packed color value: parsed once, luminance and contrast computed lazily.
+from .render import Renderer, color_block, grid_lines, set_color_mode, write_lines  # Buffered frame renderer.
+from .tables import contrast_ratio, relative_luminance  # Precomputed per-channel luminance tables.
+
 def ensure_termux_storage():
     """
     Ensures That Termux Has Storage Permission.
@@ -32,29 +41,41 @@ def ensure_termux_storage():
             else:
                 print("✅ Storage Access Granted Successfully.")
 
-__version__ = "1.0.0"
+VERSION = __version__
 
-# Handle version and help flags early
-if len(sys.argv) > 1:
-    if sys.argv[1] in ("--help", "-h"):
-        print(f"""
+# Full help text for `hexplorer --help`.
+HELP_TEXT = f"""
 HEXPLORER - Terminal HEX Color Explorer (v{__version__})
 
 Usage:
   hexplorer             Start The Interactive Color Tool
   hexplorer --help      Show This Help Message
   hexplorer --version   Show Version Info
+  hexplorer --stats     Print Per-Command Latency And Hot-Function Counters On Exit (--stats=FILE Saves JSON)
+  hexplorer --profile   Profile The Session Or Subcommand Into hexplorer.prof (--profile=FILE.collapsed For Flamegraphs)
+  hexplorer batch       Stream Colors From stdin/File To JSONL Or CSV
+  hexplorer gradient    Stream A Multi-Stop Gradient
+  hexplorer index       Build Or Query The Memory-Mapped Color Index
+  hexplorer palette     Extract Dominant-Color Palettes From PNG/PPM Images
+  hexplorer search      Find Every Color Matching Contrast/Hue/Distance Filters
+  hexplorer bench       Run The Benchmark Suite And Compare With A Baseline
+  hexplorer serve       Serve Metadata/Mix/Gradient/Scheme/Color-Blindness As A Local JSON API
+  hexplorer harmony     Harmony Sets For Whole Palettes (Real Hue Rotation, Seeded Random Palettes)
+  hexplorer contrast    WCAG AA/AAA Text/Background Pairs Of A Palette: Passing Pairs, Top-K Or The Full Matrix
+  hexplorer walk        Stream Colors From Index A To B At A Stride, Or Along Hue Or Luminance
+  hexplorer history     Query Visited, Bookmarked And Exported Colors; Import Old Exports
+  hexplorer term        Show The Terminal Color Mode Or Build The 256/16-Color Downsampling Tables
 
 Features:
   • View HEX & RGB colors
   • Mix, Gradient, Color Schemes
   • Export to JSON
   • Simulate Color Blindness
-  • 24-bit Truecolor Terminal Output
+  • 24-bit Truecolor Terminal Output (Nearest 256/16 Colors On Other Terminals)
 
 Interactive Commands (inside the tool):
 
-  n, p, j, i, r, m, mixr, mixi, grad, cs, export, cb, rcs, help, q
+  n, p, j, i, r, m, mixr, mixi, grad, cs, export, cb, grid, rcs, walk, b, hist, help, q
    n       → Move To Next Color
    p       → Move To Previous Color
    j       → Jump To Custom HEX
@@ -65,44 +86,95 @@ Interactive Commands (inside the tool):
    mixi    → Mix With Decimal Index (0 To 16777215)
    grad    → Gradient From Current To Specific HEX
    cs      → Show Color Harmony Scheme For Current Color
-   export  → Export Current Color To JSON (path: /storage/emulated/0/hexplorer.json/filename.json)
+   export  → Export Current Color (folder: $HEXPLORER_EXPORT_DIR, default /storage/emulated/0/hexplorer.json)
    cb      → Color Blindness Simulation Of Current Color
+   grid    → Dense 64x32 Grid Of The Next Colors
    rcs     → Generate Random Color Schemes
+   walk    → Stream Colors From Current To A HEX At A Stride, Or Along Hue/Luminance
+   b       → Bookmark Current Color (Optional Tags)
+   hist    → Show Bookmarks And Recently Visited Colors
    help    → Show This Help Menu
    q       → Quit Or CTRL+C + Enter
-        """)
-        sys.exit(0)
-
-    elif sys.argv[1] in ("--version", "-v"):
-        print(f"hexplorer version {__version__}")
-        sys.exit(0)
-
-VERSION = "1.0.0"
+"""
 
 def print_cli_help():
-    print(f"""
-🎨 Hexplorer v{VERSION} - A Terminal-Based HEX Color Explorer
-
-Usage:
-    hexplorer                  Start interactive color explorer
-    hexplorer --help          Show this help menu
-    hexplorer --version       Show version info
-
-Features:
-    ▪ Explore HEX and Decimal RGB colors
-    ▪ Mix, Generate Gradients, Color Schemes
-    ▪ Simulate Color Blindness
-    ▪ Export JSON color info
-
-Visit: https://github.com/mallikmusaddiq1/hexplorer
-""")
-
-# Define constant for maximum decimal value of a 24-bit color (0xFFFFFF = 16777215).
-MAX_DEC = 16777215  # Represents the total number of possible colors in a 24-bit RGB system.
-
-# Create a folder to store exported JSON files if it doesn't already exist.
-folder_path = "/storage/emulated/0/hexplorer.json"  # Path for storing JSON exports, typically for Android storage.
-os.makedirs(folder_path, exist_ok=True)  # Creates the directory, does nothing if it already exists.
+    print(HELP_TEXT)
+
+# Folder to store exported files (created on the first export, not at import).
+# $HEXPLORER_EXPORT_DIR, or Android shared storage by default (export.py, with its writer thread, loads on first export).
+folder_path = os.path.expanduser(os.environ.get("HEXPLORER_EXPORT_DIR") or "/storage/emulated/0/hexplorer.json")
+
+_exporter = None  # Background export writer, started on the first export.
+
+# Function to make sure the export folder exists (and Termux may write to shared storage) before writing to it.
+def ensure_export_dir():
+    ensure_termux_storage()  # Only does anything inside Termux without storage permission.
+    os.makedirs(folder_path, exist_ok=True)  # Creates the directory, does nothing if it already exists.
+
+# Function to get the background exporter, starting it (and preparing the export folder) on first use.
+def get_exporter():
+    global _exporter
+    if _exporter is None:
+        from .export import Exporter  # Writer thread, only started when something is exported.
+        ensure_export_dir()  # Runs here, in the main thread, since it may prompt for Termux storage permission.
+        _exporter = Exporter(folder_path)
+        atexit.register(finish_exports)  # Queued exports still reach the disk after Ctrl+C.
+    return _exporter
+
+# Function to print exports that failed in the background since the last check; returns how many there were.
+def report_export_errors():
+    failed = _exporter.errors() if _exporter is not None else []
+    for path, error in failed:
+        print(f"❌ Failed to export {path}: {error}")  # Print any errors that occurred during export.
+    return len(failed)
+
+# Function to wait for queued exports before exiting.
+def finish_exports():
+    global _exporter
+    if _exporter is None:
+        return
+    if _exporter.pending():
+        print(f"⏳ Finishing {_exporter.pending()} Pending Export(s)...")
+    _exporter.close()
+    report_export_errors()
+    _exporter = None
+
+_history = None  # Color history database, opened on the first record; False once it failed or is turned off.
+
+# Function to get the history store, opening it on first use (None when HEXPLORER_HISTORY=off or it cannot be opened).
+def get_history():
+    global _history
+    if _history is None:
+        from .history import History, history_disabled  # SQLite store, loaded by the interactive tool only.
+        _history = False
+        if not history_disabled():
+            try:
+                _history = History()
+                atexit.register(finish_history)  # Buffered records still reach the database after Ctrl+C.
+            except Exception as e:
+                print(f"⚠️ Color History Disabled: {e}")  # E.g. a read-only home folder.
+    return _history or None
+
+# Function to record colors in the history (buffered; written in batches).
+def record_history(decs, kind="visit", tags=()):
+    history = get_history()
+    if history is None:
+        return
+    try:
+        for dec in decs:
+            history.record(dec, kind, tags)
+    except Exception as e:
+        print(f"⚠️ Failed to update color history: {e}")
+
+# Function to write buffered history records and close the database before exiting.
+def finish_history():
+    global _history
+    if _history:
+        try:
+            _history.close()
+        except Exception as e:
+            print(f"⚠️ Failed to save color history: {e}")
+    _history = None
 
 # Define lines to be added to the user's .bashrc file to enable true color support in the terminal.
 bashrc_lines = [
@@ -113,126 +185,97 @@ bashrc_lines = [
 # Specify the path to the .bashrc file in the user's home directory.
 bashrc_path = os.path.expanduser("~/.bashrc")  # Expands ~ to the user's home directory path.
 
-try:
-    # Check if .bashrc exists and read its contents.
-    if os.path.exists(bashrc_path):  # Check if the .bashrc file exists.
-        with open(bashrc_path, "r") as f:  # Open the file in read mode.
-            existing = f.readlines()  # Read all lines into a list.
-    else:
-        existing = []  # If the file doesn't exist, initialize an empty list.
-
-    # Append the color support lines to .bashrc if they are not already present.
-    with open(bashrc_path, "a") as f:  # Open the file in append mode.
-        for line in bashrc_lines:  # Iterate through the lines to add.
-            if line not in existing:  # Check if the line is not already in the file.
-                f.write(line)  # Append the line to the .bashrc file.
-
-    # Set environment variables for the current script session to enable true color support.
-    os.environ["COLORTERM"] = "truecolor"  # Set COLORTERM environment variable.
-    os.environ["TERM"] = "xterm-256color"  # Set TERM environment variable.
-    print("✅ Variables Exported And Added to .bashrc")  # Confirm successful addition.
-
-    # Display the current values of the environment variables to confirm they are active.
+# Function to detect the terminal color mode for the interactive session and make swatches use it.
+# Termux keeps the classic .bashrc setup (it renders 24-bit color); elsewhere nothing is forced, so tmux and
+# serial consoles get the nearest 256- or 16-color entries instead of broken 24-bit escapes.
+def setup_terminal():
+    from .termcolor import detect_color_mode  # Loaded only by the interactive tool.
+    mode = detect_color_mode()
+    if "com.termux" in os.environ.get("PREFIX", "") and not os.environ.get("HEXPLORER_COLOR"):
+        try:
+            # Check if .bashrc exists and read its contents.
+            if os.path.exists(bashrc_path):  # Check if the .bashrc file exists.
+                with open(bashrc_path, "r") as f:  # Open the file in read mode.
+                    existing = f.readlines()  # Read all lines into a list.
+            else:
+                existing = []  # If the file doesn't exist, initialize an empty list.
+
+            # Append the color support lines to .bashrc if they are not already present.
+            with open(bashrc_path, "a") as f:  # Open the file in append mode.
+                for line in bashrc_lines:  # Iterate through the lines to add.
+                    if line not in existing:  # Check if the line is not already in the file.
+                        f.write(line)  # Append the line to the .bashrc file.
+
+            # Set environment variables for the current script session to enable true color support.
+            os.environ["COLORTERM"] = "truecolor"  # Set COLORTERM environment variable.
+            os.environ["TERM"] = "xterm-256color"  # Set TERM environment variable.
+            print("✅ Variables Exported And Added to .bashrc")  # Confirm successful addition.
+            mode = "truecolor"
+        except Exception as e:
+            print(f"❌ Error: {e}")  # Print any errors that occur during .bashrc modification.
+
+    # Display the detected mode and the current values of the environment variables.
     print(f"🟢 COLORTERM = {os.environ.get('COLORTERM')}")  # Show COLORTERM value.
     print(f"🟢 TERM = {os.environ.get('TERM')}")  # Show TERM value.
-
-except Exception as e:
-    print(f"❌ Error: {e}")  # Print any errors that occur during .bashrc modification.
-
-# Function to convert a 6-digit hex color code to RGB values.
-def hex_to_rgb(hex_code):
-    r = int(hex_code[0:2], 16)  # Extract and convert red component (first 2 chars) to integer.
-    g = int(hex_code[2:4], 16)  # Extract and convert green component (next 2 chars).
-    b = int(hex_code[4:6], 16)  # Extract and convert blue component (last 2 chars).
-    return r, g, b  # Return RGB values as a tuple.
-
-# Function to convert RGB values back to a 6-digit hex color code.
-def rgb_to_hex(r, g, b):
-    return f"{r:02X}{g:02X}{b:02X}"  # Format RGB values as a 6-digit hex string (uppercase).
-
-# Function to validate if a string is a valid 6-digit hexadecimal color code.
-def is_valid_hex(h):
-    return re.fullmatch(r"[0-9A-Fa-f]{6}", h) is not None  # Check if the string matches the pattern for a 6-digit hex code.
-
-# Function to compute luminance component for a single color channel (used in luminance calculation).
-def lum_comp(c):
-    return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4  # Apply luminance formula based on sRGB standard.
-
-# Function to gather metadata about a color, including hex, RGB, luminance, contrast, and name.
-def get_color_metadata(hex_code, dec_index=None):
-    r, g, b = hex_to_rgb(hex_code)  # Convert hex to RGB.
-    rl, gl, bl = r / 255, g / 255, b / 255  # Normalize RGB values to range [0, 1].
-    # Calculate relative luminance using the sRGB luminance formula.
-    l = 0.2126 * lum_comp(rl) + 0.7152 * lum_comp(gl) + 0.0722 * lum_comp(bl)
-    contrast = round((1 + 0.05) / (l + 0.05), 2)  # Calculate contrast ratio against white.
-
-    try:
-        color_name = webcolors.rgb_to_name((r, g, b))  # Try to get the color name for the RGB values.
-    except ValueError:
-        color_name = "Unknown"  # If no name is found, use "Unknown".
-
-    return {
-        "hex": f"#{hex_code}",  # Return hex code with # prefix.
-        "rgb": {"r": r, "g": g, "b": b},  # Return RGB values as a dictionary.
-        "luminance": round(l, 6),  # Return rounded luminance value.
-        "contrast_vs_white": f"{contrast} : 1",  # Return contrast ratio formatted as a string.
-        "decimal_index": dec_index if dec_index is not None else int(hex_code, 16),  # Return decimal index or convert hex to decimal.
-        """
-    }
+    if mode == "truecolor":
+        print("🎨 Color Mode: 24-bit Truecolor")
+    else:
+        print(f"🎨 Color Mode: {mode} Colors (Nearest Palette Entries; Set HEXPLORER_COLOR=truecolor To Override)")
+    set_color_mode(mode)  # Swatches and grids use the nearest palette entry below truecolor.
+    return mode
 
 # Function to display a colored block in the terminal for a given hex color.
 def print_color_block(hex_code):
-    r, g, b = hex_to_rgb(hex_code)  # Convert hex to RGB.
-    print(f"                  \033[48;2;{r};{g};{b}m        \033[0m #{hex_code}")  # Print a colored block using ANSI escape codes.
+    print(color_block(hex_code))  # Print a colored block using ANSI escape codes.
+
+# Function to build the technical information lines for a color (RGB, luminance, contrast).
+def tech_info_lines(color):
+    color = Color.parse(color)  # Accepts a Color or a hex code.
+    r, g, b = color.rgb  # RGB from the packed value.
+    l = color.luminance  # Relative luminance from the precomputed channel tables.
+    contrast = color.contrast  # Contrast ratio against white.
+    index = color.value  # Decimal index.
+    return [
+        f"🔢 Mixed Color Index  : {index} / {MAX_DEC}",  # Show the decimal index of the color.
+        "🧪 Technical Info:",  # Header for technical details.
+        f"   RGB              : {r}, {g}, {b}",  # Display RGB values.
+        f"   Luminance        : {l:.6f}",  # Display luminance rounded to 6 decimals.
+        f"   Contrast vs White: {contrast:.2f} : 1",  # Display contrast ratio against white.
+        f"   Contrast vs Black: {contrast_ratio(l, 0.0):.2f} : 1",  # Display contrast ratio against black.
+    ]
 
 # Function to display technical information about a color (RGB, luminance, contrast).
 def show_tech_info(hex_code):
-    r, g, b = hex_to_rgb(hex_code)  # Convert hex to RGB.
-    rl, gl, bl = r / 255, g / 255, b / 255  # Normalize RGB values.
-    # Calculate luminance using the sRGB formula.
-    l = 0.2126 * lum_comp(rl) + 0.7152 * lum_comp(gl) + 0.0722 * lum_comp(bl)
-    contrast = (1 + 0.05) / (l + 0.05)  # Calculate contrast ratio against white.
-    index = int(hex_code, 16)  # Convert hex to decimal index.
-
-    print(f"🔢 Mixed Color Index  : {index} / {MAX_DEC}")  # Show the decimal index of the color.
-    print("🧪 Technical Info:")  # Header for technical details.
-    print(f"   RGB              : {r}, {g}, {b}")  # Display RGB values.
-    print(f"   Luminance        : {l:.6f}")  # Display luminance rounded to 6 decimals.
-    print(f"   Contrast vs White: {contrast:.2f} : 1")  # Display contrast ratio against white.
-
-# Function to export color data to a JSON file.
-def export_json(filename, data):
-    path = f"{folder_path}/{filename}"  # Construct the full file path for the JSON file.
+    write_lines(tech_info_lines(hex_code))  # One write for the whole block.
+
+# Function to queue an export in the background; `data` is a dict or a callable building one on the writer thread.
+def export_json(filename, data, kind="color"):
     try:
-        with open(path, "w") as f:  # Open the file in write mode.
-            json.dump(data, f, indent=4)  # Write the data as formatted JSON with indentation.
-        print(f"✅ Exported To: {path}")  # Confirm successful export.
+        path = get_exporter().submit(os.path.splitext(filename)[0], data, kind)  # Returns at once; written in the background.
+        print(f"📤 Exporting To: {path}")  # Confirm the queued export.
     except Exception as e:
-        print(f"❌ Failed to export JSON: {e}")  # Print any errors that occur during export.
+        print(f"❌ Failed to export: {e}")  # Print any errors that occur while queueing.
 
-# Function to export metadata for a single color to a JSON file.
+# Function to export metadata for a single color.
 def export_color(hex_code, dec_index):
-    data = get_color_metadata(hex_code, dec_index)  # Get metadata for the color.
-    export_json(f"hexplorer_{hex_code}.json", data)  # Export the metadata to a JSON file.
+    export_json(f"hexplorer_{hex_code}.json", lambda: get_color_metadata(hex_code, dec_index))  # Metadata for the color.
+    record_history([int(hex_code, 16)], "export")  # Saved colors can be queried later (`hexplorer history`).
 
-# Function to export metadata for a color mix (two input colors and the result) to a JSON file.
+# Function to export metadata for a color mix (two input colors and the result).
 def export_mix(hex1, hex2, mixed):
-    data = {
+    export_json(f"hexplorer_mix_{hex1}_{hex2}.json", lambda: {
         "mix_input_1": get_color_metadata(hex1),  # Metadata for the first input color.
         "mix_input_2": get_color_metadata(hex2),  # Metadata for the second input color.
         "mixed_result": get_color_metadata(mixed)  # Metadata for the mixed color.
-    }
-    export_json(f"hexplorer_mix_{hex1}_{hex2}.json", data)  # Export the mix data to a JSON file.
-
-# Function to export a gradient (list of colors between two hex codes) to a JSON file.
-def export_gradient(hex1, hex2, steps_list, steps):
-    data = {
-        "gradient_from": f"#{hex1}",  # Starting hex color.
-        "gradient_to": f"#{hex2}",  # Ending hex color.
-        "steps": steps + 1,  # Number of steps in the gradient (including start and end).
-        "colors": [get_color_metadata(h) for h in steps_list]  # Metadata for each color in the gradient.
-    }
-    export_json(f"hexplorer_gradient_{hex1}{hex2}{steps}.json", data)  # Export the gradient data to a JSON file.
+    }, "mix")
+    record_history([int(hex1, 16), int(hex2, 16), int(mixed, 16)], "export")
+
+# Function to export a gradient, streaming one chunk of steps at a time on the writer thread.
+def export_gradient(stops, steps, space="srgb"):
+    from .gradient import gradient_document  # Streaming gradient engine, loaded on first use.
+    export_json(f"hexplorer_gradient_{''.join(stops)}{steps}.json",
+                lambda: gradient_document(stops, steps, space), "gradient")
+    record_history([int(code, 16) for code in stops], "export")  # The stops; the steps follow from them.
 
 # Function to prompt the user for a valid starting 6-digit hex color code.
 def ask_start_hex():
@@ -244,149 +287,169 @@ def ask_start_hex():
 
 # Function to mix two colors by averaging their RGB components.
 def mix_colors(hex1, hex2):
-    r1, g1, b1 = hex_to_rgb(hex1)  # Convert first hex to RGB.
-    r2, g2, b2 = hex_to_rgb(hex2)  # Convert second hex to RGB.
-    rm, gm, bm = (r1 + r2) // 2, (g1 + g2) // 2, (b1 + b2) // 2  # Average the RGB components.
-    mixed = f"{rm:02X}{gm:02X}{bm:02X}"  # Convert averaged RGB back to hex.
-
-    print(f"\n🔗 Mixing #{hex1} + #{hex2} => #{mixed}")  # Display the mixing operation.
-    print_color_block(hex1)  # Show the first color block.
-    print_color_block(hex2)  # Show the second color block.
-    print("➡️ Result:")  # Header for the mixed result.
-    print_color_block(mixed)  # Show the mixed color block.
-
-    neg_hex = f"{MAX_DEC - int(mixed, 16):06X}"  # Calculate the negative (complementary) color.
-    print(f"🔄 Negative Color     : #{neg_hex}")  # Display the negative color.
-    print_color_block(neg_hex)  # Show the negative color block.
-
-    show_tech_info(mixed)  # Display technical info for the mixed color.
+    mixed_color = Color.from_hex(hex1).mix(hex2)  # Average the RGB components; each input is parsed once.
+    mixed = mixed_color.hex
+    neg_hex = mixed_color.negative().hex  # Calculate the negative (complementary) color.
+    write_lines([
+        f"\n🔗 Mixing #{hex1} + #{hex2} => #{mixed}",  # Display the mixing operation.
+        color_block(hex1),  # Show the first color block.
+        color_block(hex2),  # Show the second color block.
+        "➡️ Result:",  # Header for the mixed result.
+        color_block(mixed),  # Show the mixed color block.
+        f"🔄 Negative Color     : #{neg_hex}",  # Display the negative color.
+        color_block(neg_hex),  # Show the negative color block.
+    ] + tech_info_lines(mixed_color))  # Display technical info for the mixed color.
     export_mix(hex1, hex2, mixed)  # Export the mix data to a JSON file.
 
-# Function to generate a gradient between two hex colors with a specified number of steps.
-def generate_gradient(hex1, hex2, steps=5):
-    r1, g1, b1 = hex_to_rgb(hex1)  # Convert first hex to RGB.
-    r2, g2, b2 = hex_to_rgb(hex2)  # Convert second hex to RGB.
-    steps_list = []  # List to store the hex codes of the gradient steps.
+# Function to generate a gradient from hex1 through one or more comma-separated stops in hex2.
+def generate_gradient(hex1, hex2, steps=5, space="srgb"):
+    from .gradient import iter_gradient  # Streaming gradient engine, loaded on first use.
+    stops = [hex1] + [h.strip().lstrip("#").upper() for h in hex2.split(",")]  # All gradient stops, in order.
 
-    print(f"\n🌈 Gradient: #{hex1} ➡️ #{hex2} ({steps} steps)")  # Display gradient information.
-    for i in range(steps + 1):  # Iterate through the number of steps (including start and end).
-        r = int(r1 + (r2 - r1) * i / steps)  # Interpolate red component.
-        g = int(g1 + (g2 - g1) * i / steps)  # Interpolate green component.
-        b = int(b1 + (b2 - b1) * i / steps)  # Interpolate blue component.
-        code = f"{r:02X}{g:02X}{b:02X}"  # Convert interpolated RGB to hex.
-        print_color_block(code)  # Display the color block for this step.
-        steps_list.append(code)  # Add the hex code to the steps list.
+    print(f"\n🌈 Gradient: #{' ➡️ #'.join(stops)} ({steps} steps, {space})")  # Display gradient information.
+    write_lines(color_block(code) for code in iter_gradient(stops, steps, space))  # Steps are streamed in chunks.
 
-    export_gradient(hex1, hex2, steps_list, steps)  # Export the gradient data to a JSON file.
+    export_gradient(stops, steps, space)  # Export the gradient data to a JSON file.
 
 # Function to generate a color scheme (complementary, analogous, triadic, tetradic) for a given hex color.
 def generate_scheme(hex_code):
-    print(f"\n🎨 Generating color scheme for #{hex_code}")  # Display the color being used.
-    print_color_block(hex_code)  # Show the original color block.
-
-    r, g, b = hex_to_rgb(hex_code)  # Convert hex to RGB.
-    schemes = {
-        "Complementary": (255 - r, 255 - g, 255 - b),  # Opposite color on the color wheel.
-        "Analogous 1": (r, min(g + 30, 255), b),  # Slightly shift green component up for similar hue.
-        "Analogous 2": (r, max(g - 30, 0), b),  # Slightly shift green component down for similar hue.
-        "Triadic 1": (b, r, g),  # Rotate RGB components for triadic harmony.
-        "Triadic 2": (g, b, r),  # Rotate RGB components for triadic harmony.
-        "Tetradic 1": (255 - r, 255 - g, b),  # Complementary + analogous for rectangular harmony.
-        "Tetradic 2": (r, g, 255 - b)  # Complementary + analogous for rectangular harmony.
-    }
+    lines = [f"\n🎨 Generating color scheme for #{hex_code}", color_block(hex_code)]  # The color being used.
+
+    schemes = get_scheme(hex_code)  # Compute the harmony colors.
 
     for name, (r2, g2, b2) in schemes.items():  # Iterate through the schemes.
         h = rgb_to_hex(r2, g2, b2)  # Convert scheme RGB to hex.
-        print(f"{name} ➡️ #{h}")  # Display the scheme name and hex code.
-        print_color_block(h)  # Show the color block for the scheme.
+        lines.append(f"{name} ➡️ #{h}")  # Display the scheme name and hex code.
+        lines.append(color_block(h))  # Show the color block for the scheme.
+    write_lines(lines)  # One write for the whole scheme.
 
 # Function to simulate how a color appears under different types of color blindness.
 def simulate_color_blindness(hex_code):
     """ Simulate common color blindness types on the input color.
         Returns a dict with types and simulated hex colors. """
-    # Define transformation matrices for color blindness simulation (approximations from literature).
-    cb_matrices = {
-        "Protanopia": [  # Red blindness (L-cone deficiency).
-            [0.56667, 0.43333, 0],
-            [0.55833, 0.44167, 0],
-            [0, 0.24167, 0.75833]
-        ],
-        "Deuteranopia": [  # Green blindness (M-cone deficiency).
-            [0.625, 0.375, 0],
-            [0.70, 0.30, 0],
-            [0, 0.30, 0.70]
-        ],
-        "Tritanopia": [  # Blue blindness (S-cone deficiency).
-            [0.95, 0.05, 0],
-            [0, 0.43333, 0.56667],
-            [0, 0.475, 0.525]
-        ],
-    }
-
-    r, g, b = hex_to_rgb(hex_code)  # Convert hex to RGB.
-
-    # Helper function to apply a color blindness matrix to RGB values.
-    def apply_matrix(r, g, b, m):
-        rr = r * m[0][0] + g * m[0][1] + b * m[0][2]  # Apply matrix for red component.
-        gg = r * m[1][0] + g * m[1][1] + b * m[1][2]  # Apply matrix for green component.
-        bb = r * m[2][0] + g * m[2][1] + b * m[2][2]  # Apply matrix for blue component.
-        # Clamp the resulting RGB values to the valid range (0-255).
-        rr = max(0, min(255, int(rr)))
-        gg = max(0, min(255, int(gg)))
-        bb = max(0, min(255, int(bb)))
-        return rr, gg, bb
-
-    results = {}  # Dictionary to store simulated hex codes for each color blindness type.
-    for cb_type, matrix in cb_matrices.items():  # Iterate through each color blindness type.
-        rr, gg, bb = apply_matrix(r, g, b, matrix)  # Apply the transformation matrix.
-        results[cb_type] = rgb_to_hex(rr, gg, bb)  # Convert transformed RGB to hex.
+    results = get_color_blindness(hex_code)  # Simulated hex code for each color blindness type.
 
     # Display the simulation results with color blocks.
-    print(f"\n🧩 Color Blindness Simulation For #{hex_code}:")
+    lines = [f"\n🧩 Color Blindness Simulation For #{hex_code}:"]
     for cb_type, cb_hex in results.items():
-        print(f"{cb_type:<12} ➡️ #{cb_hex} ", end="")  # Display the color blindness type and hex code.
-        print_color_block(cb_hex)  # Show the simulated color block.
+        lines.append(f"{cb_type:<12} ➡️ #{cb_hex} {color_block(cb_hex)}")  # Type, hex code and simulated block.
+    write_lines(lines)
     return results  # Return the dictionary of simulated colors.
 
+_rng = None  # Session random generator for `rcs`, created on first use.
+
+# Function to get the session random generator, seeded from $HEXPLORER_SEED when set (reproducible sessions).
+def session_rng():
+    global _rng
+    if _rng is None:
+        seed = os.environ.get("HEXPLORER_SEED")
+        _rng = random.Random(int(seed) if seed and seed.isdigit() else seed)
+    return _rng
+
 # Function to generate a random color and its associated color schemes.
 def generate_random_scheme():
     """ Generate a random base color and multiple color schemes from it. """
-    base_dec = random.randint(0, MAX_DEC)  # Generate a random decimal index for the base color.
+    from .harmony import random_bases  # Seeded random palettes, shared with `hexplorer harmony --random`.
+    seed = session_rng().randrange(1 << 32)  # Every draw has its own seed, so it can be reproduced later.
+    base_dec = random_bases(seed, 0, 1)[0]  # The first color of the seeded random palette.
     base_hex = f"{base_dec:06X}"  # Convert to 6-digit hex code.
-    print(f"\n🎲 Random Base Color: #{base_hex}")  # Display the random base color.
-    print_color_block(base_hex)  # Show the base color block.
-
-    r, g, b = hex_to_rgb(base_hex)  # Convert base hex to RGB.
-
-    # Generate various color schemes based on the random base color.
-    schemes = {}
-
-    # Complementary: Opposite color on the color wheel.
-    comp = (255 - r, 255 - g, 255 - b)
-    schemes["Complementary"] = comp
-
-    # Helper function to clamp RGB values to the valid range (0-255).
-    def clamp_color(val): return max(0, min(255, val))
-    # Analogous: Adjust green component by ±30 for similar hues.
-    schemes["Analogous 1"] = (r, clamp_color(g + 30), b)
-    schemes["Analogous 2"] = (r, clamp_color(g - 30), b)
+    schemes = get_random_scheme(base_hex)  # Generate various color schemes based on the random base color.
 
-    # Triadic: Rotate RGB components for triadic harmony.
-    schemes["Triadic 1"] = (b, r, g)
-    schemes["Triadic 2"] = (g, b, r)
-
-    # Tetradic: Complementary color + analogous shift.
-    schemes["Tetradic 1"] = comp
-    schemes["Tetradic 2"] = (comp[0], clamp_color(comp[1] + 30), comp[2])
-
-    print("\n🎨 Random Color Schemes:")  # Header for the schemes.
+    lines = [f"\n🎲 Random Base Color: #{base_hex} (Seed {seed})", color_block(base_hex)]  # The random base color.
+    lines.append("\n🎨 Random Color Schemes:")  # Header for the schemes.
     for name, (rr, gg, bb) in schemes.items():  # Iterate through the schemes.
         h = rgb_to_hex(rr, gg, bb)  # Convert scheme RGB to hex.
-        print(f"{name:<12} ➡️ #{h}")  # Display the scheme name and hex code.
-        print_color_block(h)  # Show the color block for the scheme.
+        lines.append(f"{name:<12} ➡️ #{h}")  # Display the scheme name and hex code.
+        lines.append(color_block(h))  # Show the color block for the scheme.
+    lines.append(f"💡 Hue-Rotated Harmonies: hexplorer harmony --random 1 --seed {seed}")
+    write_lines(lines)
 
     return base_hex, schemes  # Return the base hex and the schemes dictionary.
 
+# Function to display a dense grid of neighbouring colors starting at the given index.
+def show_grid(start_dec, cols=64, rows=32):
+    print(f"\n🧱 Color Grid: #{start_dec:06X} (Index {start_dec}) Onward, {cols}x{rows}, Row By Row")
+    write_lines(grid_lines(start_dec, cols, rows))  # Whole grid in a single write.
+
+# Function to stream a walk from the current color (index range, hue circle or luminance ramp) as compact rows.
+# Returns the last color walked, which becomes the current color.
+def walk_colors(current_dec):
+    from .walk import AXES, DEFAULT_STRIDES, render_window, walk_path, windows  # Walk engine, loaded on first use.
+    axis = input(f"Walk Along [{'/'.join(AXES)}] (default index): ").strip().lower() or "index"
+    if axis not in AXES:
+        print("❌ Unknown axis.")
+        return current_dec
+    hint = {"index": "HEX or Decimal Index", "hue": "HEX, Empty For A Full Turn", "luminance": "HEX, Empty For 0 → 1"}[axis]
+    end = input(f"Walk To ({hint}): ").strip()
+    try:
+        end = parse_dec(end) if end else None
+    except ValueError:
+        print("❌ Invalid color entered.")
+        return current_dec
+    if axis == "index" and end is None:
+        print("❌ An index walk needs an end color.")
+        return current_dec
+    stride = input(f"Stride (default {DEFAULT_STRIDES[axis]}): ").strip()
+    try:
+        stride = float(stride) if stride else DEFAULT_STRIDES[axis]
+    except ValueError:
+        stride = DEFAULT_STRIDES[axis]
+    if stride <= 0 or (axis == "index" and stride != int(stride)):
+        print("❌ Stride must be positive (and whole for index walks).")
+        return current_dec
+    path = walk_path(axis, current_dec, end, stride)
+    print(f"\n🚶 Walking From #{current_dec:06X} Along {axis} (Stride {stride:g}); Ctrl+C Stops")
+    last = current_dec
+    try:
+        for decs in windows(path, 256):  # Small windows: rows appear at once and Ctrl+C stops quickly.
+            sys.stdout.write(render_window("text", decs))  # One write per window of rows.
+            last = decs[-1]
+        sys.stdout.flush()
+    except KeyboardInterrupt:
+        print("\n⏹️ Walk Stopped.")
+    return last
+
+# Function to bookmark a color, with optional comma-separated tags.
+def bookmark_color(dec):
+    history = get_history()
+    if history is None:
+        print("❌ Color History Is Turned Off (HEXPLORER_HISTORY=off) Or Unavailable.")
+        return
+    tags = [t.strip() for t in input("Tags (Comma-Separated, Optional): ").split(",") if t.strip()]
+    try:
+        history.bookmark(dec, tags)
+        print(f"★ Bookmarked #{dec:06X}" + (f" [{', '.join(tags)}]" if tags else ""))
+    except Exception as e:
+        print(f"❌ Failed to bookmark: {e}")
+
+# Function to show the latest bookmarks and recently visited colors.
+def show_history(limit=10):
+    history = get_history()
+    if history is None:
+        print("❌ Color History Is Turned Off (HEXPLORER_HISTORY=off) Or Unavailable.")
+        return
+    from .history import history_line
+    lines = ["\n★ Bookmarks (Latest First):"]
+    lines += [history_line(record) for record in history.query("bookmarks", "recent", limit=limit)] or ["   (none)"]
+    lines.append("🕘 Recently Visited:")
+    lines += [history_line(record) for record in history.query("visited", "recent", limit=limit)] or ["   (none)"]
+    lines.append("💡 More Queries: hexplorer history list --saved --sort contrast | --bookmarks --near-hue DEGREES")
+    write_lines(lines)
+
+# Function to build the main panel for the current color.
+def panel_lines(current_dec):
+    current = Color(current_dec)  # The current color, without a hex round trip.
+    current_hex = current.hex  # Convert current decimal index to hex.
+    neg_hex = current.negative().hex  # Calculate the negative (complementary) color.
+    return [
+        "",
+        f"🎨 Current Color   : #{current_hex}",  # Display the current color.
+        color_block(current_hex),  # Show the current color block.
+        f"🔄 Negative Color  : #{neg_hex}",  # Display the negative color.
+        color_block(neg_hex),  # Show the negative color block.
+        f"🔢 Decimal Index   : {current_dec} / {MAX_DEC}",  # Show the current decimal index.
+    ] + tech_info_lines(current) + [""]  # Display technical info for the current color.
+
 # Function to display the help menu with available commands.
 def show_help():
     print("\n▶ Available Commands:")  # Header for the command list.
@@ -401,34 +464,58 @@ def show_help():
     print("   mixi    → Mix With Decimal Index (0 To 16777215)")  # Mix the current color with a color from a decimal index.
     print("   grad    → Gradient From Current To Specific HEX")  # Generate a gradient from the current color to another hex.
     print("   cs      → Show Color Harmony Scheme For Current Color")  # Generate a color scheme for the current color.
-    print("   export  → Export Current Color To JSON (path: /storage/emulated/0/hexplorer.json/filename.json)")  # Export current color data to JSON.
+    print(f"   export  → Export Current Color (path: {folder_path}/filename.json)")  # Export current color data.
     print("   cb      → Color Blindness Simulation Of Current Color")  # Simulate color blindness for the current color.
+    print("   grid    → Dense 64x32 Grid Of The Next Colors")  # Show a block of neighbouring indexes.
     print("   rcs     → Generate Random Color Schemes")  # Generate a random color and its schemes.
+    print("   walk    → Stream Colors From Current To A HEX At A Stride, Or Along Hue/Luminance")  # Walk a range of colors.
+    print("   b       → Bookmark Current Color (Optional Tags)")  # Bookmark the current color in the history.
+    print("   hist    → Show Bookmarks And Recently Visited Colors")  # Show the color history.
     print("   help    → Show This Help Menu")  # Display this help menu.
     print("   q       → Quit Or CTRL+C + Enter")  # Exit the program.
 
+# Subcommands handled by their own modules: name -> (module, entry function).
+SUBCOMMANDS = {
+    "batch": ("batch", "run_batch"),  # Stream colors from stdin/file to JSONL or CSV.
+    "index": ("index", "run_index"),  # Build or query the memory-mapped color index.
+    "gradient": ("gradient", "run_gradient"),  # Stream a multi-stop gradient.
+    "palette": ("palette", "run_palette"),  # Extract dominant-color palettes from images.
+    "search": ("search", "run_search"),  # Find every color matching luminance, contrast, hue and distance filters.
+    "bench": ("bench", "run_bench"),  # Run the micro and macro benchmark suite.
+    "serve": ("server", "run_serve"),  # Answer JSON color requests over a local socket.
+    "harmony": ("harmony", "run_harmony"),  # Harmony sets for whole palettes.
+    "contrast": ("contrast", "run_contrast"),  # WCAG contrast pairs of a palette: passing pairs, top-k or the matrix.
+    "walk": ("walk", "run_walk"),  # Stream colors along an index range, hue circle or luminance ramp.
+    "history": ("history", "run_history"),  # Query the color history and bookmarks.
+    "term": ("termcolor", "run_term"),  # Show the terminal color mode or build the downsampling tables.
+}
+
+# Interactive commands, in prompt order.
+COMMANDS = ("n", "p", "j", "i", "r", "m", "mixr", "mixi", "grad", "cs", "export", "cb", "grid", "rcs", "walk", "b", "hist", "help", "q")
+
 # Main function to run the interactive Hexplorer tool.
 def main():
-    if len(sys.argv) > 1 and sys.argv[1] in ("--help", "-h"):
-        print("""
-HEXPLORER - Terminal HEX Color Explorer
-
-Usage:
-  hexplorer           Start the interactive color tool
-  hexplorer --help    Show this help message
-
-Features:
-  • View HEX & RGB colors
-  • Mix, Gradient, Color Schemes
-  • Export to JSON
-  • Simulate Color Blindness
-  • 24-bit Truecolor Terminal Output
-
-Interactive Commands (Inside The Tool):
-  n, p, j, i, r, m, mixr, mixi, grad, cs, export, cb, rcs, help, q
-        """)
+    args = sys.argv[1:]
+    stats = None  # Latency instrumentation, only loaded (and patched in) with --stats/--profile or $HEXPLORER_STATS.
+    if (args and args[0].startswith(("--stats", "--profile"))) or os.environ.get("HEXPLORER_STATS"):
+        from .instrument import enable
+        stats, args = enable(args, os.environ)  # Reports on exit.
+
+    if args and args[0] in SUBCOMMANDS:  # Non-interactive subcommands.
+        module_name, func_name = SUBCOMMANDS[args[0]]
+        module = importlib.import_module(f".{module_name}", __package__)  # Imported only when used.
+        if stats is not None:
+            stats.start(args[0])  # The whole subcommand counts as one command.
+        sys.exit(getattr(module, func_name)(args[1:]))
+
+    if args and args[0] in ("--help", "-h"):  # Handle help flag.
+        print_cli_help()
+        sys.exit(0)
+    if args and args[0] in ("--version", "-v"):  # Handle version flag.
+        print(f"hexplorer version {__version__}")
         sys.exit(0)
 
+    setup_terminal()  # Detect the color mode for the interactive session.
     print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")  # Display a decorative header.
     print("\n📘 Welcome To HEXPLORER - A Tool To Explore Colors By HEX And Decimal")  # Welcome message.
     print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")  # Another decorative header.
@@ -438,18 +525,24 @@ Interactive Commands (Inside The Tool):
     print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")  # Separator.
     current_dec = ask_start_hex()  # Prompt the user for a starting hex color and convert to decimal.
 
+    renderer = Renderer()  # Draws the panel in one write and patches it in place on n/p/r.
+    in_place = False  # True when the last command printed nothing below the prompt.
+    visited = None  # Last color recorded in the history.
+
     while True:  # Main loop for user interaction.
         current_hex = f"{current_dec:06X}"  # Convert current decimal index to hex.
-        neg_hex = f"{MAX_DEC - current_dec:06X}"  # Calculate the negative (complementary) color.
-
-        print(f"\n🎨 Current Color   : #{current_hex}")  # Display the current color.
-        print_color_block(current_hex)  # Show the current color block.
-        print(f"🔄 Negative Color  : #{neg_hex}")  # Display the negative color.
-        print_color_block(neg_hex)  # Show the negative color block.
-        print(f"🔢 Decimal Index   : {current_dec} / {MAX_DEC}")  # Show the current decimal index.
-        show_tech_info(current_hex)  # Display technical info for the current color.
-
-        cmd = input("\nType [n/p/j/i/r/m/mixr/mixi/name/grad/cs/export/cb/rcs/help/q]: ").strip().lower()  # Prompt for a command.
+        in_place = in_place and not report_export_errors()  # Background export failures are printed first.
+        renderer.draw(panel_lines(current_dec), in_place)  # Show the current color panel.
+        if current_dec != visited:
+            record_history([current_dec])  # Buffered; written in batches.
+            visited = current_dec
+        if stats is not None:
+            stats.stop()  # The previous command ends once its output and the new panel are on screen.
+
+        cmd = renderer.input(f"Type [{'/'.join(COMMANDS)}]: ").strip().lower()  # Prompt for a command.
+        in_place = cmd in ("n", "p", "r")  # Pure navigation: the old panel is still right above the prompt.
+        if stats is not None:
+            stats.start(cmd if cmd in COMMANDS else "unknown")
 
         if cmd == "n":  # Move to the next color.
             current_dec = min(current_dec + 1, MAX_DEC)  # Increment index, but don't exceed MAX_DEC.
@@ -481,16 +574,19 @@ Interactive Commands (Inside The Tool):
             mix_colors(current_hex, rand_hex)  # Mix the colors.
         elif cmd == "mixi":  # Mix with a color from a decimal index.
             idx2 = input("Enter Decimal Index To Mix (0 To 16777215): ").strip()  # Prompt for index.
-            if idx2.isdigit():  # Check if input is a valid number.
+            if idx2.isdigit() and int(idx2) <= MAX_DEC:  # Check if input is a valid number within range.
                 mix_colors(current_hex, f"{int(idx2):06X}")  # Mix with the specified index color.
             else:
                 print("❌ Invalid index entered.")  # Display error for invalid input.
         elif cmd == "grad":  # Generate a gradient to another hex color.
-            hx2 = input("Second HEX For Gradient (Without #, e.g., FF0000): ").strip().lstrip("#")  # Prompt for second hex.
-            if is_valid_hex(hx2):  # Validate the input.
+            hx2 = input("Next HEX Stop(s) For Gradient (Without #, e.g., FF0000 or FF0000,0000FF): ").strip()  # Prompt for stops.
+            if all(is_valid_hex(h.strip().lstrip("#")) for h in hx2.split(",")):  # Validate every stop.
                 steps = input("Steps (default 5): ").strip()  # Prompt for number of steps.
-                steps = int(steps) if steps.isdigit() else 5  # Use default of 5 if input is invalid.
-                generate_gradient(current_hex, hx2.upper(), steps)  # Generate the gradient.
+                steps = int(steps) if steps.isdigit() and int(steps) > 0 else 5  # Use default of 5 if input is invalid.
+                space = input("Blend In [srgb/linear/oklab] (default srgb): ").strip().lower() or "srgb"  # Interpolation space.
+                if space not in ("srgb", "linear", "oklab"):
+                    space = "srgb"  # Fall back to plain sRGB blending.
+                generate_gradient(current_hex, hx2.upper(), steps, space)  # Generate the gradient.
             else:
                 print("❌ Invalid HEX entered.")  # Display error for invalid input.
         elif cmd == "cs":  # Generate a color scheme.
@@ -499,11 +595,21 @@ Interactive Commands (Inside The Tool):
             export_color(current_hex, current_dec)  # Export the current color data.
         elif cmd == "cb":  # Simulate color blindness.
             simulate_color_blindness(current_hex)  # Run the color blindness simulation.
+        elif cmd == "grid":  # Show a dense grid of neighbouring colors.
+            show_grid(current_dec)  # Render the grid in a single write.
         elif cmd == "rcs":  # Generate random color schemes.
             generate_random_scheme()  # Generate and display random color schemes.
+        elif cmd == "walk":  # Stream a range of colors; the walk ends on the new current color.
+            current_dec = walk_colors(current_dec)
+        elif cmd == "b":  # Bookmark the current color.
+            bookmark_color(current_dec)
+        elif cmd == "hist":  # Show bookmarks and recent colors.
+            show_history()
         elif cmd == "help":  # Show the help menu.
             show_help()  # Display the command list.
         elif cmd == "q":  # Quit the program.
+            finish_exports()  # Let queued exports reach the disk.
+            finish_history()  # Write the last batch of history records.
             print("👋 Goodbye From Hexplorer!")  # Display goodbye message.
             break  # Exit the loop and end the program.
         else:
@@ -511,10 +617,4 @@ Interactive Commands (Inside The Tool):
 
 # Standard Python idiom to run the main function when the script is executed directly.
 if __name__ == "__main__":
-    ensure_termux_storage()
-    if "--help" in sys.argv:
-        print_cli_help()
-    elif "--version" in sys.argv:
-        print(f"Hexplorer version {VERSION}")
-    else:
-        main()
+    main()
@@ -0,0 +1,206 @@
+"""
+Nearest Named-Color Lookup.
+Built-in CSS and X11 palettes, user palettes loaded from JSON/CSV files,
+and a spatial index that finds the nearest name for any 24-bit color.
+
+The index splits the RGB cube into 16x16x16 cells. The first time a
+cell is queried it keeps only the palette entries that can be nearest
+to some point inside it (usually one to four), so a lookup is one cell
+fetch plus a handful of squared distances.
+"""
+
+import csv
+import json
+import os
+
+# CSS Color Module Level 4 named colors, in alphabetical order (ids follow this order).
+CSS_COLORS = (
+    ("aliceblue", 0xF0F8FF), ("antiquewhite", 0xFAEBD7), ("aqua", 0x00FFFF), ("aquamarine", 0x7FFFD4),
+    ("azure", 0xF0FFFF), ("beige", 0xF5F5DC), ("bisque", 0xFFE4C4), ("black", 0x000000),
+    ("blanchedalmond", 0xFFEBCD), ("blue", 0x0000FF), ("blueviolet", 0x8A2BE2), ("brown", 0xA52A2A),
+    ("burlywood", 0xDEB887), ("cadetblue", 0x5F9EA0), ("chartreuse", 0x7FFF00), ("chocolate", 0xD2691E),
+    ("coral", 0xFF7F50), ("cornflowerblue", 0x6495ED), ("cornsilk", 0xFFF8DC), ("crimson", 0xDC143C),
+    ("cyan", 0x00FFFF), ("darkblue", 0x00008B), ("darkcyan", 0x008B8B), ("darkgoldenrod", 0xB8860B),
+    ("darkgray", 0xA9A9A9), ("darkgreen", 0x006400), ("darkgrey", 0xA9A9A9), ("darkkhaki", 0xBDB76B),
+    ("darkmagenta", 0x8B008B), ("darkolivegreen", 0x556B2F), ("darkorange", 0xFF8C00), ("darkorchid", 0x9932CC),
+    ("darkred", 0x8B0000), ("darksalmon", 0xE9967A), ("darkseagreen", 0x8FBC8F), ("darkslateblue", 0x483D8B),
+    ("darkslategray", 0x2F4F4F), ("darkslategrey", 0x2F4F4F), ("darkturquoise", 0x00CED1), ("darkviolet", 0x9400D3),
+    ("deeppink", 0xFF1493), ("deepskyblue", 0x00BFFF), ("dimgray", 0x696969), ("dimgrey", 0x696969),
+    ("dodgerblue", 0x1E90FF), ("firebrick", 0xB22222), ("floralwhite", 0xFFFAF0), ("forestgreen", 0x228B22),
+    ("fuchsia", 0xFF00FF), ("gainsboro", 0xDCDCDC), ("ghostwhite", 0xF8F8FF), ("gold", 0xFFD700),
+    ("goldenrod", 0xDAA520), ("gray", 0x808080), ("green", 0x008000), ("greenyellow", 0xADFF2F),
+    ("grey", 0x808080), ("honeydew", 0xF0FFF0), ("hotpink", 0xFF69B4), ("indianred", 0xCD5C5C),
+    ("indigo", 0x4B0082), ("ivory", 0xFFFFF0), ("khaki", 0xF0E68C), ("lavender", 0xE6E6FA),
+    ("lavenderblush", 0xFFF0F5), ("lawngreen", 0x7CFC00), ("lemonchiffon", 0xFFFACD), ("lightblue", 0xADD8E6),
+    ("lightcoral", 0xF08080), ("lightcyan", 0xE0FFFF), ("lightgoldenrodyellow", 0xFAFAD2), ("lightgray", 0xD3D3D3),
+    ("lightgreen", 0x90EE90), ("lightgrey", 0xD3D3D3), ("lightpink", 0xFFB6C1), ("lightsalmon", 0xFFA07A),
+    ("lightseagreen", 0x20B2AA), ("lightskyblue", 0x87CEFA), ("lightslategray", 0x778899), ("lightslategrey", 0x778899),
+    ("lightsteelblue", 0xB0C4DE), ("lightyellow", 0xFFFFE0), ("lime", 0x00FF00), ("limegreen", 0x32CD32),
+    ("linen", 0xFAF0E6), ("magenta", 0xFF00FF), ("maroon", 0x800000), ("mediumaquamarine", 0x66CDAA),
+    ("mediumblue", 0x0000CD), ("mediumorchid", 0xBA55D3), ("mediumpurple", 0x9370DB), ("mediumseagreen", 0x3CB371),
+    ("mediumslateblue", 0x7B68EE), ("mediumspringgreen", 0x00FA9A), ("mediumturquoise", 0x48D1CC), ("mediumvioletred", 0xC71585),
+    ("midnightblue", 0x191970), ("mintcream", 0xF5FFFA), ("mistyrose", 0xFFE4E1), ("moccasin", 0xFFE4B5),
+    ("navajowhite", 0xFFDEAD), ("navy", 0x000080), ("oldlace", 0xFDF5E6), ("olive", 0x808000),
+    ("olivedrab", 0x6B8E23), ("orange", 0xFFA500), ("orangered", 0xFF4500), ("orchid", 0xDA70D6),
+    ("palegoldenrod", 0xEEE8AA), ("palegreen", 0x98FB98), ("paleturquoise", 0xAFEEEE), ("palevioletred", 0xDB7093),
+    ("papayawhip", 0xFFEFD5), ("peachpuff", 0xFFDAB9), ("peru", 0xCD853F), ("pink", 0xFFC0CB),
+    ("plum", 0xDDA0DD), ("powderblue", 0xB0E0E6), ("purple", 0x800080), ("rebeccapurple", 0x663399),
+    ("red", 0xFF0000), ("rosybrown", 0xBC8F8F), ("royalblue", 0x4169E1), ("saddlebrown", 0x8B4513),
+    ("salmon", 0xFA8072), ("sandybrown", 0xF4A460), ("seagreen", 0x2E8B57), ("seashell", 0xFFF5EE),
+    ("sienna", 0xA0522D), ("silver", 0xC0C0C0), ("skyblue", 0x87CEEB), ("slateblue", 0x6A5ACD),
+    ("slategray", 0x708090), ("slategrey", 0x708090), ("snow", 0xFFFAFA), ("springgreen", 0x00FF7F),
+    ("steelblue", 0x4682B4), ("tan", 0xD2B48C), ("teal", 0x008080), ("thistle", 0xD8BFD8),
+    ("tomato", 0xFF6347), ("turquoise", 0x40E0D0), ("violet", 0xEE82EE), ("wheat", 0xF5DEB3),
+    ("white", 0xFFFFFF), ("whitesmoke", 0xF5F5F5), ("yellow", 0xFFFF00), ("yellowgreen", 0x9ACD32),
+)
+
+# X11 (rgb.txt) values that differ from CSS, plus the X11-only names.
+_X11_OVERRIDES = {
+    "gray": 0xBEBEBE, "grey": 0xBEBEBE, "green": 0x00FF00, "maroon": 0xB03060, "purple": 0xA020F0,
+}
+_X11_EXTRA = (
+    ("lightgoldenrod", 0xEEDD82), ("lightslateblue", 0x8470FF), ("navyblue", 0x000080), ("violetred", 0xD02090),
+    ("webgray", 0x808080), ("webgreen", 0x008000), ("webmaroon", 0x800000), ("webpurple", 0x800080),
+)
+X11_COLORS = tuple((name, _X11_OVERRIDES.get(name, value)) for name, value in CSS_COLORS) + _X11_EXTRA
+
+# Registered palettes: name -> tuple of (color_name, decimal_index).
+PALETTES = {
+    "css": CSS_COLORS,
+    "x11": X11_COLORS,
+}
+
+DEFAULT_PALETTE = "css"  # Palette used by `get_color_metadata` and the color index.
+CELL_BITS = 4  # log2 of the grid cell width (16 values per axis, 4096 cells).
+
+# Function to parse "#RRGGBB", "RRGGBB" or an (r, g, b) tuple into a decimal index.
+def _to_dec(color):
+    if isinstance(color, int):
+        return color
+    if isinstance(color, str):
+        return int(color.strip().lstrip("#"), 16)
+    r, g, b = color
+    return (r << 16) | (g << 8) | b
+
+# Function to register a palette from a mapping or an iterable of (name, color) pairs.
+def register_palette(name, colors):
+    items = colors.items() if hasattr(colors, "items") else colors
+    PALETTES[name] = tuple((str(n), _to_dec(c)) for n, c in items)
+    _indexes.pop(name, None)  # Drop a stale index built for an older palette of the same name.
+    return PALETTES[name]
+
+# Function to load a palette file: a JSON object {"name": "#hex"} or CSV lines "name,hex".
+def load_palette(path, name=None):
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            colors = json.load(f)
+        else:
+            colors = [row[:2] for row in csv.reader(f) if len(row) >= 2 and not row[0].startswith("#")]
+    return register_palette(name, colors)
+
+class NameIndex:
+    """ Nearest-name lookup over one palette, backed by lazily pruned grid cells. """
+
+    def __init__(self, colors):
+        self.names = []  # Id -> color name.
+        self.values = []  # Id -> decimal index.
+        self._points = []  # Unique palette points as (r, g, b, id).
+        seen = set()
+        for name, dec in colors:
+            self.names.append(name)
+            self.values.append(dec)
+            if dec not in seen:  # Aliases (aqua/cyan, gray/grey) resolve to the first name.
+                seen.add(dec)
+                self._points.append((dec >> 16, (dec >> 8) & 0xFF, dec & 0xFF, len(self.names) - 1))
+        if not self._points:
+            raise ValueError("cannot index an empty palette")
+        self._cells = {}  # Cell key -> candidate points.
+        self._axis_bounds = None  # Per-axis slab distances, built with the first cell.
+
+    # Function to compute the palette points that can be nearest to some color inside one cell.
+    def _cell(self, key):
+        if self._axis_bounds is None:
+            self._axis_bounds = self._build_axis_bounds()
+        (dmin_r, dmax_r), (dmin_g, dmax_g), (dmin_b, dmax_b) = (
+            self._axis_bounds[axis][(key >> shift) & 0xFF] for axis, shift in ((0, 16), (1, 8), (2, 0)))
+        dmax = [x + y + z for x, y, z in zip(dmax_r, dmax_g, dmax_b)]
+        best = min(dmax)  # Every color in the cell is at least this close to some point.
+        points = self._points
+        cell = tuple(points[i] for i, d in enumerate(map(sum, zip(dmin_r, dmin_g, dmin_b))) if d <= best)
+        self._cells[key] = cell
+        return cell
+
+    # Function to precompute, per axis and cell coordinate, the squared min/max distance of every point to the slab.
+    def _build_axis_bounds(self):
+        size = 1 << CELL_BITS
+        bounds = []
+        for axis in range(3):
+            per_cell = []
+            for c in range(256 >> CELL_BITS):
+                lo, hi = c << CELL_BITS, (c << CELL_BITS) + size - 1
+                dmin = [(lo - p[axis]) ** 2 if p[axis] < lo else (p[axis] - hi) ** 2 if p[axis] > hi else 0
+                        for p in self._points]
+                dmax = [max(p[axis] - lo, hi - p[axis]) ** 2 for p in self._points]
+                per_cell.append((dmin, dmax))
+            bounds.append(per_cell)
+        return bounds
+
+    # Function to get (id, squared distance) of the palette entry nearest to an RGB color.
+    def nearest_id(self, r, g, b):
+        key = ((r >> CELL_BITS) << 16) | ((g >> CELL_BITS) << 8) | (b >> CELL_BITS)
+        cell = self._cells.get(key) or self._cell(key)
+        best_id = -1
+        best = 1 << 30
+        for pr, pg, pb, pid in cell:
+            d = (pr - r) * (pr - r) + (pg - g) * (pg - g) + (pb - b) * (pb - b)
+            if d < best:
+                best = d
+                best_id = pid
+        return best_id, best
+
+    # Function to get (name, Euclidean RGB distance) of the nearest palette entry.
+    def nearest(self, r, g, b):
+        pid, d2 = self.nearest_id(r, g, b)
+        return self.names[pid], d2 ** 0.5
+
+    # Function to get the name of a palette entry that exactly matches a color, or None.
+    def exact(self, r, g, b):
+        pid, d2 = self.nearest_id(r, g, b)
+        return self.names[pid] if d2 == 0 else None
+
+    # Function to name a whole palette at once (hex strings, decimal indexes or RGB tuples).
+    def name_all(self, colors):
+        memo = {}  # Repeated colors are only looked up once.
+        out = []
+        for color in colors:
+            dec = _to_dec(color)
+            hit = memo.get(dec)
+            if hit is None:
+                hit = memo[dec] = self.nearest(dec >> 16, (dec >> 8) & 0xFF, dec & 0xFF)
+            out.append(hit)
+        return out
+
+    # Function to get the nearest ids of all 65,536 colors in red plane `r` (used by the color index).
+    def plane_ids(self, r):
+        nearest_id = self.nearest_id
+        return [nearest_id(r, g, b)[0] for g in range(256) for b in range(256)]
+
+_indexes = {}  # Palette name -> NameIndex, built on first use.
+
+# Function to get (building once) the NameIndex of a registered palette.
+def name_index(palette=DEFAULT_PALETTE):
+    index = _indexes.get(palette)
+    if index is None:
+        if palette not in PALETTES:
+            raise KeyError(f"unknown palette: {palette} (available: {', '.join(sorted(PALETTES))})")
+        index = _indexes[palette] = NameIndex(PALETTES[palette])
+    return index
+
+# Function to get (name, distance) of the nearest named color to an RGB color.
+def nearest_name(r, g, b, palette=DEFAULT_PALETTE):
+    return name_index(palette).nearest(r, g, b)
+
+# Function to name a list of colors in bulk, returning (name, distance) pairs.
+def name_palette(colors, palette=DEFAULT_PALETTE):
+    return name_index(palette).name_all(colors)
@@ -0,0 +1,452 @@
+"""
+Image Palette Extraction.
+Reads PPM/PGM and PNG images with the standard library only and extracts a
+dominant-color palette by median-cut or k-means over a 5-bit-per-channel
+color histogram. Pixels are decoded in bands of rows and never held as a
+whole image: each band is folded into the histogram (in a process pool
+when one is given) and dropped. Many images are spread over the pool one
+image per worker, so large runs scale with the number of cores.
+
+    hexplorer palette photo.png -k 6 --method kmeans
+    find shots/ -name '*.png' | hexplorer palette - -f jsonl -j 8 > palettes.jsonl
+"""
+
+import argparse
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter, deque
+from itertools import accumulate
+
+from .colorblind import MODELS as CB_MODELS
+from .core import get_color_blindness, get_color_metadata, get_scheme, rgb_to_hex
+from .writers import silence_broken_pipe, write_jsonl
+
+METHODS = ("median", "kmeans")  # Supported quantizers.
+HIST_BITS = 5  # Bits kept per channel in the histogram (32,768 bins).
+BAND_ROWS = 64  # Image rows decoded and histogrammed per task.
+ALPHA_MIN = 128  # Pixels less opaque than this are ignored (transparent backgrounds).
+KMEANS_ITERATIONS = 12  # Upper bound on k-means refinement passes.
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+READ_SIZE = 1 << 16  # Bytes of compressed PNG data read at a time.
+
+_SHIFT = 8 - HIST_BITS
+_QUANT = bytes((v >> _SHIFT) << _SHIFT for v in range(256))  # Drops the low bits of every byte.
+_CENTER = (1 << _SHIFT) >> 1  # Offset from a bin's lower edge to its center.
+_U32 = "I" if array("I").itemsize == 4 else "L"  # Array typecode holding one packed BGRA pixel.
+_BYTE = (255).__and__  # Reduces a running sum modulo 256.
+
+# Channels per PNG color type, and the band mode the decoded rows are tagged with.
+_PNG_TYPES = {0: (1, "L"), 2: (3, "RGB"), 3: (1, "P"), 4: (2, "LA"), 6: (4, "RGBA")}
+
+# Function to fold one band of decoded pixels into a histogram: packed 0xRRGGBB bin -> pixel count.
+# `mode` is "L", "LA", "RGB", "RGBA" or "P"; for "P", `palette` holds one BGRA entry per index.
+def band_histogram(mode, data, palette=None):
+    if mode == "P":
+        buf = bytearray(b"".join(map(palette.__getitem__, data)))
+    else:
+        channels = len(mode)
+        n = len(data) // channels
+        buf = bytearray(n * 4)  # Pixels are laid out as B, G, R, A so they read as 0xAARRGGBB.
+        if mode in ("RGB", "RGBA"):
+            buf[0::4] = data[2::channels]
+            buf[1::4] = data[1::channels]
+            buf[2::4] = data[0::channels]
+        else:
+            gray = data[0::channels]
+            buf[0::4] = gray
+            buf[1::4] = gray
+            buf[2::4] = gray
+        buf[3::4] = data[channels - 1::channels] if mode in ("LA", "RGBA") else b"\xff" * n
+    pixels = array(_U32)
+    pixels.frombytes(buf.translate(_QUANT))
+    if sys.byteorder == "big":
+        pixels.byteswap()
+    hist = Counter()
+    for key, count in Counter(pixels).items():
+        if key >> 24 >= ALPHA_MIN:
+            hist[key & 0xFFFFFF] += count
+    return hist
+
+# Function to read the whitespace-separated header tokens of a PPM/PGM file, skipping comments.
+def _pnm_header(fp, count):
+    tokens = []
+    token = b""
+    while len(tokens) < count:
+        ch = fp.read(1)
+        if not ch:
+            raise ValueError("truncated PNM header")
+        if ch == b"#":
+            fp.readline()
+        elif ch.isspace():
+            if token:
+                tokens.append(token)
+                token = b""
+        else:
+            token += ch
+    return tokens
+
+# Function to yield (mode, data, palette) bands from a binary PPM (P6) or PGM (P5) file.
+def _pnm_bands(fp, band_rows):
+    magic, width, height, maxval = _pnm_header(fp, 4)
+    if magic not in (b"P5", b"P6"):
+        raise ValueError(f"unsupported PNM type: {magic.decode('ascii', 'replace')}")
+    width, height, maxval = int(width), int(height), int(maxval)
+    mode = "RGB" if magic == b"P6" else "L"
+    wide = maxval > 255  # 16-bit samples: keep the high byte.
+    row_bytes = width * len(mode) * (2 if wide else 1)
+    yield width, height
+    remaining = height
+    while remaining:
+        rows = min(band_rows, remaining)
+        data = fp.read(row_bytes * rows)
+        if len(data) < row_bytes * rows:
+            raise ValueError("truncated PNM pixel data")
+        if wide:
+            data = data[0::2]
+        if maxval not in (255, 65535):  # Rescale unusual ranges to 0-255.
+            top = maxval >> 8 if wide else maxval
+            data = bytes(min(255, v * 255 // top) for v in data)
+        yield mode, data, None
+        remaining -= rows
+
+# Function to yield (type, data) for every PNG chunk, with IDAT data split into pieces of at most READ_SIZE bytes.
+def _png_chunks(fp):
+    while True:
+        head = fp.read(8)
+        if len(head) < 8:
+            raise ValueError("truncated PNG")
+        length, ctype = struct.unpack(">I4s", head)
+        if ctype == b"IDAT":
+            while length:
+                piece = fp.read(min(length, READ_SIZE))
+                if not piece:
+                    raise ValueError("truncated PNG")
+                length -= len(piece)
+                yield ctype, piece
+        else:
+            yield ctype, fp.read(length)
+        fp.read(4)  # CRC.
+        if ctype == b"IEND":
+            return
+
+# Function to undo one PNG scanline filter, given the previous reconstructed scanline.
+def _unfilter(ftype, row, prev, bpp, masks):
+    if ftype == 0:  # None.
+        return row
+    if ftype == 1:  # Sub: a running sum per channel.
+        out = bytearray(row)
+        for c in range(bpp):
+            out[c::bpp] = bytes(map(_BYTE, accumulate(row[c::bpp])))
+        return out
+    if ftype == 2:  # Up: bytewise add of two rows, done as one big-integer add without cross-byte carries.
+        low, high = masks
+        x = int.from_bytes(row, "big")
+        y = int.from_bytes(prev, "big")
+        return (((x & low) + (y & low)) ^ ((x ^ y) & high)).to_bytes(len(row), "big")
+    out = bytearray(row)
+    n = len(out)
+    if ftype == 3:  # Average.
+        for i in range(bpp):
+            out[i] = (out[i] + (prev[i] >> 1)) & 255
+        for i in range(bpp, n):
+            out[i] = (out[i] + ((out[i - bpp] + prev[i]) >> 1)) & 255
+        return out
+    if ftype == 4:  # Paeth.
+        for i in range(bpp):
+            out[i] = (out[i] + prev[i]) & 255
+        for i in range(bpp, n):
+            a, b, c = out[i - bpp], prev[i], prev[i - bpp]
+            pa, pb, pc = abs(b - c), abs(a - c), abs(a + b - 2 * c)
+            out[i] = (out[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 255
+        return out
+    raise ValueError(f"bad PNG filter type: {ftype}")
+
+# Function to build the table that expands one packed byte of 1/2/4-bit samples into 8-bit samples.
+def _unpack_table(depth, scale):
+    per = 8 // depth
+    mask = (1 << depth) - 1
+    return [bytes(((byte >> (8 - depth * (j + 1))) & mask) * scale for j in range(per)) for byte in range(256)]
+
+# Function to yield (mode, data, palette) bands from a non-interlaced PNG file.
+def _png_bands(fp, band_rows):
+    if fp.read(8) != PNG_SIGNATURE:
+        raise ValueError("not a PNG file")
+    chunks = _png_chunks(fp)
+    ctype, data = next(chunks)
+    if ctype != b"IHDR":
+        raise ValueError("PNG is missing its IHDR chunk")
+    width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", data)
+    if color_type not in _PNG_TYPES:
+        raise ValueError(f"unsupported PNG color type: {color_type}")
+    if interlace:
+        raise ValueError("interlaced PNGs are not supported")
+    channels, mode = _PNG_TYPES[color_type]
+    stride = (width * channels * depth + 7) // 8  # Bytes per scanline, without the filter byte.
+    bpp = max(1, channels * depth // 8)  # Filter distance in bytes.
+    masks = (int.from_bytes(b"\x7f" * stride, "big"), int.from_bytes(b"\x80" * stride, "big"))
+    unpack = None
+    if depth < 8:  # Only gray and palette images use sub-byte samples.
+        unpack = _unpack_table(depth, 255 // ((1 << depth) - 1) if mode == "L" else 1)
+    yield width, height
+
+    palette = None
+    alpha = b""
+    inflate = zlib.decompressobj()
+    pending = bytearray()  # Decompressed bytes not yet cut into scanlines.
+    prev = bytes(stride)
+    band = []
+    rows = 0
+    for ctype, data in chunks:
+        if ctype == b"PLTE":
+            palette = data
+        elif ctype == b"tRNS" and mode == "P":
+            alpha = data
+        elif ctype == b"IDAT":
+            if mode == "P" and not isinstance(palette, list):
+                if palette is None:
+                    raise ValueError("palette PNG is missing its PLTE chunk")
+                palette = [bytes((palette[i + 2], palette[i + 1], palette[i], alpha[i // 3] if i // 3 < len(alpha) else 255))
+                           for i in range(0, len(palette) - 2, 3)]  # BGRA entries, as band_histogram lays pixels out.
+                palette += [b"\x00\x00\x00\xff"] * (256 - len(palette))  # Out-of-range indexes read as black.
+            pending += inflate.decompress(data)
+            pos = 0
+            while len(pending) - pos > stride and rows < height:
+                row = _unfilter(pending[pos], bytes(pending[pos + 1:pos + 1 + stride]), prev, bpp, masks)
+                pos += stride + 1
+                prev = row
+                if depth == 16:
+                    row = row[0::2]
+                elif unpack is not None:
+                    row = b"".join(map(unpack.__getitem__, row))[:width]
+                band.append(bytes(row))
+                rows += 1
+                if len(band) == band_rows:
+                    yield mode, b"".join(band), palette if mode == "P" else None
+                    band = []
+            del pending[:pos]
+        elif ctype == b"IEND":
+            break
+    if band:
+        yield mode, b"".join(band), palette if mode == "P" else None
+    if rows < height:
+        raise ValueError("truncated PNG pixel data")
+
+# Function to open an image and return (width, height, band iterator), picking the decoder from its magic bytes.
+def _open_bands(fp, band_rows):
+    magic = fp.read(2)
+    fp.seek(0)
+    if magic == PNG_SIGNATURE[:2]:
+        bands = _png_bands(fp, band_rows)
+    elif magic in (b"P5", b"P6"):
+        bands = _pnm_bands(fp, band_rows)
+    else:
+        raise ValueError("unsupported image format (expected PNG, PPM or PGM)")
+    width, height = next(bands)
+    return width, height, bands
+
+# Function to histogram bands in a process pool, keeping at most `window` bands in flight.
+def _pooled_histograms(bands, pool, window):
+    pending = deque()
+    for band in bands:
+        pending.append(pool.apply_async(band_histogram, band))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+# Function to build the color histogram of an image file: returns (width, height, Counter of 0xRRGGBB bins).
+def image_histogram(path, pool=None, band_rows=BAND_ROWS):
+    with open(path, "rb") as fp:
+        width, height, bands = _open_bands(fp, band_rows)
+        if pool is None:
+            parts = (band_histogram(*band) for band in bands)
+        else:
+            parts = _pooled_histograms(bands, pool, 2 * (os.cpu_count() or 1))
+        hist = Counter()
+        for part in parts:
+            hist.update(part)
+    return width, height, hist
+
+# Function to turn a histogram into weighted (r, g, b, count) entries at bin centers.
+def _entries(hist):
+    return [((key >> 16) + _CENTER, ((key >> 8) & 0xFF) + _CENTER, (key & 0xFF) + _CENTER, count)
+            for key, count in hist.items()]
+
+# Function to compute the population-weighted mean color of some entries, as (r, g, b, count).
+def _mean(entries):
+    total = sum(e[3] for e in entries)
+    return (sum(e[0] * e[3] for e in entries) / total,
+            sum(e[1] * e[3] for e in entries) / total,
+            sum(e[2] * e[3] for e in entries) / total,
+            total)
+
+# Function to split histogram entries into up to k boxes by median cut, returning their mean colors.
+def median_cut(entries, k):
+    boxes = [list(entries)] if entries else []
+    while len(boxes) < k:
+        best = None
+        for i, box in enumerate(boxes):  # Split the box with the largest population-weighted extent.
+            if len(box) < 2:
+                continue
+            spans = [max(e[c] for e in box) - min(e[c] for e in box) for c in range(3)]
+            span = max(spans)
+            score = span * sum(e[3] for e in box)
+            if span and (best is None or score > best[0]):
+                best = (score, i, spans.index(span))
+        if best is None:
+            break
+        _, i, channel = best
+        box = sorted(boxes.pop(i), key=lambda e: e[channel])
+        half = sum(e[3] for e in box) / 2
+        seen = 0
+        cut = 1
+        for j, e in enumerate(box[:-1]):
+            seen += e[3]
+            if seen >= half:
+                cut = j + 1
+                break
+        boxes += [box[:cut], box[cut:]]
+    return [_mean(box) for box in boxes]
+
+# Function to refine median-cut centers with weighted k-means (Lloyd iterations) over histogram entries.
+def kmeans(entries, k, iterations=KMEANS_ITERATIONS):
+    centers = [c[:3] for c in median_cut(entries, k)]
+    clusters = []
+    for _ in range(iterations):
+        sums = [[0.0, 0.0, 0.0, 0] for _ in centers]
+        for r, g, b, count in entries:
+            best, nearest = None, 0
+            for i, (cr, cg, cb) in enumerate(centers):
+                d = (r - cr) ** 2 + (g - cg) ** 2 + (b - cb) ** 2
+                if best is None or d < best:
+                    best, nearest = d, i
+            s = sums[nearest]
+            s[0] += r * count
+            s[1] += g * count
+            s[2] += b * count
+            s[3] += count
+        clusters = [(s[0] / s[3], s[1] / s[3], s[2] / s[3], s[3]) for s in sums if s[3]]
+        moved = len(clusters) != len(centers) or any(
+            abs(a - c) > 0.5 for new, old in zip(clusters, centers) for a, c in zip(new[:3], old))
+        centers = [c[:3] for c in clusters]
+        if not moved:
+            break
+    return clusters
+
+# Function to extract the dominant colors of an image as {"width", "height", "pixels", "colors": [(hex, share)]}.
+def extract_palette(path, k=6, method="median", pool=None):
+    if method not in METHODS:
+        raise ValueError(f"unknown palette method: {method} (choose from {', '.join(METHODS)})")
+    width, height, hist = image_histogram(path, pool)
+    entries = _entries(hist)
+    clusters = kmeans(entries, k) if method == "kmeans" else median_cut(entries, k)
+    pixels = sum(hist.values())
+    colors = [(rgb_to_hex(*(min(255, int(v + 0.5)) for v in c[:3])), c[3] / pixels)
+              for c in sorted(clusters, key=lambda c: -c[3])]
+    return {"width": width, "height": height, "pixels": pixels, "colors": colors}
+
+# Function to run one image in a worker process, returning (path, palette, error message).
+def _palette_job(job):
+    path, k, method = job
+    try:
+        return path, extract_palette(path, k, method), None
+    except (OSError, ValueError, zlib.error, struct.error) as e:
+        return path, None, str(e)
+
+# Function to build the output records of one palette: color metadata plus optional schemes and simulations.
+def palette_records(path, palette, schemes=False, color_blindness=False, cb_model="simple"):
+    for rank, (hex_code, share) in enumerate(palette["colors"], 1):
+        record = {"image": path, "rank": rank, "population": round(share, 4)}
+        record.update(get_color_metadata(hex_code))
+        if schemes:
+            record["schemes"] = {name: "#" + rgb_to_hex(*rgb) for name, rgb in get_scheme(hex_code).items()}
+        if color_blindness:
+            record["color_blindness"] = {cb: "#" + h for cb, h in get_color_blindness(hex_code, cb_model).items()}
+        yield record
+
+# Function to write one palette as terminal swatches.
+def _write_text(path, palette, records, out):
+    from .render import color_block, set_color_mode  # Only the text format draws swatches.
+    from .termcolor import detect_color_mode
+    set_color_mode(detect_color_mode())  # Nearest 256/16-color swatches on terminals without 24-bit color.
+    lines = [f"🖼️ {path} ({palette['width']}x{palette['height']}, {palette['pixels']} pixels)"]
+    for record in records:
+        hex_code = record["hex"][1:]
+        lines.append(f"{color_block(hex_code)}  {record['population']:6.1%}  {record['name']}")
+        for name, h in record.get("schemes", {}).items():
+            lines.append(f"      {name:<14} ➡️ {h}")
+        for cb, h in record.get("color_blindness", {}).items():
+            lines.append(f"      {cb:<14} ➡️ {h}")
+    out.write("\n".join(lines) + "\n")
+
+# Function to yield image paths from the arguments, reading them one per line from stdin for "-".
+def _iter_paths(paths):
+    for path in paths:
+        if path == "-":
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    yield line
+        else:
+            yield path
+
+# Function to run `hexplorer palette` with the given command-line arguments.
+def run_palette(argv=None):
+    parser = argparse.ArgumentParser(prog="hexplorer palette",
+                                     description="Extract dominant-color palettes from PNG, PPM or PGM images.")
+    parser.add_argument("images", nargs="+", help="image files, or - to read paths from stdin")
+    parser.add_argument("-k", "--colors", type=int, default=6, help="palette size (default: 6)")
+    parser.add_argument("-m", "--method", choices=METHODS, default="median", help="quantizer (default: median)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: number of CPUs)")
+    parser.add_argument("-f", "--format", choices=("text", "jsonl"), default="text", help="output format (default: text)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--schemes", action="store_true", help="add the color schemes of every palette color")
+    parser.add_argument("--cb", action="store_true", help="add color blindness simulations of every palette color")
+    parser.add_argument("--cb-model", choices=CB_MODELS, default="simple", help="simulation model for --cb (default: simple)")
+    args = parser.parse_args(argv)
+    if args.colors < 1:
+        parser.error("--colors must be at least 1")
+
+    pool = None
+    if args.jobs > 1:
+        import multiprocessing  # Only needed when work is spread over processes.
+        pool = multiprocessing.Pool(args.jobs)
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    failed = 0
+    try:
+        if args.images != ["-"] and len(args.images) == 1:  # One image: spread its row bands over the pool.
+            path = args.images[0]
+            try:
+                results = [(path, extract_palette(path, args.colors, args.method, pool), None)]
+            except (OSError, ValueError, zlib.error, struct.error) as e:
+                results = [(path, None, str(e))]
+        else:  # Many images: one image per worker, results streamed in input order.
+            jobs = ((path, args.colors, args.method) for path in _iter_paths(args.images))
+            results = pool.imap(_palette_job, jobs) if pool is not None else map(_palette_job, jobs)
+        for path, palette, error in results:
+            if error is not None:
+                failed += 1
+                print(f"❌ {path}: {error}", file=sys.stderr)
+                continue
+            records = palette_records(path, palette, args.schemes, args.cb, args.cb_model)
+            if args.format == "jsonl":
+                write_jsonl(records, dst)
+            else:
+                _write_text(path, palette, records, dst)
+        dst.flush()
+    except BrokenPipeError:
+        silence_broken_pipe()
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if dst is not sys.stdout:
+            dst.close()
+    return 1 if failed else 0
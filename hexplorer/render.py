@@ -0,0 +1,164 @@
+"""
+Buffered Terminal Renderer.
+Screens are composed line by line into a frame and emitted with a single
+write. When the previous frame is still on screen right above the prompt,
+only the lines that changed are rewritten in place (cursor moves instead
+of reprinting), which keeps `n`/`p` snappy over SSH and slow terminals.
+On terminals without 24-bit color (see `set_color_mode`), swatches and
+grid cells use the nearest 256- or 16-color palette entry instead.
+"""
+
+import shutil
+import sys
+
+from .core import MAX_DEC, hex_to_rgb
+
+BLOCK_INDENT = " " * 18  # Left padding of a color swatch, matching the classic layout.
+RESET = "\033[0m"
+UPPER_HALF = "▀"  # "▀": foreground paints the top half, background the bottom half.
+GRID_COLS = 64  # Default dense grid width (colors per row).
+GRID_ROWS = 32  # Default dense grid height (colors per column, two per text line).
+CHUNK_LINES = 256  # Lines joined per write when streaming long outputs.
+
+_downsampler = None  # termcolor.Downsampler for 256/16-color terminals, None for truecolor.
+
+# Function to set the terminal color mode ("truecolor", "256" or "16") used by swatches and grids.
+def set_color_mode(mode):
+    global _downsampler
+    from .termcolor import downsampler  # Loaded only when a mode is set, to keep startup fast.
+    _downsampler = downsampler(mode)
+
+# Function to build the swatch line for a hex color (same text `print_color_block` prints).
+def color_block(hex_code):
+    if _downsampler is not None:  # Nearest palette entry: one table index.
+        return f"{BLOCK_INDENT}{_downsampler.bg(int(hex_code, 16))}        {RESET} #{hex_code}"
+    r, g, b = hex_to_rgb(hex_code)  # Convert hex to RGB.
+    return f"{BLOCK_INDENT}\033[48;2;{r};{g};{b}m        {RESET} #{hex_code}"
+
+# Function to build a small swatch (`width` cells) for a 24-bit color index.
+def swatch(dec, width=2):
+    if _downsampler is not None:
+        return f"{_downsampler.bg(dec)}{' ' * width}{RESET}"
+    return f"\033[48;2;{dec >> 16};{(dec >> 8) & 0xFF};{dec & 0xFF}m{' ' * width}{RESET}"
+
+# Function to build a text sample: `text` in color `fg` on color `bg` (24-bit color indexes).
+def text_sample(fg, bg, text=" Aa "):
+    if _downsampler is not None:
+        return f"{_downsampler.fg(fg)}{_downsampler.bg(bg)}{text}{RESET}"
+    return (f"\033[38;2;{fg >> 16};{(fg >> 8) & 0xFF};{fg & 0xFF}m"
+            f"\033[48;2;{bg >> 16};{(bg >> 8) & 0xFF};{bg & 0xFF}m{text}{RESET}")
+
+# Function to write lines with one write per chunk instead of one print per line.
+def write_lines(lines, out=None, chunk=CHUNK_LINES):
+    out = out or sys.stdout
+    buf = []
+    for line in lines:
+        buf.append(line)
+        if len(buf) >= chunk:
+            out.write("\n".join(buf) + "\n")
+            del buf[:]
+    if buf:
+        out.write("\n".join(buf) + "\n")
+    out.flush()
+
+# Function to build a dense grid of neighbouring indexes starting at `start`, two colors per character cell.
+def grid_lines(start, cols=GRID_COLS, rows=GRID_ROWS):
+    if _downsampler is not None:
+        return _palette_grid_lines(start, cols, rows, _downsampler)
+    lines = []
+    for top in range(0, rows, 2):
+        first = start + top * cols
+        if first > MAX_DEC:
+            break
+        parts = [f"#{first:06X} "]  # Row label: the first index on the upper half-row.
+        fg = bg = None  # Colors currently set, so escapes are only emitted when they change.
+        for col in range(cols):
+            upper = first + col
+            lower = upper + cols if top + 1 < rows else None
+            if upper > MAX_DEC:
+                break
+            if lower is not None and lower > MAX_DEC:
+                lower = None
+            if upper != fg:
+                parts.append(f"\033[38;2;{upper >> 16};{(upper >> 8) & 0xFF};{upper & 0xFF}m")
+                fg = upper
+            if lower is None:
+                if bg is not None:
+                    parts.append("\033[49m")  # Default background below the last row.
+                    bg = None
+            elif lower != bg:
+                parts.append(f"\033[48;2;{lower >> 16};{(lower >> 8) & 0xFF};{lower & 0xFF}m")
+                bg = lower
+            parts.append(UPPER_HALF)
+        parts.append(RESET)
+        lines.append("".join(parts))
+    return lines
+
+# Function to build the dense grid with palette entries; escapes are only emitted when the entry changes.
+def _palette_grid_lines(start, cols, rows, sampler):
+    entry, fg_escapes, bg_escapes = sampler.entry, sampler.fg_escapes, sampler.bg_escapes
+    lines = []
+    for top in range(0, rows, 2):
+        first = start + top * cols
+        if first > MAX_DEC:
+            break
+        parts = [f"#{first:06X} "]
+        fg = bg = None  # Palette entries currently set.
+        for col in range(cols):
+            upper = first + col
+            lower = upper + cols if top + 1 < rows else None
+            if upper > MAX_DEC:
+                break
+            if lower is not None and lower > MAX_DEC:
+                lower = None
+            n = entry(upper)
+            if n != fg:
+                parts.append(fg_escapes[n])
+                fg = n
+            if lower is None:
+                if bg is not None:
+                    parts.append("\033[49m")
+                    bg = None
+            else:
+                n = entry(lower)
+                if n != bg:
+                    parts.append(bg_escapes[n])
+                    bg = n
+            parts.append(UPPER_HALF)
+        parts.append(RESET)
+        lines.append("".join(parts))
+    return lines
+
+class Renderer:
+    """ Emits whole frames with one write and patches only changed lines when redrawing in place. """
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self._last = None  # Lines of the frame currently on screen, or None when unknown.
+        self._below = 0  # Terminal rows used below the frame since it was drawn (prompt + input).
+
+    # Function to check whether in-place redraws are safe (a real terminal wide enough not to wrap).
+    def _can_patch(self):
+        isatty = getattr(self.out, "isatty", None)
+        return bool(isatty and isatty()) and shutil.get_terminal_size().columns >= 80
+
+    # Function to draw a frame; with `in_place`, rewrite only lines that differ from the previous frame.
+    def draw(self, lines, in_place=False):
+        last = self._last
+        if in_place and last is not None and len(last) == len(lines) and self._can_patch():
+            parts = [f"\033[{len(lines) + self._below}A\r"]  # Jump back to the first line of the old frame.
+            for old, new in zip(last, lines):
+                parts.append(f"\033[2K{new}\n" if old != new else "\n")
+            parts.append("\033[J")  # Clear the old prompt and input below the frame.
+            self.out.write("".join(parts))
+        else:
+            self.out.write("\n".join(lines) + "\n")
+        self.out.flush()
+        self._last = list(lines)
+        self._below = 0
+
+    # Function to prompt below the frame, remembering how many rows the prompt and answer occupy.
+    def input(self, prompt):
+        width = shutil.get_terminal_size().columns or 80
+        self._below += max(1, -(-len(prompt) // width))
+        return input(prompt)
@@ -0,0 +1,388 @@
+"""
+Parallel Predicate Search.
+Finds every color in 0..MAX_DEC that satisfies a composable predicate
+(luminance, contrast, hue range, perceptual distance), e.g. "within ΔE 5
+of #1A73E8 with contrast >= 4.5 against white". The space is split into
+red planes that run in a process pool, and matches stream back in index
+order as soon as each plane finishes.
+
+Every predicate can narrow, for a fixed red and green, the range of blues
+that may match: luminance and each OKLab cone response grow with every
+channel, so those bounds come from bisecting 256-entry tables rather
+than testing colors one by one.
+
+    hexplorer search --near 1A73E8 --delta 5 --metric ciede2000 --min-contrast 4.5
+"""
+
+import argparse
+import math
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+from .codec import encode_indexes
+from .core import MAX_DEC, get_color_metadata, is_valid_hex
+from .spaces import METRICS, WHITE_Y, _lab_f_inv, delta_e_2000, delta_e_ok, rgb_to_lab, rgb_to_oklab
+from .tables import LINEAR, LUM_B, LUM_G, LUM_R, contrast_ratio, relative_luminance
+from .writers import CHUNK_SIZE, WRITERS, silence_broken_pipe
+
+COUNT = MAX_DEC + 1  # Number of colors in the space.
+PLANE = 1 << 16  # Colors per red plane, the unit of parallel work.
+FULL = ((0, 256),)  # Blue range of a row that cannot be narrowed.
+EPSILON = 1e-9  # Slack added to table bounds against float rounding.
+
+# Per-channel contributions to the OKLab cone responses (l, m, s) before the cube root.
+_LMS = tuple(tuple(tuple(c * v for v in LINEAR) for c in row) for row in (
+    (0.4122214708, 0.5363325363, 0.0514459929),
+    (0.2119034982, 0.6806995451, 0.1073969566),
+    (0.0883024619, 0.2817188376, 0.6299787005),
+))
+# How far each cube-rooted cone response can move per unit of OKLab ΔE (row norms of the OKLab -> l'm's' matrix).
+_LMS_SLACK = (math.sqrt(1 + 0.3963377774 ** 2 + 0.2158037573 ** 2),
+              math.sqrt(1 + 0.1055613458 ** 2 + 0.0638541728 ** 2),
+              math.sqrt(1 + 0.0894841775 ** 2 + 1.2914855480 ** 2))
+# Per-channel contributions to CIE Y (D65), which fixes CIELAB L*.
+_Y = tuple(tuple(c * v for v in LINEAR) for c in (0.2126729, 0.7151522, 0.0721750))
+
+# Function to find the blues whose per-row value (base + table_b[b]) lies within [lo, hi], as a range.
+def _blue_span(table_b, base, lo, hi):
+    return bisect_left(table_b, lo - base - EPSILON), bisect_right(table_b, hi - base + EPSILON)
+
+# Function to intersect two sorted lists of disjoint (start, stop) blue ranges.
+def _intersect(a, b):
+    out = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        lo, hi = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if lo < hi:
+            out.append((lo, hi))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+# Function to merge a list of (start, stop) blue ranges into sorted disjoint ranges.
+def _union(ranges):
+    out = []
+    for lo, hi in sorted(ranges):
+        if out and lo <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], hi))
+        elif lo < hi:
+            out.append((lo, hi))
+    return out
+
+class Predicate:
+    """ Base class of search predicates. Combine them with &, | and ~. """
+
+    __slots__ = ()
+    exact = False  # True when blue_ranges() returns exactly the matches, so test() can be skipped.
+    cost = 1  # Relative cost of test(), used to order the checks of a conjunction.
+
+    # Function to check one color.
+    def test(self, r, g, b):
+        raise NotImplementedError
+
+    # Function to get the blues that may match for a fixed red and green, as sorted (start, stop) ranges.
+    def blue_ranges(self, r, g):
+        return FULL
+
+    def __and__(self, other):
+        return All(self, other)
+
+    def __or__(self, other):
+        return Any(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+class Luminance(Predicate):
+    """ Relative luminance within [low, high]. """
+
+    __slots__ = ("low", "high")
+    exact = True
+
+    def __init__(self, low=0.0, high=1.0):
+        self.low, self.high = low, high
+
+    def test(self, r, g, b):
+        return self.low <= relative_luminance(r, g, b) <= self.high
+
+    def blue_ranges(self, r, g):
+        lo, hi = _blue_span(LUM_B, LUM_R[r] + LUM_G[g], self.low, self.high)
+        return ((lo, hi),) if lo < hi else ()
+
+class Contrast(Predicate):
+    """ WCAG contrast ratio against a reference color within [min_ratio, max_ratio]. """
+
+    __slots__ = ("min_ratio", "max_ratio", "against", "_lum")
+    exact = True
+
+    def __init__(self, min_ratio=4.5, against="FFFFFF", max_ratio=21.0):
+        self.min_ratio, self.max_ratio, self.against = min_ratio, max_ratio, against
+        dec = int(against.lstrip("#"), 16)
+        self._lum = relative_luminance(dec >> 16, (dec >> 8) & 0xFF, dec & 0xFF)
+
+    def test(self, r, g, b):
+        return self.min_ratio <= contrast_ratio(self._lum, relative_luminance(r, g, b)) <= self.max_ratio
+
+    def blue_ranges(self, r, g):
+        base = LUM_R[r] + LUM_G[g]
+        lum = self._lum + 0.05
+        # Darker colors pass when lum / ratio - 0.05 falls between the ratio bounds, lighter ones likewise.
+        dark = _blue_span(LUM_B, base, lum / self.max_ratio - 0.05, lum / self.min_ratio - 0.05)
+        light = _blue_span(LUM_B, base, lum * self.min_ratio - 0.05, lum * self.max_ratio - 0.05)
+        return _union([dark, light])
+
+class Hue(Predicate):
+    """ HSL hue (degrees) within [low, high], wrapping around 360 when low > high. Grays never match. """
+
+    __slots__ = ("low", "high")
+
+    def __init__(self, low, high):
+        self.low, self.high = low % 360, high % 360 if high != 360 else 360
+
+    def test(self, r, g, b):
+        hi, lo = max(r, g, b), min(r, g, b)
+        if hi == lo:
+            return False
+        if hi == r:
+            h = ((g - b) / (hi - lo)) % 6
+        elif hi == g:
+            h = (b - r) / (hi - lo) + 2
+        else:
+            h = (r - g) / (hi - lo) + 4
+        h *= 60
+        return self.low <= h <= self.high if self.low <= self.high else h >= self.low or h <= self.high
+
+class Distance(Predicate):
+    """ Perceptual distance to a target color of at most `delta` (OKLab ΔE or CIEDE2000). """
+
+    __slots__ = ("target", "delta", "metric", "_point", "_bounds")
+    cost = 8
+
+    def __init__(self, target, delta, metric="oklab"):
+        if metric not in METRICS:
+            raise ValueError(f"unknown distance metric: {metric} (choose from {', '.join(METRICS)})")
+        self.target, self.delta, self.metric = target, delta, metric
+        dec = int(target.lstrip("#"), 16)
+        rgb = (dec >> 16, (dec >> 8) & 0xFF, dec & 0xFF)
+        if metric == "oklab":
+            self._point = rgb_to_oklab(*rgb)
+            # Each cone response l, m, s (before the cube root) may only move within these bounds.
+            self._bounds = []
+            for k, tables in enumerate(_LMS):
+                root = sum(t[c] for t, c in zip(tables, rgb)) ** (1 / 3)
+                slack = _LMS_SLACK[k] * delta
+                self._bounds.append((tables, (root - slack) ** 3 if root > slack else -1.0, (root + slack) ** 3))
+        else:
+            self._point = rgb_to_lab.__wrapped__(*rgb)
+            # CIEDE2000 is at least |ΔL*| / S_L with S_L <= 1.75, which bounds L* and therefore Y.
+            low, high = self._point[0] - 1.75 * delta, self._point[0] + 1.75 * delta
+            y_low = WHITE_Y * _lab_f_inv((low + 16) / 116) if low > 0 else -1.0
+            y_high = WHITE_Y * _lab_f_inv((high + 16) / 116)
+            self._bounds = [(_Y, y_low, y_high)]
+
+    def test(self, r, g, b):
+        if self.metric == "oklab":
+            return delta_e_ok(self._point, rgb_to_oklab(r, g, b)) <= self.delta
+        return delta_e_2000(self._point, rgb_to_lab.__wrapped__(r, g, b)) <= self.delta
+
+    def blue_ranges(self, r, g):
+        lo, hi = 0, 256
+        for (tr, tg, tb), low, high in self._bounds:
+            span = _blue_span(tb, tr[r] + tg[g], low, high)
+            lo, hi = max(lo, span[0]), min(hi, span[1])
+        return ((lo, hi),) if lo < hi else ()
+
+class All(Predicate):
+    """ Every child predicate matches. """
+
+    __slots__ = ("parts", "exact", "_tests")
+
+    def __init__(self, *parts):
+        self.parts = parts
+        self.exact = all(p.exact for p in parts)
+        self._tests = [p.test for p in sorted((p for p in parts if not p.exact), key=lambda p: p.cost)]
+
+    def test(self, r, g, b):
+        return all(p.test(r, g, b) for p in self.parts)
+
+    # Function to check only the children whose ranges are not exact (used inside already-narrowed ranges).
+    def test_rest(self, r, g, b):
+        for test in self._tests:
+            if not test(r, g, b):
+                return False
+        return True
+
+    def blue_ranges(self, r, g):
+        ranges = FULL
+        for p in self.parts:
+            ranges = _intersect(ranges, p.blue_ranges(r, g))
+            if not ranges:
+                break
+        return ranges
+
+class Any(Predicate):
+    """ At least one child predicate matches. """
+
+    __slots__ = ("parts",)
+    cost = 2
+
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def test(self, r, g, b):
+        return any(p.test(r, g, b) for p in self.parts)
+
+    def blue_ranges(self, r, g):
+        return _union([span for p in self.parts for span in p.blue_ranges(r, g)])
+
+class Not(Predicate):
+    """ The child predicate does not match. """
+
+    __slots__ = ("part",)
+
+    def __init__(self, part):
+        self.part = part
+
+    def test(self, r, g, b):
+        return not self.part.test(r, g, b)
+
+# Function to find the matches of a predicate inside one chunk [start, stop) of a red plane, as an array of indexes.
+def search_chunk(predicate, start, stop):
+    r = start >> 16
+    found = array("L")
+    if predicate.exact:
+        test = None
+    elif isinstance(predicate, All):
+        test = predicate.test_rest
+    else:
+        test = predicate.test
+    for g in range((start >> 8) & 0xFF, ((stop - 1) >> 8 & 0xFF) + 1):
+        row = (r << 16) | (g << 8)
+        first, last = max(start - row, 0), min(stop - row, 256)
+        for lo, hi in predicate.blue_ranges(r, g):
+            lo, hi = max(lo, first), min(hi, last)
+            if lo >= hi:
+                continue
+            if test is None:
+                found.extend(range(row + lo, row + hi))
+            else:
+                found.extend(row + b for b in range(lo, hi) if test(r, g, b))
+    return found
+
+# Function to run one chunk in a worker process.
+def _chunk_job(job):
+    return search_chunk(*job)
+
+# Function to yield every matching index in [start, stop) in ascending order, searching red planes in parallel.
+# `progress(done_chunks, total_chunks, matches)` is called after each chunk; `limit` stops after that many matches.
+def search(predicate, start=0, stop=COUNT, jobs=None, limit=0, progress=None):
+    chunks = [(predicate, lo, min((lo | (PLANE - 1)) + 1, stop)) for lo in
+              [start] + list(range((start | (PLANE - 1)) + 1, stop, PLANE))] if start < stop else []
+    jobs = jobs or os.cpu_count() or 1
+    pool = None
+    if jobs > 1 and len(chunks) > 1:
+        import multiprocessing  # Only needed when work is spread over processes.
+        pool = multiprocessing.Pool(jobs)
+    try:
+        results = pool.imap(_chunk_job, chunks) if pool is not None else map(_chunk_job, chunks)
+        matches = 0
+        for done, found in enumerate(results, 1):
+            for dec in found:
+                yield dec
+                matches += 1
+                if matches == limit:
+                    return
+            if progress is not None:
+                progress(done, len(chunks), matches)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+# Function to parse a "low:high" command-line bound.
+def _bound(text):
+    lo, _, hi = text.partition(":")
+    return float(lo), float(hi)
+
+# Function to parse a hex color command-line argument.
+def _hex(text):
+    code = text.lstrip("#").upper()
+    if not is_valid_hex(code):
+        raise argparse.ArgumentTypeError(f"invalid hex color: {text}")
+    return code
+
+# Function to build the predicate described by parsed command-line arguments (None when no filter was given).
+def predicate_from_args(args):
+    parts = []
+    if args.luminance:
+        parts.append(Luminance(*args.luminance))
+    if args.min_contrast is not None or args.max_contrast is not None:
+        parts.append(Contrast(args.min_contrast or 1.0, args.against, args.max_contrast or 21.0))
+    if args.hue:
+        parts.append(Hue(*args.hue))
+    if args.near:
+        parts.append(Distance(args.near, args.delta, args.metric))
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else All(*parts)
+
+# Function to run `hexplorer search` with the given command-line arguments.
+def run_search(argv=None):
+    parser = argparse.ArgumentParser(prog="hexplorer search",
+                                     description="Find every color matching luminance, contrast, hue and distance filters.")
+    parser.add_argument("--near", type=_hex, metavar="HEX", help="only colors close to this color")
+    parser.add_argument("--delta", type=float, default=5.0, help="maximum distance for --near (default: 5)")
+    parser.add_argument("--metric", choices=METRICS, default="ciede2000", help="distance metric (default: ciede2000)")
+    parser.add_argument("--min-contrast", type=float, help="minimum contrast ratio against --against")
+    parser.add_argument("--max-contrast", type=float, help="maximum contrast ratio against --against")
+    parser.add_argument("--against", type=_hex, default="FFFFFF", help="contrast reference (default: FFFFFF)")
+    parser.add_argument("--luminance", type=_bound, metavar="LOW:HIGH", help="relative luminance range (0-1)")
+    parser.add_argument("--hue", type=_bound, metavar="LOW:HIGH", help="HSL hue range in degrees (wraps when LOW > HIGH)")
+    parser.add_argument("--start", type=int, default=0, help="first decimal index to search (default: 0)")
+    parser.add_argument("--stop", type=int, default=COUNT, help=f"end of the searched range (default: {COUNT})")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many matches")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: number of CPUs)")
+    parser.add_argument("-f", "--format", choices=("hex",) + tuple(sorted(WRITERS)), default="hex",
+                        help="output format (default: hex)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--progress", action="store_true", help="report progress on stderr")
+    args = parser.parse_args(argv)
+
+    predicate = predicate_from_args(args)
+    if predicate is None:
+        parser.error("give at least one filter (--near, --min-contrast, --max-contrast, --luminance or --hue)")
+    if not 0 <= args.start <= args.stop <= COUNT:
+        parser.error(f"--start and --stop must satisfy 0 <= start <= stop <= {COUNT}")
+
+    def progress(done, total, matches):
+        print(f"\r🔎 Searching: {done * 100 // total}% ({matches} matches)", end="", file=sys.stderr, flush=True)
+
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    found = search(predicate, args.start, args.stop, args.jobs, args.limit, progress if args.progress else None)
+    try:
+        if args.format == "hex":
+            while True:
+                chunk = list(islice(found, CHUNK_SIZE))
+                if not chunk:
+                    break
+                dst.write(encode_indexes(chunk))  # A whole chunk of codes formatted in bulk.
+        else:
+            WRITERS[args.format]((get_color_metadata(f"{dec:06X}", dec) for dec in found), dst)
+        dst.flush()
+    except BrokenPipeError:
+        silence_broken_pipe()
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        found.close()  # Stops the worker pool, also after an early exit.
+        if dst is not sys.stdout:
+            dst.close()
+        if args.progress:
+            print(file=sys.stderr)
+    return 0
@@ -0,0 +1,421 @@
+"""
+Local JSON API Server.
+`hexplorer serve` answers color requests over a local TCP port or a Unix
+socket with stdlib asyncio, so other programs reuse one warm process
+instead of starting Python per color. Two framings are accepted on the
+same port:
+
+    JSON lines   one request (or a JSON array of requests) per line, one response line back
+    HTTP         POST /<op> with a JSON body (or POST / with {"op": ...}); GET /stats
+
+Requests are {"id": ..., "op": ..., ...params}; responses echo the id with
+{"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+
+    op          params                                   result
+    metadata    color                                    color metadata record
+    mix         colors: [a, b]                           mix export document (both inputs and the result)
+    gradient    stops, steps (5), space (srgb)           gradient export document
+    scheme      color                                    scheme name -> hex
+    colorblind  color, model (simple), severity (1.0)    deficiency type -> hex
+    stats       -                                        request counts, latency and cache statistics
+
+Colors are hex codes (with or without #, 3/6/8 digits) or decimal indexes.
+Serialized results are kept in a shared LRU cache keyed by the normalized
+request, bounded by entry count and total size (oversized results are not kept).
+A payload may cost at most MAX_BATCH_COST colors (a gradient counts its
+steps); payloads above INLINE_COST run on a worker thread, so a large
+gradient or batch does not hold up the other connections.
+
+    hexplorer serve --port 8765
+    printf '{"op":"metadata","color":"1A73E8"}\\n' | nc 127.0.0.1 8765
+    curl -s localhost:8765/mix -d '{"colors":["1A73E8","FF5500"]}'
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from .codec import decode
+from .core import MAX_DEC, get_color_blindness, get_color_metadata, get_scheme, mix_hex, rgb_to_hex
+from .gradient import SPACES, gradient_document
+from .instrument import Histogram
+from .writers import encode_json
+
+DEFAULT_HOST = "127.0.0.1"  # Only local clients by default.
+DEFAULT_PORT = 8765
+CACHE_SIZE = 4096  # Results kept by the shared cache.
+CACHE_MB = 64  # Total size of the serialized results kept by the shared cache, in MiB.
+MAX_REQUEST_BYTES = 1 << 20  # Longest request line or HTTP body.
+MAX_BATCH = 10000  # Requests accepted in one batch.
+MAX_GRADIENT_STEPS = 10000  # Largest gradient served in one response.
+MAX_BATCH_COST = 20000  # Work allowed per payload, in colors computed (a gradient costs its steps, ~3 KB each).
+INLINE_COST = 64  # Payloads up to this cost are answered on the event loop; larger ones on a worker thread.
+
+class RequestError(ValueError):
+    """ A request the server cannot answer (bad op or parameters); reported to the client. """
+
+# Function to normalize a color parameter (hex code or decimal index) to 6 uppercase hex digits.
+def _color(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        if not 0 <= value <= MAX_DEC:
+            raise RequestError(f"color index out of range: {value}")
+        return f"{value:06X}"
+    if isinstance(value, str):
+        try:
+            packed = decode(value)
+        except ValueError:
+            packed = b""
+        if len(packed) == 3:
+            return packed.hex().upper()
+    raise RequestError(f"invalid color: {value!r}")
+
+# Function to get a required request parameter.
+def _param(request, name):
+    if name not in request:
+        raise RequestError(f"missing parameter: {name}")
+    return request[name]
+
+# Function to answer a metadata request.
+def op_metadata(request):
+    return get_color_metadata(_color(_param(request, "color")))
+
+# Function to answer a mix request with the same document a mix export holds.
+def op_mix(request):
+    colors = _param(request, "colors")
+    if not isinstance(colors, list) or len(colors) != 2:
+        raise RequestError("colors must be a list of two colors")
+    hex1, hex2 = _color(colors[0]), _color(colors[1])
+    return {
+        "mix_input_1": get_color_metadata(hex1),
+        "mix_input_2": get_color_metadata(hex2),
+        "mixed_result": get_color_metadata(mix_hex(hex1, hex2)),
+    }
+
+# Function to answer a gradient request with the same document a gradient export holds.
+def op_gradient(request):
+    stops = _param(request, "stops")
+    steps = request.get("steps", 5)
+    space = request.get("space", "srgb")
+    if not isinstance(stops, list) or not all(isinstance(stop, str) for stop in stops):
+        raise RequestError("stops must be a list of RRGGBB or RRGGBB@position strings")
+    if not isinstance(steps, int) or not 1 <= steps <= MAX_GRADIENT_STEPS:
+        raise RequestError(f"steps must be between 1 and {MAX_GRADIENT_STEPS}")
+    if space not in SPACES:
+        raise RequestError(f"space must be one of {', '.join(SPACES)}")
+    try:
+        document = gradient_document(stops, steps, space)
+        document["colors"] = list(document["colors"])
+    except ValueError as e:
+        raise RequestError(str(e)) from None
+    return document
+
+# Function to answer a scheme request as scheme name -> hex.
+def op_scheme(request):
+    return {name: rgb_to_hex(*rgb) for name, rgb in get_scheme(_color(_param(request, "color"))).items()}
+
+# Function to answer a color blindness request as deficiency type -> hex.
+def op_colorblind(request):
+    model = request.get("model", "simple")
+    severity = request.get("severity", 1.0)
+    if not isinstance(model, str):
+        raise RequestError("model must be a string")
+    if not isinstance(severity, (int, float)) or isinstance(severity, bool):
+        raise RequestError("severity must be a number between 0 and 1")
+    # Clamp to 0..1 and round to 2 decimals so clients can't fill the simulator cache with distinct floats.
+    severity = round(min(max(float(severity), 0.0), 1.0), 2)
+    try:
+        return get_color_blindness(_color(_param(request, "color")), model, severity)
+    except ValueError as e:
+        raise RequestError(str(e)) from None
+
+# Map of cacheable operations to their handlers.
+OPERATIONS = {
+    "metadata": op_metadata,
+    "mix": op_mix,
+    "gradient": op_gradient,
+    "scheme": op_scheme,
+    "colorblind": op_colorblind,
+}
+
+# Function to estimate the work of one request in colors computed (it bounds the response size too).
+def request_cost(request):
+    if not isinstance(request, dict):
+        return 1
+    op = request.get("op")
+    if op == "gradient":
+        steps = request.get("steps", 5)
+        if isinstance(steps, int) and not isinstance(steps, bool):
+            return min(max(steps, 1), MAX_GRADIENT_STEPS)
+        return 1
+    return 3 if op == "mix" else 1
+
+# Function to estimate the work of a payload: one request or a batch of them.
+def payload_cost(payload):
+    if isinstance(payload, list):
+        return sum(request_cost(request) for request in payload)
+    return request_cost(payload)
+
+class ResultCache:
+    """ LRU cache of serialized (JSON text) results, shared by every connection and bounded by entries and bytes. """
+
+    def __init__(self, maxsize=CACHE_SIZE, max_bytes=CACHE_MB << 20):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_bytes // 16  # Larger results (huge gradients) are served but never kept.
+        self.bytes = 0  # Total length of the cached texts.
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    # Function to get a cached result (None when missing), marking it as recently used.
+    def get(self, key):
+        result = self._items.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return result
+
+    # Function to store a serialized result, evicting the least recently used ones while over either bound.
+    def put(self, key, result):
+        size = len(key) + len(result)
+        if self.maxsize <= 0 or size > self.max_item_bytes:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.bytes -= len(key) + len(old)
+        self._items[key] = result
+        self.bytes += size
+        while len(self._items) > self.maxsize or self.bytes > self.max_bytes:
+            old_key, old = self._items.popitem(last=False)
+            self.bytes -= len(old_key) + len(old)
+
+    # Function to summarize the cache as a JSON-serializable dict.
+    def to_dict(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._items), "maxsize": self.maxsize,
+                "bytes": self.bytes, "max_bytes": self.max_bytes, "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+class ColorServer:
+    """ Answers JSON color requests from any number of connections, sharing one cache and one set of stats. """
+
+    def __init__(self, cache_size=CACHE_SIZE, cache_bytes=CACHE_MB << 20):
+        self.cache = ResultCache(cache_size, cache_bytes)
+        self.lock = threading.Lock()  # Guards the cache and the counters: large payloads run on worker threads.
+        self.latency = {}  # Op -> Histogram of handling times.
+        self.errors = 0
+        self.batches = 0
+        self.connections = 0
+        self.started = time.perf_counter()
+
+    # Function to answer one request dict, returning the serialized response.
+    def handle(self, request):
+        started = time.perf_counter()
+        op = request.get("op") if isinstance(request, dict) else None
+        # Response prefix ("{" plus the echoed id); the cached result text is spliced in after it, not re-encoded.
+        head = '{"id":' + encode_json(request["id"]) + "," if isinstance(request, dict) and "id" in request else "{"
+        try:
+            if not isinstance(request, dict):
+                raise RequestError("a request must be a JSON object")
+            if not isinstance(op, str):
+                raise RequestError(f"op must be a string (choose from {', '.join(list(OPERATIONS) + ['stats'])})")
+            if op == "stats":
+                result = encode_json(self.stats())
+            elif op in OPERATIONS:
+                params = {k: v for k, v in request.items() if k not in ("id", "op")}
+                key = op + encode_json(params)  # Normalized request (JSON keeps key order, so equal requests match).
+                with self.lock:
+                    result = self.cache.get(key)
+                if result is None:
+                    result = encode_json(OPERATIONS[op](params))  # Computed and serialized outside the lock.
+                    with self.lock:
+                        self.cache.put(key, result)
+            else:
+                raise RequestError(f"unknown op: {op!r} (choose from {', '.join(list(OPERATIONS) + ['stats'])})")
+            response = f'{head}"result":{result},"ok":true}}'
+        except RequestError as e:
+            self._count_error()
+            response = f'{head}"ok":false,"error":{encode_json(str(e))}}}'
+        except Exception as e:  # A bug in one op fails that item only, not its batch or the connection.
+            self._count_error()
+            response = f'{head}"ok":false,"error":{encode_json(f"internal error: {type(e).__name__}: {e}")}}}'
+        known = isinstance(op, str) and (op in OPERATIONS or op == "stats")
+        with self.lock:
+            self.latency.setdefault(op if known else "invalid", Histogram()).add(time.perf_counter() - started)
+        return response
+
+    # Function to count one failed request or payload.
+    def _count_error(self):
+        with self.lock:
+            self.errors += 1
+
+    # Function to answer a decoded JSON payload (one request, or a batch list of them), returning the serialized response.
+    def handle_payload(self, payload):
+        if isinstance(payload, list):
+            if len(payload) > MAX_BATCH:
+                self._count_error()
+                return encode_json({"ok": False, "error": f"batch too large (max {MAX_BATCH} requests)"})
+            if payload_cost(payload) > MAX_BATCH_COST:
+                self._count_error()
+                return encode_json({"ok": False, "error": f"batch too expensive (max {MAX_BATCH_COST} colors, gradient steps included)"})
+            with self.lock:
+                self.batches += 1
+            return "[" + ",".join([self.handle(request) for request in payload]) + "]"
+        return self.handle(payload)
+
+    # Function to decode one raw JSON text into a payload, or an error response when it is not valid JSON.
+    def _decode(self, text, default_op=None):
+        try:
+            payload = json.loads(text)
+        except ValueError as e:
+            self._count_error()
+            return None, {"ok": False, "error": f"invalid JSON: {e}"}
+        if default_op is not None and isinstance(payload, dict):
+            payload.setdefault("op", default_op)
+        return payload, None
+
+    # Function to answer one raw JSON text, returning the serialized response.
+    def handle_text(self, text, default_op=None):
+        payload, error = self._decode(text, default_op)
+        return encode_json(error) if error is not None else self.handle_payload(payload)
+
+    # Function to answer one raw JSON text from the event loop: cheap payloads inline, expensive ones
+    # (large gradients and batches) on a worker thread so other connections keep being served meanwhile.
+    async def answer(self, text, default_op=None):
+        payload, error = self._decode(text, default_op)
+        if error is not None:
+            return encode_json(error)
+        if payload_cost(payload) <= INLINE_COST:
+            return self.handle_payload(payload)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.handle_payload, payload)
+
+    # Function to collect the request counts, latency, throughput and cache statistics.
+    def stats(self):
+        with self.lock:
+            return self._stats()
+
+    # Function to build the statistics dict (the caller holds the lock).
+    def _stats(self):
+        uptime = time.perf_counter() - self.started
+        requests = sum(h.count for h in self.latency.values())
+        return {
+            "uptime_s": round(uptime, 3),
+            "requests": requests,
+            "requests_per_s": round(requests / uptime, 1) if uptime > 0 else 0.0,
+            "batches": self.batches,
+            "errors": self.errors,
+            "connections": self.connections,
+            "latency": {op: {k: v for k, v in h.to_dict().items() if k != "buckets_ms"}
+                        for op, h in sorted(self.latency.items())},
+            "cache": self.cache.to_dict(),
+        }
+
+    # Function to serve one connection: JSON lines, or a single HTTP request.
+    async def serve_client(self, reader, writer):
+        self.connections += 1
+        try:
+            first = await reader.readline()
+            if first.rstrip().endswith((b" HTTP/1.0", b" HTTP/1.1")):  # HTTP request line, any method.
+                await self._serve_http(first, reader, writer)
+                return
+            line = first
+            while line:
+                if line.strip():
+                    writer.write((await self.answer(line)).encode("utf-8") + b"\n")
+                    await writer.drain()
+                line = await reader.readline()
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            pass  # Over-long line or the client went away.
+        finally:
+            writer.close()
+
+    # Function to answer one HTTP request (the connection is closed afterwards).
+    async def _serve_http(self, first, reader, writer):
+        method, path = first.decode("latin-1").split()[:2]
+        length = 0
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = header.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip() or 0)
+        op = path.strip("/").split("?")[0] or None
+        if method == "GET" and op == "stats":
+            status, body = "200 OK", encode_json({"ok": True, "result": self.stats()})
+        elif method != "POST":
+            status, body = "405 Method Not Allowed", encode_json({"ok": False, "error": "use POST (or GET /stats)"})
+        elif length > MAX_REQUEST_BYTES:
+            status, body = "413 Payload Too Large", encode_json({"ok": False, "error": "request too large"})
+        else:
+            text = (await reader.readexactly(length)).decode("utf-8", "replace")
+            status, body = "200 OK", await self.answer(text, op)
+        data = body.encode("utf-8")
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                     "Connection: close\r\n\r\n".encode("latin-1") + data)
+        await writer.drain()
+
+# Function to print the server statistics on stderr.
+def print_stats(server):
+    stats = server.stats()
+    print(f"\n📊 {stats['requests']} request(s) in {stats['uptime_s']:.1f}s ({stats['requests_per_s']:,.1f}/s),"
+          f" {stats['batches']} batch(es), {stats['errors']} error(s)", file=sys.stderr)
+    for op, h in stats["latency"].items():
+        print(f"   {op:<11} {h['count']:>8} × p50 {h['p50_ms']:.3f} ms, p99 {h['p99_ms']:.3f} ms", file=sys.stderr)
+    cache = stats["cache"]
+    print(f"🗃️  Cache: {cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate']:.0%}),"
+          f" {cache['size']} kept in {cache['bytes'] / (1 << 20):.1f} MiB", file=sys.stderr)
+
+# Function to run `hexplorer serve` with the given command-line arguments.
+def run_serve(argv=None):
+    parser = argparse.ArgumentParser(prog="hexplorer serve", description="Serve color requests as JSON over a local socket.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"TCP address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--unix", metavar="PATH", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help=f"results kept in the cache (default: {CACHE_SIZE})")
+    parser.add_argument("--cache-mb", type=int, default=CACHE_MB, help=f"total size of the cached results in MiB (default: {CACHE_MB})")
+    args = parser.parse_args(argv)
+
+    server = ColorServer(args.cache_size, max(args.cache_mb, 0) << 20)
+    loop = asyncio.new_event_loop()
+    try:
+        if args.unix:
+            if os.path.exists(args.unix):
+                os.remove(args.unix)  # Stale socket from an earlier run.
+            listener = loop.run_until_complete(
+                asyncio.start_unix_server(server.serve_client, args.unix, limit=MAX_REQUEST_BYTES))
+            where = args.unix
+        else:
+            listener = loop.run_until_complete(
+                asyncio.start_server(server.serve_client, args.host, args.port, limit=MAX_REQUEST_BYTES))
+            where = f"{args.host}:{args.port}"
+    except OSError as e:
+        print(f"❌ Cannot listen on {args.unix or f'{args.host}:{args.port}'}: {e}", file=sys.stderr)
+        loop.close()
+        return 1
+
+    try:
+        loop.add_signal_handler(signal.SIGTERM, loop.stop)  # Stop cleanly (and print stats) under a service manager.
+    except (NotImplementedError, AttributeError):
+        pass  # No signal handlers in this event loop (Windows).
+    print(f"🛰️  Serving On {where} (Ctrl+C To Stop)", file=sys.stderr)
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        loop.run_until_complete(listener.wait_closed())
+        loop.close()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+        print_stats(server)
+    return 0
@@ -0,0 +1,240 @@
+"""
+Color Space Conversions And Distances.
+sRGB <-> linear RGB, OKLab, CIELAB (D65) and HSL, working on 0-255 channel
+bytes. Decoding uses the precomputed 256-entry linearization table, and the
+per-color conversions used for distances are memoized in bounded LRU caches.
+Distances are OKLab ΔE (Euclidean) and CIEDE2000, one pair at a time or in
+bulk: condensed/rectangular distance matrices and thresholded near pairs.
+"""
+
+import math
+from array import array
+from functools import lru_cache
+
+from .tables import LINEAR
+
+CACHE_SIZE = 1 << 16  # Colors kept by each conversion cache.
+METRICS = ("oklab", "ciede2000")  # Supported distance metrics.
+
+# D65 reference white in XYZ, for CIELAB.
+WHITE_X, WHITE_Y, WHITE_Z = 0.95047, 1.0, 1.08883
+
+# Function to encode one linear channel value back to an sRGB byte (rounded and clamped).
+def linear_to_byte(x):
+    if x <= 0.0031308:
+        v = 12.92 * x
+    else:
+        v = 1.055 * x ** (1 / 2.4) - 0.055
+    v = int(v * 255 + 0.5)
+    return 0 if v < 0 else 255 if v > 255 else v
+
+# Function to convert sRGB bytes to linear RGB floats.
+def rgb_to_linear(r, g, b):
+    return LINEAR[r], LINEAR[g], LINEAR[b]
+
+# Function to convert linear RGB floats to sRGB bytes.
+def linear_to_rgb(lr, lg, lb):
+    return linear_to_byte(lr), linear_to_byte(lg), linear_to_byte(lb)
+
+# Function to convert linear RGB floats to OKLab (L, a, b).
+def linear_to_oklab(lr, lg, lb):
+    l = (0.4122214708 * lr + 0.5363325363 * lg + 0.0514459929 * lb) ** (1 / 3)
+    m = (0.2119034982 * lr + 0.6806995451 * lg + 0.1073969566 * lb) ** (1 / 3)
+    s = (0.0883024619 * lr + 0.2817188376 * lg + 0.6299787005 * lb) ** (1 / 3)
+    return (0.2104542553 * l + 0.7936177850 * m - 0.0040720468 * s,
+            1.9779984951 * l - 2.4285922050 * m + 0.4505937099 * s,
+            0.0259040371 * l + 0.7827717662 * m - 0.8086757660 * s)
+
+# Function to convert OKLab (L, a, b) to linear RGB floats (may fall outside 0-1 for out-of-gamut colors).
+def oklab_to_linear(L, a, b):
+    l = (L + 0.3963377774 * a + 0.2158037573 * b) ** 3
+    m = (L - 0.1055613458 * a - 0.0638541728 * b) ** 3
+    s = (L - 0.0894841775 * a - 1.2914855480 * b) ** 3
+    return (4.0767416621 * l - 3.3077115913 * m + 0.2309699292 * s,
+            -1.2684380046 * l + 2.6097574011 * m - 0.3413193965 * s,
+            -0.0041960863 * l - 0.7034186147 * m + 1.7076147010 * s)
+
+# Function to convert sRGB bytes to OKLab.
+def rgb_to_oklab(r, g, b):
+    return linear_to_oklab(LINEAR[r], LINEAR[g], LINEAR[b])
+
+# Function to convert OKLab to sRGB bytes (clamped to the sRGB gamut).
+def oklab_to_rgb(L, a, b):
+    return linear_to_rgb(*oklab_to_linear(L, a, b))
+
+# Function to convert linear RGB floats to CIE XYZ (D65).
+def linear_to_xyz(lr, lg, lb):
+    return (0.4124564 * lr + 0.3575761 * lg + 0.1804375 * lb,
+            0.2126729 * lr + 0.7151522 * lg + 0.0721750 * lb,
+            0.0193339 * lr + 0.1191920 * lg + 0.9503041 * lb)
+
+# Function to convert CIE XYZ (D65) to linear RGB floats.
+def xyz_to_linear(x, y, z):
+    return (3.2404542 * x - 1.5371385 * y - 0.4985314 * z,
+            -0.9692660 * x + 1.8760108 * y + 0.0415560 * z,
+            0.0556434 * x - 0.2040259 * y + 1.0572252 * z)
+
+# Function to apply the CIELAB companding curve to one normalized XYZ component.
+def _lab_f(t):
+    return t ** (1 / 3) if t > 216 / 24389 else (24389 / 27 * t + 16) / 116
+
+# Function to undo the CIELAB companding curve.
+def _lab_f_inv(t):
+    return t ** 3 if t ** 3 > 216 / 24389 else (116 * t - 16) * 27 / 24389
+
+# Function to convert sRGB bytes to CIELAB (L*, a*, b*), memoized.
+@lru_cache(maxsize=CACHE_SIZE)
+def rgb_to_lab(r, g, b):
+    x, y, z = linear_to_xyz(LINEAR[r], LINEAR[g], LINEAR[b])
+    fx, fy, fz = _lab_f(x / WHITE_X), _lab_f(y / WHITE_Y), _lab_f(z / WHITE_Z)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+# Function to convert CIELAB to sRGB bytes (clamped to the sRGB gamut).
+def lab_to_rgb(L, a, b):
+    fy = (L + 16) / 116
+    x = WHITE_X * _lab_f_inv(fy + a / 500)
+    y = WHITE_Y * _lab_f_inv(fy)
+    z = WHITE_Z * _lab_f_inv(fy - b / 200)
+    return linear_to_rgb(*xyz_to_linear(x, y, z))
+
+# Function to convert sRGB bytes to OKLab, memoized (for repeated distance queries).
+@lru_cache(maxsize=CACHE_SIZE)
+def rgb_to_oklab_cached(r, g, b):
+    return linear_to_oklab(LINEAR[r], LINEAR[g], LINEAR[b])
+
+# Function to convert sRGB bytes to HSL: hue in degrees [0, 360), saturation and lightness in [0, 1].
+@lru_cache(maxsize=CACHE_SIZE)
+def rgb_to_hsl(r, g, b):
+    hi, lo = max(r, g, b), min(r, g, b)
+    l = (hi + lo) / 510
+    if hi == lo:
+        return 0.0, 0.0, l  # Gray: no hue.
+    d = (hi - lo) / 255
+    s = d / (1 - abs(2 * l - 1))
+    if hi == r:
+        h = ((g - b) / (hi - lo)) % 6
+    elif hi == g:
+        h = (b - r) / (hi - lo) + 2
+    else:
+        h = (r - g) / (hi - lo) + 4
+    return h * 60.0, min(s, 1.0), l
+
+# Function to convert HSL (hue in degrees) to sRGB bytes.
+def hsl_to_rgb(h, s, l):
+    c = (1 - abs(2 * l - 1)) * s
+    h = (h % 360) / 60
+    x = c * (1 - abs(h % 2 - 1))
+    m = l - c / 2
+    r, g, b = ((c, x, 0), (x, c, 0), (0, c, x), (0, x, c), (x, 0, c), (c, 0, x))[int(h) % 6]
+    return int((r + m) * 255 + 0.5), int((g + m) * 255 + 0.5), int((b + m) * 255 + 0.5)
+
+# Function to rotate the hue of a color by some degrees in HSL, keeping saturation and lightness.
+def rotate_hue(r, g, b, degrees):
+    h, s, l = rgb_to_hsl(r, g, b)
+    return hsl_to_rgb(h + degrees, s, l)
+
+# Function to compute the OKLab ΔE (Euclidean distance) between two OKLab colors.
+def delta_e_ok(lab1, lab2):
+    return math.sqrt((lab1[0] - lab2[0]) ** 2 + (lab1[1] - lab2[1]) ** 2 + (lab1[2] - lab2[2]) ** 2)
+
+# Function to compute the CIEDE2000 color difference between two CIELAB colors.
+def delta_e_2000(lab1, lab2):
+    L1, a1, b1 = lab1
+    L2, a2, b2 = lab2
+    c_bar = (math.hypot(a1, b1) + math.hypot(a2, b2)) / 2
+    c7 = c_bar ** 7
+    g = 0.5 * (1 - math.sqrt(c7 / (c7 + 25 ** 7)))
+    a1p, a2p = a1 * (1 + g), a2 * (1 + g)
+    c1p, c2p = math.hypot(a1p, b1), math.hypot(a2p, b2)
+    h1p = math.degrees(math.atan2(b1, a1p)) % 360 if c1p else 0.0
+    h2p = math.degrees(math.atan2(b2, a2p)) % 360 if c2p else 0.0
+
+    dl = L2 - L1
+    dc = c2p - c1p
+    if c1p * c2p == 0:
+        dh = 0.0
+    elif abs(h2p - h1p) <= 180:
+        dh = h2p - h1p
+    elif h2p - h1p > 180:
+        dh = h2p - h1p - 360
+    else:
+        dh = h2p - h1p + 360
+    dH = 2 * math.sqrt(c1p * c2p) * math.sin(math.radians(dh / 2))
+
+    l_bar = (L1 + L2) / 2
+    cp_bar = (c1p + c2p) / 2
+    if c1p * c2p == 0:
+        hp_bar = h1p + h2p
+    elif abs(h1p - h2p) <= 180:
+        hp_bar = (h1p + h2p) / 2
+    elif h1p + h2p < 360:
+        hp_bar = (h1p + h2p + 360) / 2
+    else:
+        hp_bar = (h1p + h2p - 360) / 2
+    t = (1 - 0.17 * math.cos(math.radians(hp_bar - 30)) + 0.24 * math.cos(math.radians(2 * hp_bar))
+         + 0.32 * math.cos(math.radians(3 * hp_bar + 6)) - 0.20 * math.cos(math.radians(4 * hp_bar - 63)))
+    sl = 1 + 0.015 * (l_bar - 50) ** 2 / math.sqrt(20 + (l_bar - 50) ** 2)
+    sc = 1 + 0.045 * cp_bar
+    sh = 1 + 0.015 * cp_bar * t
+    cp7 = cp_bar ** 7
+    rt = (-2 * math.sqrt(cp7 / (cp7 + 25 ** 7))
+          * math.sin(math.radians(60 * math.exp(-((hp_bar - 275) / 25) ** 2))))
+    return math.sqrt((dl / sl) ** 2 + (dc / sc) ** 2 + (dH / sh) ** 2 + rt * (dc / sc) * (dH / sh))
+
+# Function to turn a color ("RRGGBB", "#RRGGBB" or an (r, g, b) tuple) into its coordinates for a metric.
+def _point(color, metric):
+    if isinstance(color, str):
+        dec = int(color.lstrip("#"), 16)
+        color = (dec >> 16, (dec >> 8) & 0xFF, dec & 0xFF)
+    return rgb_to_oklab_cached(*color) if metric == "oklab" else rgb_to_lab(*color)
+
+# Function to pick the per-pair distance function of a metric.
+def _metric(metric):
+    if metric not in METRICS:
+        raise ValueError(f"unknown distance metric: {metric} (choose from {', '.join(METRICS)})")
+    return delta_e_ok if metric == "oklab" else delta_e_2000
+
+# Function to compute the distance between two colors (hex codes or RGB tuples).
+def delta_e(color1, color2, metric="oklab"):
+    return _metric(metric)(_point(color1, metric), _point(color2, metric))
+
+# Function to compute the pairwise distances of a palette (condensed upper triangle, like scipy's pdist),
+# or with `others`, the full len(colors) x len(others) matrix in row-major order. Returns an array('d').
+def distance_matrix(colors, others=None, metric="oklab"):
+    dist = _metric(metric)
+    points = [_point(c, metric) for c in colors]
+    out = array("d")
+    if others is None:
+        for i, p in enumerate(points):
+            out.extend(dist(p, q) for q in points[i + 1:])
+    else:
+        targets = [_point(c, metric) for c in others]
+        for p in points:
+            out.extend(dist(p, q) for q in targets)
+    return out
+
+# Function to yield (i, j, distance) for every pair of colors closer than `threshold` (j > i), or with
+# `others`, every (i in colors, j in others) pair. Points are swept in lightness order and only pairs whose
+# lightness difference could still be within the threshold are compared, so sparse matches stay cheap.
+def near_pairs(colors, threshold, others=None, metric="oklab"):
+    dist = _metric(metric)
+    # Both metrics are bounded below by the lightness difference (CIEDE2000 by |ΔL| / S_L, with S_L <= 1.75).
+    window = threshold if metric == "oklab" else threshold * 1.75
+    points = [(p[0], 0, i, p) for i, p in enumerate(_point(c, metric) for c in colors)]
+    if others is not None:
+        points += [(p[0], 1, j, p) for j, p in enumerate(_point(c, metric) for c in others)]
+    points.sort(key=lambda e: e[0])
+    count = len(points)
+    for k, (l1, side1, i, p) in enumerate(points):
+        for m in range(k + 1, count):  # By index: slicing would copy the rest of the list for every point.
+            l2, side2, j, q = points[m]
+            if l2 - l1 > window:
+                break
+            if others is not None and side1 == side2:
+                continue
+            d = dist(p, q)
+            if d <= threshold:
+                if others is None:
+                    yield (i, j, d) if i < j else (j, i, d)
+                else:
+                    yield (i, j, d) if side1 == 0 else (j, i, d)
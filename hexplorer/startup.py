@@ -0,0 +1,53 @@
+"""
+Startup-Time Budget.
+Measures the cold start of `import hexplorer` and `hexplorer --version` in
+fresh interpreters and checks them against the budget below. Times are
+the best of several runs, minus the cost of starting a bare interpreter.
+
+    python -m hexplorer.startup
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+# Budget per command, in milliseconds on top of a bare `python -c pass`.
+STARTUP_BUDGET_MS = {
+    "import hexplorer": 5.0,
+    "hexplorer --version": 40.0,
+}
+
+# Command line measured for each budget entry.
+COMMANDS = {
+    "import hexplorer": [sys.executable, "-c", "import hexplorer"],
+    "hexplorer --version": [sys.executable, "-m", "hexplorer", "--version"],
+}
+
+# Function to time one run of a command in milliseconds.
+def _run_ms(cmd, env):
+    start = time.perf_counter()
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True, env=env)
+    return (time.perf_counter() - start) * 1000
+
+# Function to measure every budgeted command, returning name -> milliseconds over a bare interpreter.
+def measure_startup(runs=10):
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # Let the first run cache bytecode, as an installed package would.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = root + os.pathsep + env.get("PYTHONPATH", "")  # Measure this checkout.
+    baseline = min(_run_ms([sys.executable, "-c", "pass"], env) for _ in range(runs))
+    return {name: max(min(_run_ms(cmd, env) for _ in range(runs)) - baseline, 0.0)
+            for name, cmd in COMMANDS.items()}
+
+# Function to compare measurements with the budget, returning (name, measured_ms, budget_ms, ok) rows.
+def check_startup(runs=10):
+    measured = measure_startup(runs)
+    return [(name, ms, STARTUP_BUDGET_MS[name], ms <= STARTUP_BUDGET_MS[name]) for name, ms in measured.items()]
+
+if __name__ == "__main__":
+    failed = False
+    for name, ms, budget, ok in check_startup():
+        failed = failed or not ok
+        print(f"{'✅' if ok else '❌'} {name:<22} {ms:7.1f} ms  (budget {budget:.0f} ms)")
+    sys.exit(1 if failed else 0)
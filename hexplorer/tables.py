@@ -0,0 +1,89 @@
+"""
+Precomputed Luminance And Contrast Tables.
+The sRGB linearization (`** 2.4` per channel) only ever sees 256 inputs,
+so it is computed once here and every hot path does table lookups instead.
+An optional compact array holds the relative luminance of all 16,777,216
+colors for whole-space scans.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+MAX_DEC = 16777215  # Largest 24-bit color index (0xFFFFFF).
+
+# Function to linearize one normalized sRGB channel (same formula as `main.lum_comp`).
+def _linearize(c):
+    return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
+
+# 256-entry linearization table: LINEAR[v] is the linear value of channel byte v.
+LINEAR = tuple(_linearize(v / 255) for v in range(256))
+
+# Per-channel luminance contributions, already multiplied by the Rec. 709 weights.
+LUM_R = tuple(0.2126 * v for v in LINEAR)
+LUM_G = tuple(0.7152 * v for v in LINEAR)
+LUM_B = tuple(0.0722 * v for v in LINEAR)
+
+# Function to get the relative luminance of an RGB color with three lookups.
+def relative_luminance(r, g, b):
+    return LUM_R[r] + LUM_G[g] + LUM_B[b]
+
+# Function to get the relative luminance of a color by its decimal index.
+def luminance_of(dec):
+    return LUM_R[dec >> 16] + LUM_G[(dec >> 8) & 0xFF] + LUM_B[dec & 0xFF]
+
+# Function to compute the WCAG contrast ratio between two luminance values.
+def contrast_ratio(l1, l2):
+    if l1 < l2:
+        l1, l2 = l2, l1
+    return (l1 + 0.05) / (l2 + 0.05)
+
+# Function to get the luminance bounds a color must fall outside of to reach `min_ratio` against `lum`.
+# Returns (darker_max, lighter_min): passing colors have luminance <= darker_max or >= lighter_min.
+def contrast_bounds(lum, min_ratio):
+    darker_max = (lum + 0.05) / min_ratio - 0.05
+    lighter_min = min_ratio * (lum + 0.05) - 0.05
+    return darker_max, lighter_min
+
+_luminance_table = None  # Built on first use by `luminance_table()`.
+
+# Function to get (building once) a float32 array with the relative luminance of every color index.
+# The array takes 64 MB, so it is only built when a caller actually asks for it.
+def luminance_table():
+    global _luminance_table
+    if _luminance_table is None:
+        table = array("f")
+        gb = [lg + lb for lg in LUM_G for lb in LUM_B]  # Green+blue part, shared by every red plane.
+        for lr in LUM_R:
+            table.extend([lr + v for v in gb])
+        _luminance_table = table
+    return _luminance_table
+
+# Function to yield (start, stop) decimal index runs of every color with contrast >= `min_ratio` against `lum`.
+# Luminance grows with each channel, so for a fixed red and green the passing blues are a
+# prefix and/or a suffix of 0..255 and can be found with two bisections instead of a scan.
+def contrast_ranges(lum, min_ratio=4.5):
+    darker_max, lighter_min = contrast_bounds(lum, min_ratio)
+    for r in range(256):
+        lr = LUM_R[r]
+        for g in range(256):
+            base = lr + LUM_G[g]
+            dec = (r << 16) | (g << 8)
+            dark_end = bisect_right(LUM_B, darker_max - base)  # Blues 0..dark_end-1 are dark enough.
+            light_start = bisect_left(LUM_B, lighter_min - base)  # Blues light_start..255 are light enough.
+            if dark_end >= light_start:  # Both sides overlap: the whole row passes.
+                yield dec, dec + 256
+                continue
+            if dark_end:
+                yield dec, dec + dark_end
+            if light_start < 256:
+                yield dec + light_start, dec + 256
+
+# Function to count the colors with contrast >= `min_ratio` against `lum`.
+def count_contrast(lum, min_ratio=4.5):
+    return sum(stop - start for start, stop in contrast_ranges(lum, min_ratio))
+
+# Function to scan the precomputed luminance array for indexes with contrast >= `min_ratio` against `lum`.
+def scan_contrast(lum, min_ratio=4.5, table=None):
+    darker_max, lighter_min = contrast_bounds(lum, min_ratio)
+    table = luminance_table() if table is None else table
+    return [i for i, v in enumerate(table) if v <= darker_max or v >= lighter_min]
@@ -0,0 +1,300 @@
+"""
+Terminal Color Capability And Downsampling.
+Detects whether the terminal takes 24-bit colors, the xterm 256-color
+palette or only the 16 ANSI colors, and maps every 24-bit color to its
+perceptually nearest palette entry (OKLab distance) for the smaller modes.
+
+The mapping is a 16,777,216-entry byte table per palette, built once
+(`hexplorer term build`), cached next to the color index and memory-mapped,
+so a swatch or grid cell costs one index. Until a table is built, colors
+are matched on the fly and memoized.
+
+    hexplorer term              # Detected mode and table status.
+    hexplorer term build        # Build both tables (~16 MiB each).
+    hexplorer term show 1A73E8  # Nearest 256- and 16-color entries, side by side.
+
+$HEXPLORER_COLOR (truecolor, 256 or 16) overrides detection.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+from .index import default_cache_dir
+from .spaces import rgb_to_oklab
+
+MODES = ("truecolor", "256", "16")  # Terminal color modes, richest first.
+COUNT = 1 << 24  # Entries in a downsampling table.
+BLOCK = 4  # Build step: colors on this lattice are matched exactly, blocks between them are filled when they agree.
+
+MAGIC = b"HEXTERM2"  # Table file signature (bumped when the matching changes, so stale tables are rebuilt).
+HEADER = struct.Struct("<8sH6x")  # Magic and palette size; the 16M-entry table follows.
+
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)  # Channel values of the xterm 6x6x6 color cube (entries 16-231).
+GRAY_LEVELS = tuple(8 + 10 * k for k in range(24))  # Gray ramp (entries 232-255).
+
+# The 16 ANSI colors with xterm's default values (terminal themes may differ).
+ANSI16 = (
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0), (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0), (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+)
+
+# Terminals known to take 24-bit colors even without $COLORTERM, by $TERM_PROGRAM or $TERM.
+TRUECOLOR_PROGRAMS = ("iTerm.app", "WezTerm", "vscode", "Hyper", "ghostty")
+TRUECOLOR_TERMS = ("xterm-kitty", "alacritty", "wezterm", "foot", "xterm-ghostty")
+
+# Function to get the RGB value of an xterm-256 palette entry.
+def xterm_rgb(n):
+    if n < 16:
+        return ANSI16[n]
+    if n < 232:
+        n -= 16
+        return CUBE_LEVELS[n // 36], CUBE_LEVELS[n // 6 % 6], CUBE_LEVELS[n % 6]
+    v = GRAY_LEVELS[n - 232]
+    return v, v, v
+
+# OKLab coordinates of every palette entry; the 256-color mode only uses the fixed entries 16-255,
+# since the first 16 follow the terminal theme.
+_OKLAB = tuple(rgb_to_oklab(*xterm_rgb(n)) for n in range(256))
+_GRAY_L = [_OKLAB[n][0] for n in range(232, 256)]  # OKLab lightness of the gray ramp, ascending.
+_BY_L = sorted(range(16, 256), key=lambda n: _OKLAB[n][0])  # Fixed entries in OKLab lightness order.
+_SORTED_L = [_OKLAB[n][0] for n in _BY_L]
+
+# Function to detect the color mode of the terminal from the environment.
+def detect_color_mode(environ=None):
+    env = os.environ if environ is None else environ
+    forced = env.get("HEXPLORER_COLOR", "").lower()
+    if forced in MODES:
+        return forced
+    term = env.get("TERM", "").lower()
+    if env.get("COLORTERM", "").lower() in ("truecolor", "24bit"):
+        return "truecolor"
+    if (env.get("TERM_PROGRAM") in TRUECOLOR_PROGRAMS or term in TRUECOLOR_TERMS or term.endswith("-direct")
+            or "WT_SESSION" in env or "com.termux" in env.get("PREFIX", "")):  # Windows Terminal and Termux too.
+        return "truecolor"
+    if "256color" in term:  # xterm-256color, screen-256color, tmux-256color, ...
+        return "256"
+    return "16"  # linux console, vt100, screen, serial lines and unknown terminals.
+
+# Function to find the palette entry nearest to OKLab coordinates, among the given candidates.
+def _nearest(lab, candidates):
+    L, A, B = lab
+    best, best_d = 0, 9.0
+    for n in candidates:
+        l2, a2, b2 = _OKLAB[n]
+        d = (L - l2) ** 2 + (A - a2) ** 2 + (B - b2) ** 2
+        if d < best_d:
+            best, best_d = n, d
+    return best
+
+# Function to list the xterm-256 entries likely to be nearest a color: the cube corners around it and the two grays
+# around its OKLab lightness. Only a first guess: `_nearest_256` checks every entry that could still be closer.
+def _candidates_256(r, g, b, L):
+    axes = []
+    for v in (r, g, b):
+        i = bisect_right(CUBE_LEVELS, v) - 1
+        axes.append((i, i + 1) if i < 5 else (5,))
+    cube = [16 + 36 * i + 6 * j + k for i in axes[0] for j in axes[1] for k in axes[2]]
+    k = min(max(bisect_right(_GRAY_L, L), 1), 23)
+    return cube + [231 + k, 232 + k]
+
+# Function to find the xterm-256 entry (16-255) nearest to a color, exactly: the first guess bounds the distance,
+# and only entries whose lightness alone is within that distance are compared (ties go to the lowest entry).
+def _nearest_256(lab, r, g, b):
+    L, A, B = lab
+    best = _nearest(lab, _candidates_256(r, g, b, L))
+    l2, a2, b2 = _OKLAB[best]
+    best_d = (L - l2) ** 2 + (A - a2) ** 2 + (B - b2) ** 2
+    reach = best_d ** 0.5
+    for n in _BY_L[bisect_left(_SORTED_L, L - reach):bisect_right(_SORTED_L, L + reach)]:
+        l2, a2, b2 = _OKLAB[n]
+        d = (L - l2) ** 2 + (A - a2) ** 2 + (B - b2) ** 2
+        if d < best_d or (d == best_d and n < best):
+            best, best_d = n, d
+    return best
+
+# Function to find the palette entry nearest to a 24-bit color, without a table.
+def nearest_entry(dec, mode):
+    r, g, b = dec >> 16, (dec >> 8) & 0xFF, dec & 0xFF
+    lab = rgb_to_oklab(r, g, b)
+    return _nearest_256(lab, r, g, b) if mode == "256" else _nearest(lab, range(16))
+
+# Function to get the default path of a downsampling table.
+def default_table_path(mode):
+    return os.path.join(default_cache_dir(), f"term{mode}.lut")
+
+# Lattice values for the build: every BLOCK-th channel value, the last block ending on 255.
+_POINTS = tuple(range(0, 256, BLOCK)) + (255,)
+
+# Function to match every lattice point of one red lattice value, as a (green, blue) grid of entries.
+def _lattice_plane(mode, r):
+    return bytes(nearest_entry((r << 16) | (g << 8) | b, mode) for g in _POINTS for b in _POINTS)
+
+# Function to build one slab of the table: the BLOCK red planes starting at lattice step `i`.
+# A BLOCK³ cube whose eight lattice corners share an entry is filled with it; any other cube is matched color by color.
+def _build_slab(args):
+    mode, i = args
+    size = len(_POINTS)
+    low, high = _lattice_plane(mode, _POINTS[i]), _lattice_plane(mode, _POINTS[i + 1])
+    r0 = _POINTS[i]
+    slab = bytearray(BLOCK << 16)
+    for j in range(size - 1):
+        g0 = _POINTS[j]
+        for k in range(size - 1):
+            b0 = _POINTS[k]
+            lo, lo2 = j * size + k, (j + 1) * size + k  # Corners at (g0, b0) and (g1, b0) in each lattice plane.
+            c = low[lo]
+            if (low[lo + 1] == c and low[lo2] == c and low[lo2 + 1] == c and high[lo] == c and
+                    high[lo + 1] == c and high[lo2] == c and high[lo2 + 1] == c):
+                run = bytes((c,)) * BLOCK
+                for dr in range(BLOCK):
+                    for g in range(g0, g0 + BLOCK):
+                        start = (dr << 16) | (g << 8) | b0
+                        slab[start:start + BLOCK] = run
+            else:
+                for dr in range(BLOCK):
+                    for g in range(g0, g0 + BLOCK):
+                        start = (dr << 16) | (g << 8)
+                        base = ((r0 + dr) << 16) | (g << 8)
+                        for b in range(b0, b0 + BLOCK):
+                            slab[start | b] = nearest_entry(base | b, mode)
+    return bytes(slab)
+
+# Function to build the table of one mode (256 or 16) as a 16M-entry bytearray, spread over `jobs` processes.
+def build_table(mode, jobs=None, progress=None):
+    if mode not in ("256", "16"):
+        raise ValueError(f"no downsampling table for mode: {mode}")
+    slabs = [(mode, i) for i in range(len(_POINTS) - 1)]
+    jobs = jobs or os.cpu_count() or 1
+    pool = None
+    if jobs > 1:
+        import multiprocessing  # Only needed when work is spread over processes.
+        pool = multiprocessing.Pool(jobs)
+    try:
+        table = bytearray(COUNT)
+        results = pool.imap(_build_slab, slabs) if pool is not None else map(_build_slab, slabs)
+        for i, slab in enumerate(results):
+            start = _POINTS[i] << 16
+            table[start:start + len(slab)] = slab
+            if progress is not None:
+                progress(i + 1, len(slabs))
+        return table
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+# Function to build a table and write it to `path` (a temp file, then moved into place).
+def write_table(mode, path=None, jobs=None, progress=None):
+    path = path or default_table_path(mode)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    table = build_table(mode, jobs, progress)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, int(mode)))
+        f.write(table)
+    os.replace(tmp, path)
+    return path
+
+# Function to memory-map a table file, returning None when it is missing or invalid.
+def open_table(mode, path=None):
+    path = path or default_table_path(mode)
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(mapped) != HEADER.size + COUNT or HEADER.unpack_from(mapped) != (MAGIC, int(mode)):
+        mapped.close()
+        return None
+    return mapped
+
+# Function to build the SGR escape for a palette entry as foreground or background.
+def _escape(n, mode, background):
+    if mode == "256":
+        return f"\033[{48 if background else 38};5;{n}m"
+    base = (40 if background else 30) if n < 8 else (100 if background else 90)
+    return f"\033[{base + n % 8}m"
+
+class Downsampler:
+    """ Maps 24-bit colors to a 256- or 16-color palette: one table index when the table is built, else memoized. """
+
+    __slots__ = ("mode", "_table", "fg_escapes", "bg_escapes", "entry")
+
+    def __init__(self, mode, path=None):
+        if mode not in ("256", "16"):
+            raise ValueError(f"no downsampling for mode: {mode}")
+        self.mode = mode
+        self._table = open_table(mode, path)
+        size = 256 if mode == "256" else 16
+        self.fg_escapes = tuple(_escape(n, mode, False) for n in range(size))  # Escapes, precomputed per entry.
+        self.bg_escapes = tuple(_escape(n, mode, True) for n in range(size))
+        if self._table is not None:
+            table, offset = self._table, HEADER.size
+            self.entry = lambda dec: table[offset + dec]  # Nearest palette entry of a 24-bit color.
+        else:
+            self.entry = lru_cache(maxsize=1 << 16)(lambda dec: nearest_entry(dec, mode))
+
+    # Function to tell whether the memory-mapped table is in use.
+    @property
+    def mapped(self):
+        return self._table is not None
+
+    # Function to get the foreground escape for a 24-bit color.
+    def fg(self, dec):
+        return self.fg_escapes[self.entry(dec)]
+
+    # Function to get the background escape for a 24-bit color.
+    def bg(self, dec):
+        return self.bg_escapes[self.entry(dec)]
+
+# Function to get the shared downsampler of a mode (None for truecolor).
+@lru_cache(maxsize=None)
+def downsampler(mode):
+    return None if mode == "truecolor" else Downsampler(mode)
+
+# Function to run `hexplorer term` with the given command-line arguments.
+def run_term(argv=None):
+    parser = argparse.ArgumentParser(prog="hexplorer term", description="Terminal color mode and downsampling tables.")
+    sub = parser.add_subparsers(dest="action")
+    sub.add_parser("info", help="show the detected color mode and table status (default)")
+    build = sub.add_parser("build", help="build the downsampling tables")
+    build.add_argument("--mode", choices=("256", "16", "all"), default="all", help="table to build (default: all)")
+    build.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                       help="worker processes (default: number of CPUs)")
+    show = sub.add_parser("show", help="show the nearest palette entries of colors")
+    show.add_argument("colors", nargs="+", metavar="HEX")
+    args = parser.parse_args(argv)
+
+    if args.action == "build":
+        for mode in (("256", "16") if args.mode == "all" else (args.mode,)):
+            def progress(done, total, mode=mode):
+                print(f"\r🔨 Building {mode}-color table: {done * 100 // total}%", end="", file=sys.stderr, flush=True)
+            path = write_table(mode, jobs=args.jobs, progress=progress)
+            print(f"\n✅ Saved {path}", file=sys.stderr)
+        return 0
+    if args.action == "show":
+        for text in args.colors:
+            code = text.lstrip("#").upper()
+            try:
+                dec = int(code, 16) if len(code) == 6 else -1
+            except ValueError:
+                dec = -1
+            if not 0 <= dec < COUNT:
+                print(f"❌ Invalid HEX: {text}", file=sys.stderr)
+                return 2
+            parts = [f"#{code}  \033[48;2;{dec >> 16};{(dec >> 8) & 0xFF};{dec & 0xFF}m      \033[0m truecolor"]
+            for mode in ("256", "16"):
+                n = downsampler(mode).entry(dec)
+                parts.append(f"{downsampler(mode).bg(dec)}      \033[0m {mode}: {n:>3} (#{'%02X%02X%02X' % xterm_rgb(n)})")
+            print("   ".join(parts))
+        return 0
+    print(f"🖥️  Detected Color Mode: {detect_color_mode()}")
+    for mode in ("256", "16"):
+        path = default_table_path(mode)
+        state = "built" if open_table(mode) is not None else "not built (colors are matched on the fly)"
+        print(f"   {mode:>3}-color table: {path} ({state})")
+    return 0
@@ -0,0 +1,238 @@
+"""
+High-Throughput Color Walks.
+Streams colors along a path instead of one index per prompt: from index A
+to index B at any stride, around the hue circle, or up a luminance ramp
+(keeping the start color's hue and saturation). The path is cut into
+windows of WINDOW colors; each window is formatted in one pass (one
+template per record, luminance from the per-channel tables) and written
+with a single call, while the next windows are already being prepared -
+by a worker pool with `-j`, or by a prefetch thread otherwise.
+
+    hexplorer walk 000000 FFFFFF --stride 7 -o walk.jsonl      # Every 7th color, as JSONL.
+    hexplorer walk 1A73E8 --axis hue --stride 10              # A full turn of the hue circle, 10 degrees apart.
+    hexplorer walk 1A73E8 --axis luminance --stride 0.05      # Same hue and saturation, luminance 0 -> 1.
+
+Records hold hex, decimal_index, r, g, b, luminance and contrast vs white
+(plus the nearest name with --names, which is slower).
+"""
+
+import argparse
+import json
+import sys
+from itertools import islice
+
+from .codec import encode_indexes
+from .core import parse_dec
+from .names import name_palette
+from .spaces import hsl_to_rgb, rgb_to_hsl
+from .tables import LUM_B, LUM_G, LUM_R, MAX_DEC, luminance_of
+from .writers import ordered_map
+
+AXES = ("index", "hue", "luminance")
+FORMATS = ("text", "hex", "jsonl", "csv")
+WINDOW = 16384  # Colors formatted and written per window.
+DEFAULT_STRIDES = {"index": 1, "hue": 5.0, "luminance": 0.02}
+LIGHTNESS_STEPS = 24  # Bisection steps when solving for a luminance (below 1/255 of lightness).
+
+CSV_HEADER = "hex,decimal_index,r,g,b,luminance,contrast"
+_JSONL = '{"hex":"#%06X","decimal_index":%d,"r":%d,"g":%d,"b":%d,"luminance":%.6f,"contrast":%.2f'
+_CSV = "#%06X,%d,%d,%d,%d,%.6f,%.2f"
+_TEXT = " #%06X %8d  L %.4f  %5.2f:1"
+
+# Function to get the decimal indexes of an index walk from `start` to `end` (inclusive) every `stride` colors.
+def index_path(start, end, stride=1):
+    stride = abs(int(stride)) or 1
+    return range(start, end + 1, stride) if end >= start else range(start, end - 1, -stride)
+
+# Function to drop consecutive repeats (axis walks may round several steps to the same color).
+def _distinct(decs):
+    last = None
+    for dec in decs:
+        if dec != last:
+            yield dec
+            last = dec
+
+# Function to yield the colors around the hue circle from `start`'s hue to `end`'s (or a full turn), keeping S and L.
+def hue_path(start, end=None, stride=5.0):
+    h0, s, l = rgb_to_hsl(start >> 16, (start >> 8) & 0xFF, start & 0xFF)
+    span = 360.0 if end is None else (rgb_to_hsl(end >> 16, (end >> 8) & 0xFF, end & 0xFF)[0] - h0) % 360
+    stride = abs(stride) or DEFAULT_STRIDES["hue"]
+    count = int(span / stride + 1e-9)
+    if end is not None:
+        count += 1  # The end hue itself is included; a full turn stops before coming back to the start.
+    for i in range(count):
+        r, g, b = hsl_to_rgb(h0 + i * stride, s, l)
+        yield (r << 16) | (g << 8) | b
+
+# Function to find the color with hue `h` and saturation `s` whose relative luminance is closest to `target`.
+def _solve_luminance(h, s, target):
+    lo, hi = 0.0, 1.0  # Luminance grows with HSL lightness for a fixed hue and saturation.
+    for _ in range(LIGHTNESS_STEPS):
+        mid = (lo + hi) / 2
+        r, g, b = hsl_to_rgb(h, s, mid)
+        if LUM_R[r] + LUM_G[g] + LUM_B[b] < target:
+            lo = mid
+        else:
+            hi = mid
+    r, g, b = hsl_to_rgb(h, s, hi)
+    return (r << 16) | (g << 8) | b
+
+# Function to yield colors with `start`'s hue and saturation, from `start`'s luminance to `end`'s (or 0 -> 1).
+def luminance_path(start, end=None, stride=0.02):
+    h, s, _ = rgb_to_hsl(start >> 16, (start >> 8) & 0xFF, start & 0xFF)
+    y0, y1 = (0.0, 1.0) if end is None else (luminance_of(start), luminance_of(end))
+    stride = abs(stride) or DEFAULT_STRIDES["luminance"]
+    step = stride if y1 >= y0 else -stride
+    count = int(abs(y1 - y0) / stride + 1e-9) + 1
+    return _distinct(_solve_luminance(h, s, y0 + i * step) for i in range(count))
+
+# Function to get the colors of a walk along `axis` ("index", "hue" or "luminance").
+def walk_path(axis, start, end=None, stride=None):
+    stride = DEFAULT_STRIDES[axis] if stride is None else stride
+    if axis == "index":
+        return index_path(start, MAX_DEC if end is None else end, stride)
+    if axis == "hue":
+        return _distinct(hue_path(start, end, stride))
+    if axis == "luminance":
+        return luminance_path(start, end, stride)
+    raise ValueError(f"unknown walk axis: {axis} (choose from {', '.join(AXES)})")
+
+# Function to cut a path into windows: range slices for index walks (cheap to send to workers), lists otherwise.
+def windows(path, size=WINDOW):
+    if isinstance(path, range):
+        for i in range(0, len(path), size):
+            yield path[i:i + size]
+        return
+    path = iter(path)
+    while True:
+        window = list(islice(path, size))
+        if not window:
+            return
+        yield window
+
+# Function to quote a CSV field when it holds a separator, quote or newline.
+def _csv_field(text):
+    return f'"{text.replace(chr(34), chr(34) * 2)}"' if any(c in text for c in ',"\r\n') else text
+
+# Function to format one window of colors as text in the given format (one string, ready for a single write).
+def render_window(fmt, decs, names=False):
+    if fmt == "hex":
+        return encode_indexes(decs)  # Bulk hexlify, no per-color formatting.
+    labels = [name for name, _ in name_palette(list(decs))] if names else None
+    template = {"jsonl": _JSONL, "csv": _CSV, "text": _TEXT}[fmt]
+    lum_r, lum_g, lum_b = LUM_R, LUM_G, LUM_B
+    out = []
+    append = out.append
+    if fmt == "text":
+        from .render import swatch  # Terminal rows only: swatches follow the detected color mode.
+        for dec in decs:
+            l = lum_r[dec >> 16] + lum_g[(dec >> 8) & 0xFF] + lum_b[dec & 0xFF]
+            append(swatch(dec) + template % (dec, dec, l, 1.05 / (l + 0.05)))
+    else:
+        for dec in decs:
+            r, g, b = dec >> 16, (dec >> 8) & 0xFF, dec & 0xFF
+            l = lum_r[r] + lum_g[g] + lum_b[b]
+            append(template % (dec, dec, r, g, b, l, 1.05 / (l + 0.05)))  # Contrast vs white: (1 + 0.05) / (L + 0.05).
+    if labels is not None:  # Names come from (possibly custom) palettes, so they are quoted for JSON and CSV.
+        if fmt == "jsonl":
+            labels = [',"name":' + json.dumps(label) for label in labels]
+        elif fmt == "csv":
+            labels = ["," + _csv_field(label) for label in labels]
+        else:
+            labels = ["  " + label for label in labels]
+        out = [line + label for line, label in zip(out, labels)]
+    if fmt == "jsonl":
+        return "}\n".join(out) + "}\n" if out else ""
+    return "\n".join(out) + "\n" if out else ""
+
+# Function to render one (fmt, decs, names) job (picklable entry point for the worker pool).
+def _render_job(job):
+    return render_window(*job)
+
+# Function to yield the formatted windows of a walk, in order, with the next ones prepared ahead of time.
+def walk_chunks(path, fmt="jsonl", names=False, jobs=1, window=WINDOW):
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown walk format: {fmt} (choose from {', '.join(FORMATS)})")
+    jobs_iter = ((fmt, decs, names) for decs in windows(path, window))
+    # Terminal rows stay in this process, where the color mode is set.
+    return ordered_map(_render_job, jobs_iter, jobs if fmt != "text" else 1)
+
+# Function to stream a walk to a file object; returns the number of characters written.
+def write_walk(fp, path, fmt="jsonl", names=False, jobs=1, window=WINDOW, progress=None):
+    written = 0
+    if fmt == "csv":
+        header = CSV_HEADER + (",name" if names else "") + "\n"
+        fp.write(header)
+        written += len(header)
+    total = len(path) if isinstance(path, range) else None
+    chunks = walk_chunks(path, fmt, names, jobs, window)
+    try:
+        for done, chunk in enumerate(chunks, 1):
+            fp.write(chunk)  # One write per window.
+            written += len(chunk)
+            if progress is not None:
+                progress(min(done * window, total or done * window), total)
+    finally:
+        chunks.close()  # Stops the workers or prefetch thread, also after an early exit.
+    return written
+
+# Function to parse a color argument (HEX code or decimal index).
+def _color(text):
+    try:
+        return parse_dec(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+# Function to run `hexplorer walk` with the given command-line arguments.
+def run_walk(argv=None):
+    parser = argparse.ArgumentParser(prog="hexplorer walk",
+                                     description="Stream colors along an index range, the hue circle or a luminance ramp.")
+    parser.add_argument("start", type=_color, nargs="?", default=0, help="first color: HEX or decimal index (default: 0)")
+    parser.add_argument("end", type=_color, nargs="?", default=None,
+                        help="last color (default: FFFFFF; a full hue turn; luminance 0 -> 1)")
+    parser.add_argument("--axis", choices=AXES, default="index", help="walk along (default: index)")
+    parser.add_argument("--stride", type=float, default=None,
+                        help="step: indexes, hue degrees or luminance (defaults: 1, 5, 0.02)")
+    parser.add_argument("-f", "--format", choices=FORMATS, default=None,
+                        help="output format (default: text on a terminal, jsonl otherwise)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--names", action="store_true", help="add the nearest color name (slower)")
+    parser.add_argument("-n", "--limit", type=int, default=0, help="stop after this many colors")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes formatting windows (default: 1)")
+    parser.add_argument("--progress", action="store_true", help="report progress on stderr")
+    args = parser.parse_args(argv)
+
+    if args.axis == "index" and args.stride is not None and args.stride != int(args.stride):
+        parser.error("--stride must be a whole number of indexes for --axis index")
+    if args.stride is not None and args.stride <= 0:
+        parser.error("--stride must be positive")
+    path = walk_path(args.axis, args.start, args.end, args.stride)
+    if args.limit > 0:
+        path = path[:args.limit] if isinstance(path, range) else islice(path, args.limit)
+    to_stdout = args.output == "-"
+    fmt = args.format or ("text" if to_stdout and sys.stdout.isatty() else "jsonl")
+    if fmt == "text":
+        from .render import set_color_mode
+        from .termcolor import detect_color_mode
+        set_color_mode(detect_color_mode())  # Nearest 256/16-color swatches on terminals without 24-bit color.
+
+    def progress(done, total):
+        shown = f"{done * 100 // total}%" if total else f"{done} colors"
+        print(f"\r🚶 Walking: {shown}", end="", file=sys.stderr, flush=True)
+
+    dst = sys.stdout if to_stdout else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        write_walk(dst, path, fmt, args.names, args.jobs, progress=progress if args.progress else None)
+        dst.flush()
+    except BrokenPipeError:
+        from .writers import silence_broken_pipe
+        silence_broken_pipe()
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if dst is not sys.stdout:
+            dst.close()
+        if args.progress:
+            print(file=sys.stderr)
+    return 0
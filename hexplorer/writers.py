@@ -0,0 +1,151 @@
+"""
+Streaming Record Writers.
+JSONL and CSV writers that consume record iterators chunk by chunk,
+so memory stays flat no matter how many records flow through them.
+"""
+
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+
+# Number of records serialized before each write to the underlying file.
+CHUNK_SIZE = 1024
+
+# Results prepared ahead of the consumer by prefetch() and ordered_map().
+PREFETCH = 2
+
+# Keys of a color metadata record (`get_color_metadata`), in order.
+METADATA_FIELDS = ("hex", "rgb", "luminance", "contrast_vs_white", "decimal_index", "name", "name_distance")
+
+# Column order used when color metadata is written as CSV (the "rgb" object becomes three columns).
+CSV_FIELDS = ("hex", "r", "g", "b") + METADATA_FIELDS[2:]
+
+# Function to encode a value as compact JSON (no indentation, no spaces), shared by every writer and the server.
+encode_json = json.JSONEncoder(separators=(",", ":")).encode
+
+# Function to write records as JSON Lines (one compact JSON object per line).
+def write_jsonl(records, fp, chunk_size=CHUNK_SIZE):
+    count = 0  # Number of records written so far.
+    buf = []  # Serialized records waiting for the next write.
+    for record in records:
+        buf.append(encode_json(record))
+        if len(buf) >= chunk_size:  # Flush a full chunk with a single write.
+            fp.write("\n".join(buf) + "\n")
+            count += len(buf)
+            del buf[:]
+    if buf:  # Flush the last partial chunk.
+        fp.write("\n".join(buf) + "\n")
+        count += len(buf)
+    return count
+
+# Function to stream one JSON document: the fields of `head` plus `key` holding every record as an array.
+# Only one chunk of serialized records is held in memory at a time.
+def write_json_document(fp, head, key, records, chunk_size=CHUNK_SIZE):
+    opening = encode_json(head)[:-1]  # Head object without its closing brace.
+    fp.write(opening + ("," if head else "") + encode_json(key) + ":[")
+    count = 0
+    buf = []
+    for record in records:
+        buf.append(encode_json(record))
+        if len(buf) >= chunk_size:
+            fp.write(("," if count else "") + ",".join(buf))
+            count += len(buf)
+            del buf[:]
+    if buf:
+        fp.write(("," if count else "") + ",".join(buf))
+        count += len(buf)
+    fp.write("]}\n")
+    return count
+
+# Function to flatten a `get_color_metadata` dict into a CSV row (contrast becomes a plain number).
+def metadata_row(meta):
+    rgb = meta["rgb"]
+    contrast = meta["contrast_vs_white"].split(" ", 1)[0]  # "4.5 : 1" -> "4.5".
+    return (meta["hex"], rgb["r"], rgb["g"], rgb["b"], meta["luminance"], contrast,
+            meta["decimal_index"], meta["name"], meta["name_distance"])
+
+# Function to write color metadata records as CSV with a header row.
+def write_csv(records, fp, chunk_size=CHUNK_SIZE, header=True):
+    writer = csv.writer(fp, lineterminator="\n")
+    if header:
+        writer.writerow(CSV_FIELDS)
+    count = 0
+    buf = []
+    for record in records:
+        buf.append(metadata_row(record))
+        if len(buf) >= chunk_size:
+            writer.writerows(buf)
+            count += len(buf)
+            del buf[:]
+    if buf:
+        writer.writerows(buf)
+        count += len(buf)
+    return count
+
+# Map of output format names to their writer functions.
+WRITERS = {
+    "jsonl": write_jsonl,
+    "csv": write_csv,
+}
+
+# Function to keep piping into `head` and friends from raising again when Python flushes stdout on exit.
+def silence_broken_pipe():
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+
+# Function to iterate `items` on a background thread, keeping up to `depth` of them ready ahead of the consumer.
+def prefetch(items, depth=PREFETCH):
+    ready = queue.Queue(depth)
+    stop = threading.Event()
+    done = object()
+
+    # Function to hand one item over, giving up when the consumer has gone away.
+    def put(item):
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # Function to produce every item on the background thread.
+    def fill():
+        try:
+            for item in items:
+                if not put((True, item)):
+                    return
+            put((True, done))
+        except BaseException as e:  # Re-raised in the consumer.
+            put((False, e))
+
+    thread = threading.Thread(target=fill, name="hexplorer-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            ok, item = ready.get()
+            if not ok:
+                raise item
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+
+# Function to map `func` over `items` in order, preparing the next results while the consumer handles the current one:
+# in a process pool when `jobs` > 1 (`func` and the items must be picklable), else on a prefetch thread.
+def ordered_map(func, items, jobs=1, depth=PREFETCH):
+    pool = None
+    if jobs > 1:
+        import multiprocessing  # Only needed when work is spread over processes.
+        pool = multiprocessing.Pool(jobs)
+    try:
+        results = pool.imap(func, items) if pool is not None else prefetch(map(func, items), depth)
+        for result in results:
+            yield result
+    finally:
+        if pool is not None:
+            pool.terminate()